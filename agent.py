@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+服务监控Agent
+在目标主机本地执行检测，并把结果批量压缩后推送到中心节点
+"""
+import argparse
+import gzip
+import json
+import logging
+import signal
+import socket
+import sys
+import os
+import time
+from typing import List, Dict, Any
+
+import yaml
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from concurrent_checker import ConcurrentChecker
+from detector_factory import DetectorFactory
+from detectors.base import CheckResult
+from logger import LogManager
+
+
+class MonitorAgent:
+    """本地检测并推送结果的Agent"""
+
+    def __init__(self, config_file: str = "agent.yaml"):
+        self.config_file = config_file
+        self.config = self._load_config()
+        self.running = True
+
+        agent_config = self.config.get('agent', {})
+        self.agent_id = agent_config.get('agent_id') or socket.gethostname()
+        self.central_url = agent_config['central_url'].rstrip('/')
+        self.token = agent_config.get('token', '')
+        self.push_timeout = agent_config.get('push_timeout', 10)
+        self.check_interval = self.config.get('check_interval', 30)
+
+        # Agent只做本机检测，忽略服务上的server字段
+        self.services_config = [
+            {key: value for key, value in service.items() if key != 'server'}
+            for service in self.config.get('services', [])
+        ]
+        # 以启动时间为基数，保证Agent重启后序列号仍单调递增
+        self.sequence = int(time.time() * 1000)
+
+        self.checker = ConcurrentChecker(
+            max_workers=self.config.get('max_workers', 5),
+            detector_factory=DetectorFactory()
+        )
+        self.log_manager = LogManager(
+            log_level=self.config.get('log_level', 'INFO')
+        )
+
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+
+    def _load_config(self) -> Dict[str, Any]:
+        """加载配置文件"""
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                return yaml.safe_load(f)
+        except Exception as e:
+            print(f"Error loading config file: {e}")
+            sys.exit(1)
+
+    def _signal_handler(self, signum, frame):
+        """信号处理"""
+        self.log_manager.logger.info("接收到停止信号，正在关闭Agent...")
+        self.running = False
+
+    def build_payload(self, results: List[CheckResult]) -> bytes:
+        """构建推送数据：首行为批次头，其后每行一个检测结果（gzip压缩的JSON lines）"""
+        self.sequence += 1
+        header = {
+            'agent_id': self.agent_id,
+            'seq': self.sequence,
+            'timestamp': time.time(),
+            'interval': self.check_interval,
+            'count': len(results)
+        }
+        lines = [json.dumps(header, separators=(',', ':'), ensure_ascii=False)]
+        for result in results:
+            data = result.to_dict()
+            data['server'] = self.agent_id
+            lines.append(json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str))
+        return gzip.compress('\n'.join(lines).encode('utf-8'))
+
+    def push(self, results: List[CheckResult]) -> bool:
+        """推送一批检测结果到中心节点"""
+        import requests
+
+        payload = self.build_payload(results)
+        try:
+            response = requests.post(
+                f"{self.central_url}/api/agent/ingest",
+                data=payload,
+                headers={
+                    'Content-Type': 'application/x-ndjson',
+                    'Content-Encoding': 'gzip',
+                    'X-Agent-Token': self.token
+                },
+                timeout=self.push_timeout
+            )
+            if response.status_code != 200:
+                self.log_manager.logger.error(f"推送失败: HTTP {response.status_code} {response.text[:200]}")
+                return False
+            self.log_manager.logger.info(f"推送成功: seq={self.sequence}, {len(results)}个结果, {len(payload)}字节")
+            return True
+        except Exception as e:
+            self.log_manager.logger.error(f"推送失败: {e}")
+            return False
+
+    def run_once(self) -> List[CheckResult]:
+        """执行一次检测并推送"""
+        results = self.checker.check_services(self.services_config)
+        self.log_manager.log_results(results)
+        self.push(results)
+        return results
+
+    def run(self):
+        """运行Agent"""
+        self.log_manager.logger.info(
+            f"启动Agent {self.agent_id}，共 {len(self.services_config)} 个服务，"
+            f"检测间隔 {self.check_interval} 秒，中心节点 {self.central_url}"
+        )
+
+        while self.running:
+            started = time.time()
+            try:
+                self.run_once()
+            except Exception as e:
+                self.log_manager.logger.error(f"Agent检测失败: {e}")
+
+            while self.running and time.time() - started < self.check_interval:
+                time.sleep(1)
+
+        self.log_manager.logger.info("Agent已停止")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="服务监控Agent")
+    parser.add_argument('-c', '--config', default='agent.yaml', help="Agent配置文件")
+    parser.add_argument('--once', action='store_true', help="只执行一次检测并推送")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    agent = MonitorAgent(args.config)
+    if args.once:
+        agent.run_once()
+    else:
+        agent.run()
+
+
+if __name__ == "__main__":
+    main()
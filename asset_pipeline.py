@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+静态资源构建：文件名加内容哈希、预压缩（gzip/brotli）、图标字体按实际使用的图标裁剪。
+启动时自动执行（源文件未变化时跳过），也可以单独运行：python asset_pipeline.py
+"""
+
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import shutil
+from typing import Dict, List, Optional, Set
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+# 参与构建的资源目录（相对 static 目录）
+ASSET_DIRS = ['css', 'js', 'webfonts', 'image']
+# 值得预压缩的文件类型（woff2、png 本身已压缩）
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.ttf', '.svg', '.ico', '.json', '.map'}
+# 扫描图标使用情况的文件
+ICON_SOURCES = ['static/js/script.js', 'templates/index.html']
+# 需要裁剪的图标字体及其图标定义所在的样式表
+ICON_FONTS = ['webfonts/fa-solid-900.woff2', 'webfonts/fa-solid-900.ttf']
+ICON_STYLESHEET = 'css/all.min.css'
+
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_ICON_RULE = re.compile(r'([^{}]+)\{content:"\\([0-9a-fA-F]+)"\}')
+_ICON_CLASS = re.compile(r'\bfa-([a-z0-9-]+)')
+
+
+class AssetPipeline:
+    """静态资源构建与查找
+
+    构建结果写入 output_dir，文件名形如 css/style.<hash>.css，
+    manifest.json 记录 原始路径 -> 哈希路径 的映射以及源文件指纹。
+    """
+
+    def __init__(self, static_dir: str = 'static', output_dir: str = 'static/dist', subset_fonts: bool = True,
+                 icon_sources: Optional[List[str]] = None):
+        self.static_dir = static_dir
+        self.output_dir = output_dir
+        self.subset_fonts = subset_fonts
+        self.icon_sources = icon_sources or ICON_SOURCES
+        self.manifest: Dict[str, str] = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _source_files(self) -> List[str]:
+        files = []
+        for directory in ASSET_DIRS:
+            root = os.path.join(self.static_dir, directory)
+            if not os.path.isdir(root):
+                continue
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    files.append(os.path.relpath(os.path.join(dirpath, filename), self.static_dir).replace(os.sep, '/'))
+        return sorted(files)
+
+    def _fingerprint(self, files: List[str]) -> str:
+        """源文件、图标来源和构建选项的整体指纹，用于判断是否需要重新构建"""
+        options = [self.subset_fonts, brotli is not None, importlib.util.find_spec('fontTools') is not None]
+        digest = hashlib.sha256(json.dumps(options).encode())
+        for path in files + self.icon_sources:
+            full_path = path if path in self.icon_sources else os.path.join(self.static_dir, path)
+            if os.path.exists(full_path):
+                stat = os.stat(full_path)
+                digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
+    def load_or_build(self) -> Dict[str, str]:
+        """源文件未变化时直接加载已有的构建结果，否则重新构建"""
+        files = self._source_files()
+        fingerprint = self._fingerprint(files)
+        manifest_path = os.path.join(self.output_dir, MANIFEST_NAME)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('fingerprint') == fingerprint:
+                self.manifest = data['assets']
+                return self.manifest
+        except (OSError, ValueError, KeyError):
+            pass
+        return self.build(files, fingerprint)
+
+    def build(self, files: Optional[List[str]] = None, fingerprint: Optional[str] = None) -> Dict[str, str]:
+        """构建全部资源：先处理字体等被引用的文件，再改写并输出样式表"""
+        files = files if files is not None else self._source_files()
+        fingerprint = fingerprint or self._fingerprint(files)
+        staging_dir = f"{self.output_dir}.tmp"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+        contents = {}
+        for path in files:
+            with open(os.path.join(self.static_dir, path), 'rb') as f:
+                contents[path] = f.read()
+        if self.subset_fonts:
+            self._subset_icon_fonts(contents)
+
+        manifest = {}
+        # 样式表中的 url() 引用其他资源，需要在被引用文件的哈希名确定后再改写
+        for path in sorted(files, key=lambda name: name.endswith('.css')):
+            data = contents[path]
+            if path.endswith('.css'):
+                data = self._rewrite_css_urls(path, data, manifest)
+            manifest[path] = self._write(staging_dir, path, data)
+
+        with open(os.path.join(staging_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'assets': manifest}, f, indent=2, ensure_ascii=False)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+        os.replace(staging_dir, self.output_dir)
+
+        self.manifest = manifest
+        self.logger.info(f"静态资源构建完成: {len(manifest)}个文件 -> {self.output_dir}")
+        return manifest
+
+    def _write(self, staging_dir: str, path: str, data: bytes) -> str:
+        """写入带哈希的文件名及其预压缩版本，返回哈希路径"""
+        stem, extension = os.path.splitext(path)
+        hashed_path = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+        full_path = os.path.join(staging_dir, hashed_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(data)
+
+        if extension.lower() in COMPRESSIBLE_EXTENSIONS:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                with open(f"{full_path}.gz", 'wb') as f:
+                    f.write(compressed)
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    with open(f"{full_path}.br", 'wb') as f:
+                        f.write(compressed)
+        return hashed_path
+
+    @staticmethod
+    def _rewrite_css_urls(css_path: str, data: bytes, manifest: Dict[str, str]) -> bytes:
+        """把样式表中的相对 url() 改写为哈希文件名，找不到的引用保持原样"""
+        base = os.path.dirname(css_path)
+
+        def replace(match):
+            url = match.group(2)
+            if url.startswith(('data:', 'http:', 'https:', '//', '/')):
+                return match.group(0)
+            target = url.partition('?')[0]
+            target, _, fragment = target.partition('#')
+            resolved = os.path.normpath(os.path.join(base, target)).replace(os.sep, '/')
+            if resolved not in manifest:
+                return match.group(0)
+            hashed = os.path.relpath(manifest[resolved], base or '.').replace(os.sep, '/')
+            return f"url({hashed}{'#' + fragment if fragment else ''})"
+
+        return _CSS_URL.sub(replace, data.decode('utf-8')).encode('utf-8')
+
+    def used_icon_codepoints(self, stylesheet: bytes) -> Set[int]:
+        """扫描脚本和模板中出现的 fa-* 类名，按样式表中的定义映射为码位"""
+        used = set()
+        for path in self.icon_sources:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    used.update(_ICON_CLASS.findall(f.read()))
+
+        codepoints = set()
+        for selectors, codepoint in _ICON_RULE.findall(stylesheet.decode('utf-8', errors='replace')):
+            for name in re.findall(r'\.fa-([a-z0-9-]+):{1,2}before', selectors):
+                if name in used:
+                    codepoints.add(int(codepoint, 16))
+        return codepoints
+
+    def _subset_icon_fonts(self, contents: Dict[str, bytes]):
+        """按实际使用的图标裁剪字体（需要 fontTools，未安装时保留完整字体）"""
+        if ICON_STYLESHEET not in contents:
+            return
+        try:
+            from fontTools import subset
+            from fontTools.ttLib import TTFont
+        except ImportError:
+            self.logger.info("未安装fontTools，跳过图标字体裁剪")
+            return
+
+        import io
+        # fontTools 在 INFO 级别逐表输出裁剪过程，只保留警告
+        logging.getLogger('fontTools').setLevel(logging.WARNING)
+        codepoints = self.used_icon_codepoints(contents[ICON_STYLESHEET])
+        if not codepoints:
+            return
+        for path in ICON_FONTS:
+            if path not in contents:
+                continue
+            flavor = 'woff2' if path.endswith('.woff2') else None
+            if flavor == 'woff2' and brotli is None:
+                # woff2 编码依赖 brotli
+                continue
+            try:
+                font = TTFont(io.BytesIO(contents[path]))
+                options = subset.Options()
+                options.flavor = flavor
+                options.layout_features = ['*']
+                subsetter = subset.Subsetter(options)
+                subsetter.populate(unicodes=codepoints)
+                subsetter.subset(font)
+                output = io.BytesIO()
+                font.flavor = flavor
+                font.save(output)
+            except Exception as e:
+                self.logger.warning(f"图标字体裁剪失败 {path}: {e}")
+                continue
+            self.logger.info(f"图标字体裁剪 {path}: {len(codepoints)}个图标, "
+                             f"{len(contents[path])} -> {len(output.getvalue())} 字节")
+            contents[path] = output.getvalue()
+
+    def lookup(self, path: str) -> Optional[str]:
+        """原始路径对应的哈希路径，未构建时返回None"""
+        return self.manifest.get(path)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="构建带哈希和预压缩的静态资源")
+    parser.add_argument('--static-dir', default='static', help="静态资源目录")
+    parser.add_argument('--output-dir', default='static/dist', help="构建输出目录")
+    parser.add_argument('--no-subset', action='store_true', help="不裁剪图标字体")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    manifest = AssetPipeline(args.static_dir, args.output_dir, subset_fonts=not args.no_subset).build()
+    for path, hashed_path in manifest.items():
+        print(f"{path} -> {hashed_path}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
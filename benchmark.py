@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+远程执行后端基准测试：对同一台主机分别用 paramiko 和系统 ssh 后端执行检测命令，
+比较每次检测的CPU开销（监控进程自身 + ssh子进程）和延迟。
+"""
+
+import argparse
+import concurrent.futures
+import os
+import resource
+import sys
+import time
+from typing import Any, Dict, List
+
+import yaml
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from latency_profile import percentile
+from ssh_manager import ssh_manager
+from transports import TRANSPORTS, close_all_transports
+
+
+def _cpu_seconds() -> Dict[str, float]:
+    """本进程和已回收子进程累计的CPU时间"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'self': own.ru_utime + own.ru_stime,
+        'children': children.ru_utime + children.ru_stime
+    }
+
+
+def _master_cpu_seconds(transport_name: str, server_config: Dict[str, Any]) -> float:
+    """ssh 主连接进程的CPU时间
+
+    ControlPersist 的主连接在后台常驻，不是本进程回收的子进程，加解密开销需要单独从 /proc 读取。
+    """
+    if transport_name != 'openssh':
+        return 0.0
+    pid = TRANSPORTS[transport_name].master_pid(server_config)
+    if pid is None:
+        return 0.0
+    with open(f"/proc/{pid}/stat", 'r') as f:
+        stat = f.read()
+    fields = stat[stat.rindex(')') + 2:].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def run_benchmark(transport_name: str, server_config: Dict[str, Any], command: str,
+                  iterations: int, concurrency: int) -> Dict[str, Any]:
+    """用指定后端执行 iterations 次命令，返回CPU和延迟统计"""
+    transport = TRANSPORTS[transport_name]
+    # 预热：建立连接（或ssh主连接），不计入统计
+    transport.execute(server_config, command, timeout=30)
+
+    latencies: List[float] = []
+    errors = 0
+
+    def run_one():
+        started = time.monotonic()
+        return_code, _, _ = transport.execute(server_config, command, timeout=30)
+        return return_code, time.monotonic() - started
+
+    cpu_before = _cpu_seconds()
+    master_before = _master_cpu_seconds(transport_name, server_config)
+    started = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_one) for _ in range(iterations)]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                return_code, latency = future.result()
+                latencies.append(latency)
+                if return_code != 0:
+                    errors += 1
+            except Exception:
+                errors += 1
+    wall = time.monotonic() - started
+    cpu_after = _cpu_seconds()
+    master_cpu = _master_cpu_seconds(transport_name, server_config) - master_before
+
+    latencies.sort()
+    self_cpu = cpu_after['self'] - cpu_before['self']
+    children_cpu = cpu_after['children'] - cpu_before['children'] + master_cpu
+    return {
+        'transport': transport_name,
+        'checks': iterations,
+        'errors': errors,
+        'wall_s': round(wall, 2),
+        'checks_per_s': round(iterations / wall, 1) if wall else None,
+        'self_cpu_ms_per_check': round(self_cpu / iterations * 1000, 2),
+        'ssh_cpu_ms_per_check': round(children_cpu / iterations * 1000, 2),
+        'total_cpu_ms_per_check': round((self_cpu + children_cpu) / iterations * 1000, 2),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1) if latencies else None
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="比较 paramiko 与系统 ssh 后端每次检测的CPU开销")
+    parser.add_argument('-c', '--config', default='config.yaml', help="配置文件")
+    parser.add_argument('-s', '--server', required=True, help="ssh_servers 中的服务器名称")
+    parser.add_argument('--command', default='systemctl is-active sshd', help="每次检测执行的命令")
+    parser.add_argument('-n', '--iterations', type=int, default=200, help="每个后端执行的次数")
+    parser.add_argument('--concurrency', type=int, default=10, help="并发数")
+    parser.add_argument('--transports', default='paramiko,openssh', help="参与比较的后端，逗号分隔")
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    ssh_servers = config.get('ssh_servers', {})
+    if args.server not in ssh_servers:
+        print(f"Unknown server: {args.server}")
+        sys.exit(1)
+    ssh_manager.configure(ssh_servers)
+    server_config = {**ssh_servers[args.server], 'name': args.server}
+
+    results = []
+    try:
+        for transport_name in args.transports.split(','):
+            print(f"运行 {transport_name} ...")
+            results.append(run_benchmark(transport_name.strip(), server_config, args.command,
+                                         args.iterations, args.concurrency))
+    finally:
+        close_all_transports()
+
+    columns = ['transport', 'checks', 'errors', 'wall_s', 'checks_per_s', 'self_cpu_ms_per_check',
+               'ssh_cpu_ms_per_check', 'total_cpu_ms_per_check', 'p50_ms', 'p99_ms']
+    print()
+    print('  '.join(f"{column:>22}" for column in columns))
+    for result in results:
+        print('  '.join(f"{str(result[column]):>22}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
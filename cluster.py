@@ -0,0 +1,208 @@
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+from detectors.base import CheckResult
+
+# 本地服务（未指定server）的分片键，由集群中的一个节点负责
+LOCAL_SHARD = 'local'
+_LOOPBACK_HOSTS = ('127.0.0.1', '::1', 'localhost')
+
+
+def rendezvous_owner(key: str, nodes: List[str]) -> str:
+    """最高随机权重（rendezvous）哈希：节点增减时只有该节点负责的主机会迁移"""
+    return max(nodes, key=lambda node: hashlib.sha256(f"{node}\x00{key}".encode('utf-8')).digest())
+
+
+class ClusterNode:
+    """多节点监控集群中的一个节点
+
+    所有节点使用相同的配置文件，按主机（服务的 server 字段）做 rendezvous 哈希分片，
+    每个节点只检测分配给自己的主机。节点之间通过 HTTP 互发心跳，超过 failure_timeout
+    未收到心跳的节点视为失效，其分片由剩余节点接管；成员变化时立即触发一次检测，
+    因此 failure_timeout 小于检测间隔时接管在一个检测周期内完成。
+    每轮检测结果按 Agent 批次格式推送给其他节点，任一节点的 Web 界面都能展示全局视图。
+    """
+
+    def __init__(self, node_id: str, nodes: Dict[str, str], token: str = '',
+                 heartbeat_interval: float = 2, failure_timeout: float = None):
+        if node_id not in nodes:
+            raise ValueError(f"cluster.nodes 中没有本节点: {node_id}")
+        self.node_id = node_id
+        self.nodes = {name: url.rstrip('/') for name, url in nodes.items()}
+        self.peers = [name for name in sorted(self.nodes) if name != node_id]
+        self.token = token
+        self.heartbeat_interval = heartbeat_interval
+        self.failure_timeout = failure_timeout or heartbeat_interval * 3
+
+        # 节点 -> 最近一次收到心跳（或心跳请求成功）的时间
+        self._last_seen: Dict[str, float] = {}
+        self._alive: Set[str] = {node_id}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(len(self.peers), 1))
+        # 以启动时间为基数，保证节点重启后序列号仍单调递增
+        self._sequence = int(time.time() * 1000)
+        self._last_payload: Optional[bytes] = None
+
+        # 成员变化回调：on_change(存活节点集合, 新加入节点, 失效节点)
+        self.on_change: Optional[Callable[[Set[str], Set[str], Set[str]], None]] = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+        # 未设置令牌时各节点只接受本机请求，节点分布在多台主机上时必须设置
+        remote_peers = [peer for peer in self.peers if urlparse(self.nodes[peer]).hostname not in _LOOPBACK_HOSTS]
+        if not token and remote_peers:
+            self.logger.warning(
+                f"cluster.token 未设置，节点只接受本机请求，无法与其他主机上的节点通信: {', '.join(remote_peers)}"
+            )
+
+    @property
+    def source_id(self) -> str:
+        """本节点结果在其他节点上的来源标识（与Agent共用一套合并逻辑）"""
+        return f"node:{self.node_id}"
+
+    def alive_nodes(self) -> List[str]:
+        with self._lock:
+            return sorted(self._alive)
+
+    def filter_services(self, services_config: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """本节点负责检测的服务"""
+        nodes = self.alive_nodes()
+        return [
+            service_config for service_config in services_config
+            if rendezvous_owner(service_config.get('server') or LOCAL_SHARD, nodes) == self.node_id
+        ]
+
+    def start(self):
+        """先同步发送一轮心跳确定存活节点，避免启动时每个节点都认为自己负责全部主机"""
+        self._heartbeat_round()
+        self._thread = threading.Thread(target=self._heartbeat_loop, name='cluster-heartbeat', daemon=True)
+        self._thread.start()
+        self.logger.info(f"集群节点 {self.node_id} 已启动，存活节点: {', '.join(self.alive_nodes())}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.heartbeat_interval + 1)
+        self._executor.shutdown(wait=False)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self._heartbeat_round()
+            except Exception as e:
+                self.logger.error(f"集群心跳失败: {e}")
+
+    def _heartbeat_round(self):
+        body = json.dumps({'node_id': self.node_id, 'timestamp': time.time()}).encode('utf-8')
+        futures = {
+            self._executor.submit(self._post, peer, '/api/cluster/heartbeat', body, 'application/json'): peer
+            for peer in self.peers
+        }
+        for future in concurrent.futures.as_completed(futures):
+            if future.result():
+                self.mark_seen(futures[future], update=False)
+        self._update_membership()
+
+    def _post(self, peer: str, path: str, body: bytes, content_type: str, gzipped: bool = False) -> bool:
+        import requests
+
+        headers = {'Content-Type': content_type, 'X-Cluster-Token': self.token}
+        if gzipped:
+            headers['Content-Encoding'] = 'gzip'
+        try:
+            response = requests.post(f"{self.nodes[peer]}{path}", data=body, headers=headers,
+                                     timeout=max(self.heartbeat_interval, 1))
+            if response.status_code != 200:
+                self.logger.warning(f"集群请求失败 {peer}{path}: HTTP {response.status_code}")
+                return False
+            return True
+        except Exception as e:
+            self.logger.debug(f"集群请求失败 {peer}{path}: {e}")
+            return False
+
+    def mark_seen(self, node_id: str, update: bool = True):
+        """记录收到节点心跳，update 为真时立即重新计算成员"""
+        if node_id not in self.nodes or node_id == self.node_id:
+            return
+        with self._lock:
+            self._last_seen[node_id] = time.monotonic()
+        if update:
+            self._update_membership()
+
+    def _update_membership(self):
+        now = time.monotonic()
+        with self._lock:
+            alive = {self.node_id} | {
+                peer for peer, seen in self._last_seen.items() if now - seen <= self.failure_timeout
+            }
+            joined, failed = alive - self._alive, self._alive - alive
+            self._alive = alive
+        if not joined and not failed:
+            return
+
+        if joined:
+            self.logger.info(f"集群节点加入: {', '.join(sorted(joined))}")
+            # 新加入的节点补发最近一轮结果，不必等到下一个检测周期
+            payload = self._last_payload
+            if payload is not None:
+                for peer in joined:
+                    self._executor.submit(self._post, peer, '/api/cluster/results', payload,
+                                          'application/x-ndjson', True)
+        if failed:
+            self.logger.warning(f"集群节点失效: {', '.join(sorted(failed))}，其分片由存活节点接管")
+        if self.on_change:
+            self.on_change(alive, joined, failed)
+
+    def build_payload(self, results: List[CheckResult], interval: float) -> bytes:
+        """结果批次：与Agent推送相同的 JSON lines 格式，首行为批次头"""
+        self._sequence += 1
+        header = {
+            'agent_id': self.source_id,
+            'seq': self._sequence,
+            'timestamp': time.time(),
+            'interval': interval,
+            'count': len(results)
+        }
+        lines = [json.dumps(header, separators=(',', ':'), ensure_ascii=False)]
+        for result in results:
+            lines.append(json.dumps(result.to_dict(), separators=(',', ':'), ensure_ascii=False, default=str))
+        return gzip.compress('\n'.join(lines).encode('utf-8'))
+
+    def publish(self, results: List[CheckResult], interval: float):
+        """把本节点本轮的检测结果推送给所有存活节点"""
+        payload = self.build_payload(results, interval)
+        self._last_payload = payload
+        peers = [peer for peer in self.alive_nodes() if peer != self.node_id]
+        for peer in peers:
+            self._executor.submit(self._post, peer, '/api/cluster/results', payload, 'application/x-ndjson', True)
+
+    def get_status(self, services_config: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """集群状态：各节点存活情况及负责的主机数"""
+        nodes = self.alive_nodes()
+        hosts: Dict[str, Set[str]] = {node: set() for node in nodes}
+        for service_config in services_config:
+            host = service_config.get('server') or LOCAL_SHARD
+            hosts[rendezvous_owner(host, nodes)].add(host)
+        now = time.monotonic()
+        with self._lock:
+            last_seen = dict(self._last_seen)
+        return {
+            'node_id': self.node_id,
+            'nodes': [
+                {
+                    'node_id': node,
+                    'url': self.nodes[node],
+                    'alive': node in hosts,
+                    'hosts': len(hosts.get(node, ())),
+                    'last_seen_ago': None if node == self.node_id or node not in last_seen
+                    else round(now - last_seen[node], 1)
+                }
+                for node in sorted(self.nodes)
+            ]
+        }
\ No newline at end of file
@@ -1,61 +1,205 @@
-import concurrent.futures
-import logging
-from typing import List, Dict, Any
-from detectors.base import CheckResult, ServiceStatus
-from detector_factory import DetectorFactory
-
-
-class ConcurrentChecker:
-    """并发服务检测器"""
-
-    def __init__(self, max_workers: int = 5, detector_factory: DetectorFactory = None):
-        self.max_workers = max_workers
-        self.detector_factory = detector_factory or DetectorFactory()
-        self.logger = logging.getLogger(self.__class__.__name__)
-
-    def check_services(self, services_config: List[Dict[str, Any]]) -> List[CheckResult]:
-        """并发检测所有服务"""
-        results = []
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 创建检测任务
-            future_to_service = {
-                executor.submit(self._check_single_service, service_config): service_config
-                for service_config in services_config
-            }
-
-            # 收集结果
-            for future in concurrent.futures.as_completed(future_to_service):
-                service_config = future_to_service[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as exc:
-                    service_name = service_config.get('name', 'unknown')
-                    server_name = service_config.get('server', 'local')
-                    self.logger.error(f"Service {service_name} on {server_name} generated an exception: {exc}")
-                    results.append(CheckResult(
-                        service_name=service_name,
-                        service_type=service_config.get('type', 'unknown'),
-                        status=ServiceStatus.UNKNOWN,
-                        message=f"Check failed with exception: {str(exc)}",
-                        server=server_name
-                    ))
-
-        return results
-
-    def _check_single_service(self, service_config: Dict[str, Any]) -> CheckResult:
-        """检测单个服务"""
-        try:
-            detector = self.detector_factory.create_detector(service_config)
-            return detector.check()
-        except Exception as e:
-            service_name = service_config.get('name', 'unknown')
-            server_name = service_config.get('server', 'local')
-            return CheckResult(
-                service_name=service_name,
-                service_type=service_config.get('type', 'unknown'),
-                status=ServiceStatus.UNKNOWN,
-                message=f"Failed to create or execute detector: {str(e)}",
-                server=server_name
-            )
\ No newline at end of file
+import concurrent.futures
+import dataclasses
+import itertools
+import logging
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from detectors.base import CheckResult, ServiceStatus
+from detector_factory import DetectorFactory
+from latency_profile import LatencyProfiler
+from probe_cache import ProbeCache
+
+
+class ConcurrentChecker:
+    """并发服务检测器"""
+
+    def __init__(self, max_workers: int = 5, detector_factory: DetectorFactory = None,
+                 probe_cache: ProbeCache = None, cycle_timeout: Optional[float] = None,
+                 latency_profiler: LatencyProfiler = None):
+        self.max_workers = max_workers
+        self.detector_factory = detector_factory or DetectorFactory()
+        self.probe_cache = probe_cache
+        # 单个检测周期的总期限，超时未完成的检测记为未知，不再阻塞本轮结果发布
+        self.cycle_timeout = cycle_timeout
+        # 按服务记录检测耗时，用于推导自适应超时
+        self.latency_profiler = latency_profiler
+        self._cycles = itertools.count(1)
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # 超出周期期限后仍在运行的检测：服务标识 -> (future, detector)
+        self._abandoned: Dict[str, Tuple[concurrent.futures.Future, Any]] = {}
+        self._abandoned_lock = threading.Lock()
+        # 本轮提交的检测，关闭时取消其中尚未开始的（Python 3.9 之前 shutdown 不支持 cancel_futures）
+        self._submitted: List[concurrent.futures.Future] = []
+        self.metrics = {
+            'cycles': 0,
+            'overruns': 0,
+            'skipped_still_running': 0,
+            'last_cycle_duration': None
+        }
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        # 线程池跨周期复用：超时的检测不会在周期结束时阻塞关闭线程池
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='checker'
+            )
+        return self._executor
+
+    def check_services(self, services_config: List[Dict[str, Any]]) -> List[CheckResult]:
+        """并发检测所有服务"""
+        results = []
+        cycle = next(self._cycles)
+        started = time.monotonic()
+
+        # 创建检测任务
+        future_to_service = {}
+        for service_config in services_config:
+            service_key = self._service_key(service_config)
+            with self._abandoned_lock:
+                still_running = service_key in self._abandoned
+            if still_running:
+                # 上一轮超时的检测还没结束，不重复提交，避免卡住的检测越积越多
+                self.metrics['skipped_still_running'] += 1
+                results.append(self._unknown_result(service_config, "Previous check is still running (overran)"))
+                continue
+
+            try:
+                detector = self.detector_factory.create_detector(service_config)
+            except Exception as e:
+                results.append(self._unknown_result(service_config, f"Failed to create or execute detector: {str(e)}"))
+                continue
+            if self.latency_profiler is not None:
+                detector.timeout_override = self.latency_profiler.timeout_for(service_key)
+            future = self.executor.submit(self._check_single_service, detector, service_config, cycle)
+            future_to_service[future] = (service_config, detector)
+        self._submitted = list(future_to_service)
+
+        # 收集结果
+        done, not_done = concurrent.futures.wait(future_to_service, timeout=self.cycle_timeout)
+        for future in done:
+            service_config, _ = future_to_service[future]
+            if future.cancelled():
+                # 检测器关闭时取消的检测
+                results.append(self._unknown_result(service_config, "Check cancelled (checker shutting down)"))
+                continue
+            try:
+                result = future.result()
+                results.append(result)
+            except Exception as exc:
+                service_name = service_config.get('name', 'unknown')
+                server_name = service_config.get('server', 'local')
+                self.logger.error(f"Service {service_name} on {server_name} generated an exception: {exc}")
+                results.append(self._unknown_result(service_config, f"Check failed with exception: {str(exc)}"))
+
+        for future in not_done:
+            service_config, detector = future_to_service[future]
+            if future.cancel():
+                # 还在线程池队列中未开始执行，直接取消
+                results.append(self._unknown_result(
+                    service_config, f"Check did not start before the cycle deadline of {self.cycle_timeout}s"
+                ))
+                continue
+            self._abandon(future, service_config, detector)
+            results.append(self._unknown_result(
+                service_config, f"Check overran the cycle deadline of {self.cycle_timeout}s"
+            ))
+
+        self.metrics['cycles'] += 1
+        self.metrics['last_cycle_duration'] = round(time.monotonic() - started, 3)
+        return results
+
+    def _abandon(self, future: concurrent.futures.Future, service_config: Dict[str, Any], detector):
+        """记录超时的检测并强制关闭其SSH通道/本地进程，让工作线程尽快归还
+
+        abort 只能中断经 execute_command 执行的命令（SSH通道、常驻shell中的命令、本地进程）。
+        本地HTTP请求、Docker SDK 调用、TCP连接，以及等待其他检测共享探测结果的检测无法中断，
+        只能等它们各自的超时到期；在此之前该服务在后续周期中会被跳过。
+        """
+        service_key = self._service_key(service_config)
+        self.metrics['overruns'] += 1
+        self.logger.warning(f"Service {service_key} overran the cycle deadline, aborting")
+
+        with self._abandoned_lock:
+            self._abandoned[service_key] = (future, detector)
+
+        def _release(_future, key=service_key):
+            with self._abandoned_lock:
+                if key in self._abandoned and self._abandoned[key][0] is _future:
+                    del self._abandoned[key]
+
+        future.add_done_callback(_release)
+        detector.abort()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """检测器运行指标"""
+        with self._abandoned_lock:
+            abandoned = sorted(self._abandoned)
+        metrics = dict(self.metrics)
+        metrics['abandoned'] = len(abandoned)
+        metrics['abandoned_services'] = abandoned
+        if self.probe_cache is not None:
+            metrics['probe_cache'] = self.probe_cache.stats()
+        if self.latency_profiler is not None:
+            metrics['latency_profiles'] = self.latency_profiler.snapshot()
+        return metrics
+
+    def shutdown(self):
+        """关闭线程池，不等待卡住的检测"""
+        with self._abandoned_lock:
+            detectors = [detector for _, detector in self._abandoned.values()]
+        for detector in detectors:
+            detector.abort()
+        for future in self._submitted:
+            future.cancel()
+        self._submitted = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _check_single_service(self, detector, service_config: Dict[str, Any], cycle: int = None) -> CheckResult:
+        """检测单个服务"""
+        started = time.monotonic()
+        # 只有本检测器实际执行了探测时才记录耗时，复用缓存或共享结果的耗时不代表服务延迟
+        ran_probe = False
+        try:
+            if self.probe_cache is None:
+                ran_probe = True
+                return detector.check()
+            result, ran_probe = self.probe_cache.get_or_run(detector.probe_key(), detector.check, cycle)
+            return self._relabel(result, detector)
+        except Exception as e:
+            return self._unknown_result(service_config, f"Failed to create or execute detector: {str(e)}")
+        finally:
+            # 超时的检测同样计入，真正变慢的服务其超时会随之放宽（不超过上限）；
+            # 被中止的检测记到中止时为止，之后等待不可中断的调用返回的时间不计入
+            if self.latency_profiler is not None and ran_probe:
+                finished = detector.aborted_at if detector.aborted else time.monotonic()
+                self.latency_profiler.record(self._service_key(service_config), max(finished - started, 0))
+
+    @staticmethod
+    def _service_key(service_config: Dict[str, Any]) -> str:
+        return f"{service_config.get('server', 'local')}/{service_config.get('name', 'unknown')}"
+
+    @staticmethod
+    def _unknown_result(service_config: Dict[str, Any], message: str) -> CheckResult:
+        return CheckResult(
+            service_name=service_config.get('name', 'unknown'),
+            service_type=service_config.get('type', 'unknown'),
+            status=ServiceStatus.UNKNOWN,
+            message=message,
+            server=service_config.get('server', 'local')
+        )
+
+    @staticmethod
+    def _relabel(result: CheckResult, detector) -> CheckResult:
+        """共享的探测结果换成当前服务的名称和服务器"""
+        server_name = detector.get_server_name()
+        if result.service_name == detector.name and result.server == server_name:
+            return result
+        details = dict(result.details) if result.details else result.details
+        if details and 'server' in details:
+            details['server'] = server_name
+        return dataclasses.replace(result, service_name=detector.name, server=server_name, details=details)
\ No newline at end of file
@@ -0,0 +1,241 @@
+import gc
+import hashlib
+import html
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, Optional
+from detectors.base import CheckResult
+
+# 单次采样的时长上限（秒），避免误操作长时间占用一个Web工作线程
+MAX_PROFILE_SECONDS = 60
+MIN_PROFILE_INTERVAL = 0.001
+MAX_STACK_DEPTH = 128
+
+
+class StackSampler:
+    """定时采样所有线程调用栈的性能分析器
+
+    每隔 interval 秒读取一次 sys._current_frames()，按线程名和调用链累计次数，
+    输出 flamegraph.pl 使用的折叠栈格式（"线程;函数;函数 次数"）。
+    只在采样期间有开销，不需要预先开启，同一时间只允许一个采样任务。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(self, seconds: float, interval: float = 0.01) -> Optional[Dict[str, Any]]:
+        """采样 seconds 秒，返回折叠栈计数；已有采样在进行时返回None"""
+        seconds = min(max(seconds, interval), MAX_PROFILE_SECONDS)
+        interval = max(interval, MIN_PROFILE_INTERVAL)
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            stacks: Counter = Counter()
+            own_thread = threading.get_ident()
+            samples = 0
+            started = time.monotonic()
+            deadline = started + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    stacks[self._collapse(names.get(thread_id, f"thread-{thread_id}"), frame)] += 1
+                samples += 1
+                time.sleep(interval)
+            return {
+                'samples': samples,
+                'duration': round(time.monotonic() - started, 3),
+                'interval': interval,
+                'stacks': dict(stacks.most_common())
+            }
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        functions = []
+        while frame is not None and len(functions) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            functions.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        functions.append(thread_name)
+        return ';'.join(reversed(functions))
+
+
+def format_collapsed(stacks: Dict[str, int]) -> str:
+    """折叠栈文本，可直接交给 flamegraph.pl 或 speedscope"""
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.items())
+
+
+def render_flamegraph(stacks: Dict[str, int], title: str = 'Flame Graph', width: int = 1200) -> str:
+    """把折叠栈渲染为独立的SVG火焰图（根在底部，宽度与采样次数成正比）"""
+    frame_height = 16
+    root: Dict[str, Any] = {'count': 0, 'children': {}}
+    for stack, count in stacks.items():
+        node = root
+        node['count'] += count
+        for name in stack.split(';'):
+            node = node['children'].setdefault(name, {'count': 0, 'children': {}})
+            node['count'] += count
+
+    total = root['count'] or 1
+    rects = []
+    max_depth = 0
+
+    def layout(node, x, depth):
+        nonlocal max_depth
+        for name, child in sorted(node['children'].items()):
+            child_width = child['count'] / total * (width - 20)
+            if child_width >= 0.5:
+                rects.append((name, child['count'], x, depth, child_width))
+                max_depth = max(max_depth, depth)
+                layout(child, x, depth + 1)
+            x += child_width
+
+    layout(root, 10, 0)
+    height = (max_depth + 1) * frame_height + 50
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="Verdana, sans-serif" font-size="12">',
+        '<rect width="100%" height="100%" fill="#f8f8f8"/>',
+        f'<text x="{width / 2}" y="24" text-anchor="middle" font-size="17">{html.escape(title)}</text>'
+    ]
+    for name, count, x, depth, rect_width in rects:
+        y = height - (depth + 1) * frame_height - 10
+        digest = hashlib.md5(name.encode('utf-8')).digest()
+        color = f"rgb({205 + digest[0] % 50},{digest[1] % 180 + 40},{digest[2] % 55})"
+        label = html.escape(name)
+        parts.append(
+            f'<g><title>{label} ({count} samples, {count / total * 100:.2f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{rect_width:.1f}" height="{frame_height - 1}" fill="{color}" rx="2"/>'
+        )
+        max_chars = int(rect_width / 7)
+        if max_chars >= 3:
+            text = name if len(name) <= max_chars else name[:max_chars - 2] + '..'
+            parts.append(f'<text x="{x + 3:.1f}" y="{y + frame_height - 4}">{html.escape(text)}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+class MemoryTracker:
+    """tracemalloc 快照与差异
+
+    首次调用时开启 tracemalloc（开启后有一定内存和CPU开销，stop 可关闭）。
+    每次 snapshot 都与上一次比较，两次之间增长最多的代码位置即疑似泄漏点。
+    frames 与正在跟踪的调用栈深度不同时重新开启跟踪，之前的快照随之丢弃。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._previous_time: Optional[float] = None
+
+    def snapshot(self, top: int = 25, frames: int = 1, group_by: str = 'lineno') -> Dict[str, Any]:
+        with self._lock:
+            started_now = False
+            if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+                # 调用栈深度只能在开启跟踪时指定；不同深度的快照无法比较
+                tracemalloc.stop()
+                self._previous = self._previous_time = None
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                started_now = True
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ])
+            current, peak = tracemalloc.get_traced_memory()
+            data: Dict[str, Any] = {
+                'tracing_started': started_now,
+                'frames': tracemalloc.get_traceback_limit(),
+                'traced_bytes': current,
+                'traced_peak_bytes': peak,
+                'top': [self._format_stat(stat) for stat in snapshot.statistics(group_by)[:top]]
+            }
+            if self._previous is not None:
+                data['diff_seconds'] = round(time.time() - self._previous_time, 1)
+                data['diff'] = [
+                    self._format_stat(stat) for stat in snapshot.compare_to(self._previous, group_by)[:top]
+                ]
+            self._previous, self._previous_time = snapshot, time.time()
+            return data
+
+    def stop(self):
+        with self._lock:
+            self._previous = self._previous_time = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+    @staticmethod
+    def _format_stat(stat) -> Dict[str, Any]:
+        item = {
+            'location': [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            'size_bytes': stat.size,
+            'count': stat.count
+        }
+        if hasattr(stat, 'size_diff'):
+            item['size_diff_bytes'] = stat.size_diff
+            item['count_diff'] = stat.count_diff
+        return item
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def object_counts(top: int = 30) -> Dict[str, Any]:
+    """存活对象统计：按类型计数，以及检测结果、SSH连接和通道等关键对象"""
+    from ssh_manager import ssh_manager
+
+    paramiko = sys.modules.get('paramiko')
+    counts: Counter = Counter()
+    check_results = transports = active_transports = channels = open_channels = 0
+    for obj in gc.get_objects():
+        cls = type(obj)
+        counts[f"{cls.__module__}.{cls.__qualname__}"] += 1
+        if isinstance(obj, CheckResult):
+            check_results += 1
+        elif paramiko is not None and isinstance(obj, paramiko.Transport):
+            transports += 1
+            active_transports += obj.is_active()
+        elif paramiko is not None and isinstance(obj, paramiko.Channel):
+            channels += 1
+            open_channels += not obj.closed
+
+    return {
+        'rss_bytes': _rss_bytes(),
+        'threads': threading.active_count(),
+        'gc_counts': gc.get_count(),
+        'check_results': check_results,
+        'ssh': {
+            'connections': len(ssh_manager.connections),
+            'persistent_shells': len(ssh_manager.shells),
+            'tunnels': len(ssh_manager.tunnels),
+            'paramiko_transports': transports,
+            'paramiko_transports_active': active_transports,
+            'paramiko_channels': channels,
+            'paramiko_channels_open': open_channels
+        },
+        # 列表保持按数量排序（JSON对象的键会被重新排序）
+        'types': [{'type': name, 'count': count} for name, count in counts.most_common(top)]
+    }
+
+
+# 全局调用栈采样器实例
+stack_sampler = StackSampler()
+
+# 全局内存跟踪实例
+memory_tracker = MemoryTracker()
\ No newline at end of file
@@ -1,12 +1,54 @@
-from detectors.base import BaseDetector
-from detectors.docker_detector import DockerDetector
-from detectors.restapi_detector import RestApiDetector
-from detectors.supervisor_detector import SupervisorDetector
-from detectors.systemd_detector import SystemdDetector
-
-DETECTOR_REGISTRY = {
-    'systemd': SystemdDetector,
-    'restapi': RestApiDetector,
-    'supervisor': SupervisorDetector,
-    'docker': DockerDetector
-}
\ No newline at end of file
+import importlib
+
+from detectors.base import BaseDetector
+
+
+class _LazyRegistry(dict):
+    """检测器注册表
+
+    值可以是检测器类，也可以是 'module:Class' 形式的字符串；字符串在首次使用时才导入，
+    避免启动时加载 docker、requests 等较重的依赖。
+    """
+
+    def __getitem__(self, service_type):
+        detector_class = super().__getitem__(service_type)
+        if isinstance(detector_class, str):
+            module_name, class_name = detector_class.split(':')
+            detector_class = getattr(importlib.import_module(module_name), class_name)
+            super().__setitem__(service_type, detector_class)
+        return detector_class
+
+    def get(self, service_type, default=None):
+        if service_type in self:
+            return self[service_type]
+        return default
+
+    def values(self):
+        return [self[service_type] for service_type in self]
+
+    def items(self):
+        return [(service_type, self[service_type]) for service_type in self]
+
+
+DETECTOR_REGISTRY = _LazyRegistry({
+    'systemd': 'detectors.systemd_detector:SystemdDetector',
+    'restapi': 'detectors.restapi_detector:RestApiDetector',
+    'supervisor': 'detectors.supervisor_detector:SupervisorDetector',
+    'docker': 'detectors.docker_detector:DockerDetector',
+    'tcp': 'detectors.tcp_detector:TcpDetector'
+})
+
+_DETECTOR_CLASSES = {
+    'SystemdDetector': 'systemd',
+    'RestApiDetector': 'restapi',
+    'SupervisorDetector': 'supervisor',
+    'DockerDetector': 'docker',
+    'TcpDetector': 'tcp'
+}
+
+
+def __getattr__(name):
+    """兼容 from detectors import DockerDetector 等写法，按需导入"""
+    if name in _DETECTOR_CLASSES:
+        return DETECTOR_REGISTRY[_DETECTOR_CLASSES[name]]
+    raise AttributeError(f"module 'detectors' has no attribute '{name}'")
\ No newline at end of file
@@ -1,81 +1,164 @@
-import abc
-import logging
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
-from enum import Enum
-
-
-class ServiceStatus(Enum):
-    HEALTHY = "healthy"
-    UNHEALTHY = "unhealthy"
-    UNKNOWN = "unknown"
-
-
-@dataclass
-class CheckResult:
-    service_name: str
-    service_type: str
-    status: ServiceStatus
-    message: str
-    server: str = "local"  # 新增服务器标识
-    details: Optional[Dict[str, Any]] = None
-
-
-class BaseDetector(abc.ABC):
-    """基础检测器抽象类"""
-
-    def __init__(self, name: str, config: Dict[str, Any], server_config: Optional[Dict[str, Any]] = None):
-        self.name = name
-        self.config = config
-        self.server_config = server_config  # SSH服务器配置
-        self.is_remote = server_config is not None
-        self.logger = logging.getLogger(f"{self.__class__.__name__}.{name}")
-
-    @abc.abstractmethod
-    def check(self) -> CheckResult:
-        """执行服务检测"""
-        pass
-
-    def execute_command(self, command: str, timeout: int = 30) -> tuple:
-        """执行命令（本地或远程）"""
-        if self.is_remote:
-            return self._execute_remote_command(command, timeout)
-        else:
-            return self._execute_local_command(command, timeout)
-
-    def _execute_local_command(self, command: str, timeout: int) -> tuple:
-        """执行本地命令"""
-        import subprocess
-        try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            return result.returncode, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
-            raise TimeoutError(f"Command timeout after {timeout}s: {command}")
-        except Exception as e:
-            raise RuntimeError(f"Local command failed: {str(e)}")
-
-    def _execute_remote_command(self, command: str, timeout: int) -> tuple:
-        """执行远程SSH命令"""
-        from ssh_manager import ssh_manager
-
-        with ssh_manager.get_ssh_client(self.server_config) as client:
-            try:
-                stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
-                return_code = stdout.channel.recv_exit_status()
-                output = stdout.read().decode('utf-8').strip()
-                error = stderr.read().decode('utf-8').strip()
-                return return_code, output, error
-            except Exception as e:
-                raise RuntimeError(f"SSH command failed: {str(e)}")
-
-    def get_server_name(self) -> str:
-        """获取服务器名称"""
-        if self.is_remote:
-            return self.server_config.get('name', 'unknown')
+import abc
+import json
+import logging
+import threading
+import time
+from typing import Dict, Any, Optional
+from dataclasses import dataclass
+from enum import Enum
+from stream_executor import DEFAULT_MAX_OUTPUT_BYTES, LineCallback, OutputLimitExceeded, kill_process_tree, run_local
+
+
+class ServiceStatus(Enum):
+    HEALTHY = "healthy"
+    UNHEALTHY = "unhealthy"
+    UNKNOWN = "unknown"
+
+
+@dataclass
+class CheckResult:
+    service_name: str
+    service_type: str
+    status: ServiceStatus
+    message: str
+    server: str = "local"  # 新增服务器标识
+    details: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        return {
+            'service_name': self.service_name,
+            'service_type': self.service_type,
+            'status': self.status.value,
+            'message': self.message,
+            'server': self.server,
+            'details': self.details
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CheckResult':
+        """从字典还原检测结果"""
+        try:
+            status = ServiceStatus(data.get('status'))
+        except ValueError:
+            status = ServiceStatus.UNKNOWN
+        return cls(
+            service_name=data.get('service_name', 'unknown'),
+            service_type=data.get('service_type', 'unknown'),
+            status=status,
+            message=data.get('message', ''),
+            server=data.get('server', 'local'),
+            details=data.get('details')
+        )
+
+
+class BaseDetector(abc.ABC):
+    """基础检测器抽象类"""
+
+    def __init__(self, name: str, config: Dict[str, Any], server_config: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.config = config
+        self.server_config = server_config  # SSH服务器配置
+        self.is_remote = server_config is not None
+        self.logger = logging.getLogger(f"{self.__class__.__name__}.{name}")
+        # 正在执行的命令的终止回调，检测超出周期期限时由 abort() 调用
+        self._abort_hooks = []
+        self._abort_lock = threading.Lock()
+        self.aborted = False
+        self.aborted_at: Optional[float] = None  # time.monotonic()
+        # 根据服务历史延迟推导的超时，由检测调度方设置，None表示使用检测器默认值
+        self.timeout_override: Optional[float] = None
+
+    @abc.abstractmethod
+    def check(self) -> CheckResult:
+        """执行服务检测"""
+        pass
+
+    def execute_command(self, command: str, timeout: int = 30, on_line: Optional[LineCallback] = None) -> tuple:
+        """执行命令（本地或远程）
+
+        on_line(stream, line) 在输出到达时逐行回调，stream 为 'stdout' 或 'stderr'。
+        输出总量受服务配置 max_output_bytes 限制，超出时抛出 OutputLimitExceeded。
+        """
+        if self.aborted:
+            raise RuntimeError("Check aborted")
+        try:
+            if self.is_remote:
+                return self._execute_remote_command(command, timeout, on_line)
+            else:
+                return self._execute_local_command(command, timeout, on_line)
+        finally:
+            with self._abort_lock:
+                self._abort_hooks.clear()
+
+    def _track_abort_hook(self, hook):
+        with self._abort_lock:
+            self._abort_hooks.append(hook)
+            aborted = self.aborted
+        if aborted:
+            hook()
+
+    def abort(self):
+        """强制结束正在执行的命令（关闭SSH通道或杀死本地进程），让工作线程尽快返回
+
+        只对 execute_command 执行的命令有效，HTTP请求、Docker SDK、TCP连接等不受影响。
+        """
+        with self._abort_lock:
+            if not self.aborted:
+                self.aborted_at = time.monotonic()
+            self.aborted = True
+            hooks = list(self._abort_hooks)
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                self.logger.debug(f"终止命令失败: {e}")
+
+    def get_timeout(self, default: float) -> float:
+        """获取本次检测使用的超时：有自适应超时时优先使用"""
+        if self.timeout_override is not None:
+            return self.timeout_override
+        return default
+
+    @property
+    def max_output_bytes(self) -> int:
+        return self.config.get('max_output_bytes', DEFAULT_MAX_OUTPUT_BYTES)
+
+    def _execute_local_command(self, command: str, timeout: int, on_line: Optional[LineCallback] = None) -> tuple:
+        """执行本地命令"""
+        try:
+            return run_local(command, timeout, self.max_output_bytes, on_line,
+                             on_start=lambda process: self._track_abort_hook(lambda: kill_process_tree(process)))
+        except (TimeoutError, OutputLimitExceeded):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Local command failed: {str(e)}")
+
+    def _execute_remote_command(self, command: str, timeout: int, on_line: Optional[LineCallback] = None) -> tuple:
+        """执行远程SSH命令（按服务器配置的 transport 选择 paramiko 或系统 ssh 后端）"""
+        from transports import get_transport
+
+        try:
+            transport = get_transport(self.server_config)
+            return transport.execute(self.server_config, command, timeout, self.max_output_bytes, on_line,
+                                     on_start=lambda resource: self._track_abort_hook(resource.close))
+        except (TimeoutError, OutputLimitExceeded):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"SSH command failed: {str(e)}")
+
+    def probe_key(self) -> str:
+        """归一化的探测目标：主机地址 + 检测器类型 + 检测配置，相同目标的检测结果可以共享"""
+        if self.is_remote:
+            target = (f"{self.server_config.get('username', '')}@{self.server_config.get('host')}"
+                      f":{self.server_config.get('port', 22)}")
+        else:
+            target = "local"
+        config = json.dumps(self.config, sort_keys=True, default=str)
+        return f"{self.__class__.__name__}|{target}|{config}"
+
+    def get_server_name(self) -> str:
+        """获取服务器名称"""
+        if self.is_remote:
+            return self.server_config.get('name', 'unknown')
         return "local"
\ No newline at end of file
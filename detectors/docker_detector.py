@@ -1,133 +1,192 @@
-from typing import Dict, Any, Optional
-
-import docker
-from .base import BaseDetector, CheckResult, ServiceStatus
-
-
-class DockerDetector(BaseDetector):
-    """Docker 容器检测器（支持SSH远程）"""
-
-    def __init__(self, name: str, config: Dict[str, Any], server_config: Optional[Dict[str, Any]] = None):
-        super().__init__(name, config, server_config)
-        self._docker_client = None
-
-    @property
-    def docker_client(self):
-        if self._docker_client is None:
-            try:
-                if self.is_remote:
-                    # 对于远程检测，我们使用SSH命令而不是Docker API
-                    self._docker_client = None
-                else:
-                    self._docker_client = docker.from_env()
-            except Exception as e:
-                self.logger.error(f"Failed to initialize Docker client: {e}")
-                raise
-        return self._docker_client
-
-    def check(self) -> CheckResult:
-        container_name = self.config.get('container_name')
-        expected_state = self.config.get('expected_state', 'running')
-        server_name = self.get_server_name()
-
-        try:
-            if self.is_remote:
-                return self._check_remote_docker(container_name, expected_state, server_name)
-            else:
-                return self._check_local_docker(container_name, expected_state, server_name)
-
-        except Exception as e:
-            return CheckResult(
-                service_name=self.name,
-                service_type="docker",
-                status=ServiceStatus.UNKNOWN,
-                message=f"Error checking container {container_name}: {str(e)}",
-                server=server_name
-            )
-
-    def _check_local_docker(self, container_name: str, expected_state: str, server_name: str) -> CheckResult:
-        """本地Docker检测"""
-        container = self.docker_client.containers.get(container_name)
-        actual_state = container.status.lower()
-
-        if actual_state == expected_state.lower():
-            return CheckResult(
-                service_name=self.name,
-                service_type="docker",
-                status=ServiceStatus.HEALTHY,
-                message=f"Container {container_name} is {actual_state}",
-                server=server_name,
-                details={
-                    "actual_state": actual_state,
-                    "image": container.image.tags,
-                    "server": server_name
-                }
-            )
-        else:
-            return CheckResult(
-                service_name=self.name,
-                service_type="docker",
-                status=ServiceStatus.UNHEALTHY,
-                message=f"Container {container_name} is {actual_state}, expected {expected_state}",
-                server=server_name,
-                details={
-                    "actual_state": actual_state,
-                    "expected_state": expected_state,
-                    "server": server_name
-                }
-            )
-
-    def _check_remote_docker(self, container_name: str, expected_state: str, server_name: str) -> CheckResult:
-        """远程Docker检测（通过SSH执行docker命令）"""
-        command = f"docker inspect --format='{{{{.State.Status}}}}' {container_name}"
-        return_code, output, error = self.execute_command(command, timeout=10)
-
-        if return_code == 0:
-            actual_state = output.strip().strip("'").lower()
-
-            if actual_state == expected_state.lower():
-                return CheckResult(
-                    service_name=self.name,
-                    service_type="docker",
-                    status=ServiceStatus.HEALTHY,
-                    message=f"Container {container_name} is {actual_state}",
-                    server=server_name,
-                    details={
-                        "actual_state": actual_state,
-                        "server": server_name
-                    }
-                )
-            else:
-                return CheckResult(
-                    service_name=self.name,
-                    service_type="docker",
-                    status=ServiceStatus.UNHEALTHY,
-                    message=f"Container {container_name} is {actual_state}, expected {expected_state}",
-                    server=server_name,
-                    details={
-                        "actual_state": actual_state,
-                        "expected_state": expected_state,
-                        "server": server_name
-                    }
-                )
-        else:
-            # 检查容器是否存在
-            check_exists_cmd = f"docker ps -a --filter 'name=^{container_name}$' --format '{{{{.Names}}}}'"
-            return_code_exists, output_exists, _ = self.execute_command(check_exists_cmd, timeout=10)
-
-            if return_code_exists == 0 and output_exists.strip() == container_name:
-                return CheckResult(
-                    service_name=self.name,
-                    service_type="docker",
-                    status=ServiceStatus.UNHEALTHY,
-                    message=f"Container {container_name} exists but inspect failed: {error}",
-                    server=server_name
-                )
-            else:
-                return CheckResult(
-                    service_name=self.name,
-                    service_type="docker",
-                    status=ServiceStatus.UNHEALTHY,
-                    message=f"Container {container_name} not found",
-                    server=server_name
-                )
+from typing import Dict, Any, Optional
+
+import docker
+from .base import BaseDetector, CheckResult, ServiceStatus
+
+
+class DockerDetector(BaseDetector):
+    """Docker 容器检测器（支持SSH远程）"""
+
+    def __init__(self, name: str, config: Dict[str, Any], server_config: Optional[Dict[str, Any]] = None):
+        super().__init__(name, config, server_config)
+        self._docker_client = None
+
+    @property
+    def docker_client(self):
+        if self._docker_client is None:
+            try:
+                if self.is_remote:
+                    # 对于远程检测，我们使用SSH命令而不是Docker API
+                    self._docker_client = None
+                else:
+                    self._docker_client = docker.from_env()
+            except Exception as e:
+                self.logger.error(f"Failed to initialize Docker client: {e}")
+                raise
+        return self._docker_client
+
+    def check(self) -> CheckResult:
+        container_name = self.config.get('container_name')
+        expected_state = self.config.get('expected_state', 'running')
+        server_name = self.get_server_name()
+
+        try:
+            if self.config.get('watch', False):
+                result = self._check_watched_docker(container_name, expected_state, server_name)
+                if result is not None:
+                    return result
+
+            if self.is_remote:
+                return self._check_remote_docker(container_name, expected_state, server_name)
+            else:
+                return self._check_local_docker(container_name, expected_state, server_name)
+
+        except Exception as e:
+            return CheckResult(
+                service_name=self.name,
+                service_type="docker",
+                status=ServiceStatus.UNKNOWN,
+                message=f"Error checking container {container_name}: {str(e)}",
+                server=server_name
+            )
+
+    def _check_watched_docker(self, container_name: str, expected_state: str,
+                              server_name: str) -> Optional[CheckResult]:
+        """监听模式：直接查询事件流维护的容器状态表，事件流未就绪时返回None回退到轮询"""
+        from watchers import DockerWatcher, watch_manager
+
+        watcher = watch_manager.get_watcher(DockerWatcher, self.server_config)
+        if not watcher.synced:
+            return None
+
+        container = watcher.get_container(container_name, self.config.get('restart_window', 300))
+        if container is None:
+            return CheckResult(
+                service_name=self.name,
+                service_type="docker",
+                status=ServiceStatus.UNHEALTHY,
+                message=f"Container {container_name} not found",
+                server=server_name
+            )
+
+        actual_state = container['state']
+        recent_restarts = container['recent_restarts']
+        max_restarts = self.config.get('max_restarts', 3)
+        details = {
+            "actual_state": actual_state,
+            "since": container['since'],
+            "health": container['health'],
+            "recent_restarts": recent_restarts,
+            "source": "events",
+            "server": server_name
+        }
+
+        if actual_state != expected_state.lower():
+            status = ServiceStatus.UNHEALTHY
+            message = f"Container {container_name} is {actual_state}, expected {expected_state}"
+            details["expected_state"] = expected_state
+        elif recent_restarts >= max_restarts:
+            status = ServiceStatus.UNHEALTHY
+            message = f"Container {container_name} restarted {recent_restarts} times recently (restart loop)"
+        elif container['health'] == 'unhealthy':
+            status = ServiceStatus.UNHEALTHY
+            message = f"Container {container_name} is {actual_state} but health check is unhealthy"
+        else:
+            status = ServiceStatus.HEALTHY
+            message = f"Container {container_name} is {actual_state}"
+
+        return CheckResult(
+            service_name=self.name,
+            service_type="docker",
+            status=status,
+            message=message,
+            server=server_name,
+            details=details
+        )
+
+    def _check_local_docker(self, container_name: str, expected_state: str, server_name: str) -> CheckResult:
+        """本地Docker检测"""
+        container = self.docker_client.containers.get(container_name)
+        actual_state = container.status.lower()
+
+        if actual_state == expected_state.lower():
+            return CheckResult(
+                service_name=self.name,
+                service_type="docker",
+                status=ServiceStatus.HEALTHY,
+                message=f"Container {container_name} is {actual_state}",
+                server=server_name,
+                details={
+                    "actual_state": actual_state,
+                    "image": container.image.tags,
+                    "server": server_name
+                }
+            )
+        else:
+            return CheckResult(
+                service_name=self.name,
+                service_type="docker",
+                status=ServiceStatus.UNHEALTHY,
+                message=f"Container {container_name} is {actual_state}, expected {expected_state}",
+                server=server_name,
+                details={
+                    "actual_state": actual_state,
+                    "expected_state": expected_state,
+                    "server": server_name
+                }
+            )
+
+    def _check_remote_docker(self, container_name: str, expected_state: str, server_name: str) -> CheckResult:
+        """远程Docker检测（通过SSH执行docker命令）"""
+        command = f"docker inspect --format='{{{{.State.Status}}}}' {container_name}"
+        return_code, output, error = self.execute_command(command, timeout=self.get_timeout(10))
+
+        if return_code == 0:
+            actual_state = output.strip().strip("'").lower()
+
+            if actual_state == expected_state.lower():
+                return CheckResult(
+                    service_name=self.name,
+                    service_type="docker",
+                    status=ServiceStatus.HEALTHY,
+                    message=f"Container {container_name} is {actual_state}",
+                    server=server_name,
+                    details={
+                        "actual_state": actual_state,
+                        "server": server_name
+                    }
+                )
+            else:
+                return CheckResult(
+                    service_name=self.name,
+                    service_type="docker",
+                    status=ServiceStatus.UNHEALTHY,
+                    message=f"Container {container_name} is {actual_state}, expected {expected_state}",
+                    server=server_name,
+                    details={
+                        "actual_state": actual_state,
+                        "expected_state": expected_state,
+                        "server": server_name
+                    }
+                )
+        else:
+            # 检查容器是否存在
+            check_exists_cmd = f"docker ps -a --filter 'name=^{container_name}$' --format '{{{{.Names}}}}'"
+            return_code_exists, output_exists, _ = self.execute_command(check_exists_cmd, timeout=self.get_timeout(10))
+
+            if return_code_exists == 0 and output_exists.strip() == container_name:
+                return CheckResult(
+                    service_name=self.name,
+                    service_type="docker",
+                    status=ServiceStatus.UNHEALTHY,
+                    message=f"Container {container_name} exists but inspect failed: {error}",
+                    server=server_name
+                )
+            else:
+                return CheckResult(
+                    service_name=self.name,
+                    service_type="docker",
+                    status=ServiceStatus.UNHEALTHY,
+                    message=f"Container {container_name} not found",
+                    server=server_name
+                )
@@ -1,112 +1,234 @@
-import requests
-from .base import BaseDetector, CheckResult, ServiceStatus
-
-
-class RestApiDetector(BaseDetector):
-    """REST API 服务检测器（支持SSH远程curl）"""
-
-    def check(self) -> CheckResult:
-        url = self.config.get('url')
-        method = self.config.get('method', 'GET')
-        timeout = self.config.get('timeout', 5)
-        expected_status = self.config.get('expected_status', 200)
-        verify_ssl = self.config.get('verify_ssl', True)
-        server_name = self.get_server_name()
-
-        try:
-            if self.is_remote:
-                # 在远程服务器上使用curl检测
-                return self._check_remote_api(url, method, timeout, expected_status, server_name)
-            else:
-                # 本地检测
-                return self._check_local_api(url, method, timeout, expected_status, verify_ssl, server_name)
-
-        except Exception as e:
-            return CheckResult(
-                service_name=self.name,
-                service_type="restapi",
-                status=ServiceStatus.UNKNOWN,
-                message=f"Error checking API {url}: {str(e)}",
-                server=server_name
-            )
-
-    def _check_local_api(self, url: str, method: str, timeout: int, expected_status: int, verify_ssl: bool,
-                         server_name: str) -> CheckResult:
-        """本地API检测"""
-        response = requests.request(
-            method=method,
-            url=url,
-            timeout=timeout,
-            verify=verify_ssl
-        )
-
-        if response.status_code == expected_status:
-            return CheckResult(
-                service_name=self.name,
-                service_type="restapi",
-                status=ServiceStatus.HEALTHY,
-                message=f"API {url} returned status {response.status_code}",
-                server=server_name,
-                details={
-                    "status_code": response.status_code,
-                    "response_time": response.elapsed.total_seconds(),
-                    "server": server_name
-                }
-            )
-        else:
-            return CheckResult(
-                service_name=self.name,
-                service_type="restapi",
-                status=ServiceStatus.UNHEALTHY,
-                message=f"API {url} returned status {response.status_code}, expected {expected_status}",
-                server=server_name,
-                details={
-                    "status_code": response.status_code,
-                    "expected_status": expected_status,
-                    "server": server_name
-                }
-            )
-
-    def _check_remote_api(self, url: str, method: str, timeout: int, expected_status: int,
-                          server_name: str) -> CheckResult:
-        """远程API检测（通过SSH在目标服务器上执行curl）"""
-        # 构建curl命令
-        curl_command = f"curl -X {method} -s -o /dev/null -w '%{{http_code}}' --connect-timeout {timeout} --max-time {timeout} {url}"
-
-        return_code, output, error = self.execute_command(curl_command, timeout=timeout + 5)
-
-        if return_code == 0 and output.isdigit():
-            status_code = int(output)
-            if status_code == expected_status:
-                return CheckResult(
-                    service_name=self.name,
-                    service_type="restapi",
-                    status=ServiceStatus.HEALTHY,
-                    message=f"API {url} returned status {status_code}",
-                    server=server_name,
-                    details={
-                        "status_code": status_code,
-                        "server": server_name
-                    }
-                )
-            else:
-                return CheckResult(
-                    service_name=self.name,
-                    service_type="restapi",
-                    status=ServiceStatus.UNHEALTHY,
-                    message=f"API {url} returned status {status_code}, expected {expected_status}",
-                    server=server_name,
-                    details={
-                        "status_code": status_code,
-                        "expected_status": expected_status,
-                        "server": server_name
-                    }
-                )
-        else:
-            return CheckResult(
-                service_name=self.name,
-                service_type="restapi",
-                status=ServiceStatus.UNHEALTHY,
-                message=f"Failed to check API {url}: {error}",
-                server=server_name
-            )
\ No newline at end of file
+import concurrent.futures
+import math
+import shlex
+import time
+from typing import Any, Dict, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from latency_profile import percentile
+from .base import BaseDetector, CheckResult, ServiceStatus
+
+
+class RestApiDetector(BaseDetector):
+    """REST API 服务检测器（支持SSH远程curl）"""
+
+    def check(self) -> CheckResult:
+        url = self.config.get('url')
+        method = self.config.get('method', 'GET')
+        timeout = self.get_timeout(self.config.get('timeout', 5))
+        expected_status = self.config.get('expected_status', 200)
+        verify_ssl = self.config.get('verify_ssl', True)
+        server_name = self.get_server_name()
+
+        try:
+            probe_config = self.config.get('probe')
+            if probe_config:
+                # 探测模式：每次检测发送多个请求，按延迟分位数和错误率判定
+                return self._check_probe(url, method, self.config.get('timeout', 5), expected_status, verify_ssl,
+                                         server_name, probe_config)
+
+            if self.is_remote:
+                # 在远程服务器上使用curl检测
+                return self._check_remote_api(url, method, timeout, expected_status, server_name)
+            else:
+                # 本地检测
+                return self._check_local_api(url, method, timeout, expected_status, verify_ssl, server_name)
+
+        except Exception as e:
+            return CheckResult(
+                service_name=self.name,
+                service_type="restapi",
+                status=ServiceStatus.UNKNOWN,
+                message=f"Error checking API {url}: {str(e)}",
+                server=server_name
+            )
+
+    def _check_local_api(self, url: str, method: str, timeout: int, expected_status: int, verify_ssl: bool,
+                         server_name: str) -> CheckResult:
+        """本地API检测"""
+        response = requests.request(
+            method=method,
+            url=url,
+            timeout=timeout,
+            verify=verify_ssl
+        )
+
+        if response.status_code == expected_status:
+            return CheckResult(
+                service_name=self.name,
+                service_type="restapi",
+                status=ServiceStatus.HEALTHY,
+                message=f"API {url} returned status {response.status_code}",
+                server=server_name,
+                details={
+                    "status_code": response.status_code,
+                    "response_time": response.elapsed.total_seconds(),
+                    "server": server_name
+                }
+            )
+        else:
+            return CheckResult(
+                service_name=self.name,
+                service_type="restapi",
+                status=ServiceStatus.UNHEALTHY,
+                message=f"API {url} returned status {response.status_code}, expected {expected_status}",
+                server=server_name,
+                details={
+                    "status_code": response.status_code,
+                    "expected_status": expected_status,
+                    "server": server_name
+                }
+            )
+
+    def _check_remote_api(self, url: str, method: str, timeout: int, expected_status: int,
+                          server_name: str) -> CheckResult:
+        """远程API检测（通过SSH在目标服务器上执行curl）"""
+        # 构建curl命令
+        curl_command = f"curl -X {method} -s -o /dev/null -w '%{{http_code}}' --connect-timeout {timeout} --max-time {timeout} {url}"
+
+        return_code, output, error = self.execute_command(curl_command, timeout=timeout + 5)
+
+        if return_code == 0 and output.isdigit():
+            status_code = int(output)
+            if status_code == expected_status:
+                return CheckResult(
+                    service_name=self.name,
+                    service_type="restapi",
+                    status=ServiceStatus.HEALTHY,
+                    message=f"API {url} returned status {status_code}",
+                    server=server_name,
+                    details={
+                        "status_code": status_code,
+                        "server": server_name
+                    }
+                )
+            else:
+                return CheckResult(
+                    service_name=self.name,
+                    service_type="restapi",
+                    status=ServiceStatus.UNHEALTHY,
+                    message=f"API {url} returned status {status_code}, expected {expected_status}",
+                    server=server_name,
+                    details={
+                        "status_code": status_code,
+                        "expected_status": expected_status,
+                        "server": server_name
+                    }
+                )
+        else:
+            return CheckResult(
+                service_name=self.name,
+                service_type="restapi",
+                status=ServiceStatus.UNHEALTHY,
+                message=f"Failed to check API {url}: {error}",
+                server=server_name
+            )
+
+    def _check_probe(self, url: str, method: str, timeout: float, expected_status: int, verify_ssl: bool,
+                     server_name: str, probe_config: Dict[str, Any]) -> CheckResult:
+        """探测模式检测：汇总 min/p50/p95/p99 延迟与错误率，超过阈值判为异常"""
+        count = max(int(probe_config.get('requests', 10)), 1)
+        concurrency = max(min(int(probe_config.get('concurrency', 1)), count), 1)
+
+        if self.is_remote:
+            samples = self._probe_remote(url, method, timeout, expected_status, count, concurrency)
+        else:
+            samples = self._probe_local(url, method, timeout, expected_status, verify_ssl, count, concurrency)
+
+        latencies = sorted(latency * 1000 for ok, latency in samples if ok)
+        errors = count - len(latencies)
+        error_rate = errors / count
+        details = {
+            "requests": count,
+            "concurrency": concurrency,
+            "error_rate": round(error_rate, 4),
+            "server": server_name
+        }
+        for name, q in (("min_ms", 0), ("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            value = percentile(latencies, q)
+            details[name] = round(value, 2) if value is not None else None
+
+        violations = []
+        if error_rate > probe_config.get('max_error_rate', 0):
+            violations.append(f"error rate {error_rate:.1%}")
+        for name in ("p50", "p95", "p99"):
+            threshold = probe_config.get(f"max_{name}_ms")
+            value = details[f"{name}_ms"]
+            if threshold is not None and value is not None and value > threshold:
+                violations.append(f"{name} {value}ms > {threshold}ms")
+                details[f"max_{name}_ms"] = threshold
+
+        if latencies:
+            summary = f"p50 {details['p50_ms']}ms, p99 {details['p99_ms']}ms, errors {errors}/{count}"
+        else:
+            summary = f"errors {errors}/{count}"
+        if violations:
+            return CheckResult(
+                service_name=self.name,
+                service_type="restapi",
+                status=ServiceStatus.UNHEALTHY,
+                message=f"API {url} probe degraded: {', '.join(violations)} ({summary})",
+                server=server_name,
+                details=details
+            )
+        return CheckResult(
+            service_name=self.name,
+            service_type="restapi",
+            status=ServiceStatus.HEALTHY,
+            message=f"API {url} probe ok ({summary})",
+            server=server_name,
+            details=details
+        )
+
+    def _probe_local(self, url: str, method: str, timeout: float, expected_status: int, verify_ssl: bool,
+                     count: int, concurrency: int) -> List[Tuple[bool, float]]:
+        """本地探测：共享keep-alive连接池并发发送请求，返回 (是否成功, 耗时秒) 列表"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        def _request() -> Tuple[bool, float]:
+            started = time.perf_counter()
+            try:
+                response = session.request(method=method, url=url, timeout=timeout, verify=verify_ssl)
+                response.content  # 读完响应体，连接才能归还连接池复用
+                return response.status_code == expected_status, time.perf_counter() - started
+            except requests.RequestException:
+                return False, time.perf_counter() - started
+
+        try:
+            if concurrency == 1:
+                return [_request() for _ in range(count)]
+            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+                return list(executor.map(lambda _: _request(), range(count)))
+        finally:
+            session.close()
+
+    def _probe_remote(self, url: str, method: str, timeout: float, expected_status: int,
+                      count: int, concurrency: int) -> List[Tuple[bool, float]]:
+        """远程探测：一次curl调用发送全部请求（同一进程内复用连接，可选 --parallel）"""
+        quoted_url = shlex.quote(url)
+        command = (
+            f"curl -s -X {method} --connect-timeout {timeout} --max-time {timeout} "
+            f"-w '%{{http_code}} %{{time_total}}\\n'"
+        )
+        if concurrency > 1:
+            command += f" --parallel --parallel-max {concurrency}"
+        command += "".join(f" -o /dev/null {quoted_url}" for _ in range(count))
+
+        rounds = math.ceil(count / concurrency)
+        # 部分请求失败时curl返回非0，但每个请求仍会输出一行结果，因此不看退出码
+        _, output, error = self.execute_command(command, timeout=timeout * rounds + 5)
+
+        samples = []
+        for line in output.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[0].isdigit():
+                samples.append((int(parts[0]) == expected_status, float(parts[1])))
+        if not samples:
+            raise RuntimeError(f"curl probe returned no results: {error}")
+        # 没有输出结果的请求计为失败
+        samples.extend((False, float(timeout)) for _ in range(count - len(samples)))
+        return samples[:count]
\ No newline at end of file
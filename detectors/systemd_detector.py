@@ -1,61 +1,121 @@
-from .base import BaseDetector, CheckResult, ServiceStatus
-
-
-class SystemdDetector(BaseDetector):
-    """Systemd 服务检测器（支持SSH远程）"""
-
-    def check(self) -> CheckResult:
-        service_name = self.config.get('service_name')
-        expected_status = self.config.get('expected_status', 'active')
-        server_name = self.get_server_name()
-
-        try:
-            # 使用systemctl检查服务状态
-            command = f"systemctl is-active {service_name}"
-            return_code, output, error = self.execute_command(command, timeout=10)
-
-            actual_status = output.strip()
-
-            if return_code == 0 and actual_status == expected_status:
-                return CheckResult(
-                    service_name=self.name,
-                    service_type="systemd",
-                    status=ServiceStatus.HEALTHY,
-                    message=f"Service {service_name} is {actual_status}",
-                    server=server_name,
-                    details={
-                        "actual_status": actual_status,
-                        "server": server_name
-                    }
-                )
-            else:
-                return CheckResult(
-                    service_name=self.name,
-                    service_type="systemd",
-                    status=ServiceStatus.UNHEALTHY,
-                    message=f"Service {service_name} is {actual_status}, expected {expected_status}",
-                    server=server_name,
-                    details={
-                        "actual_status": actual_status,
-                        "expected_status": expected_status,
-                        "error": error,
-                        "server": server_name
-                    }
-                )
-
-        except TimeoutError as e:
-            return CheckResult(
-                service_name=self.name,
-                service_type="systemd",
-                status=ServiceStatus.UNHEALTHY,
-                message=f"Timeout checking systemd service {service_name}",
-                server=server_name
-            )
-        except Exception as e:
-            return CheckResult(
-                service_name=self.name,
-                service_type="systemd",
-                status=ServiceStatus.UNKNOWN,
-                message=f"Error checking systemd service {service_name}: {str(e)}",
-                server=server_name
-            )
\ No newline at end of file
+import time
+from typing import Optional
+from .base import BaseDetector, CheckResult, ServiceStatus
+
+
+class SystemdDetector(BaseDetector):
+    """Systemd 服务检测器（支持SSH远程）"""
+
+    def check(self) -> CheckResult:
+        service_name = self.config.get('service_name')
+        expected_status = self.config.get('expected_status', 'active')
+        server_name = self.get_server_name()
+
+        try:
+            watcher = None
+            if self.config.get('watch', False):
+                from watchers import SystemdWatcher, watch_manager
+
+                watcher = watch_manager.get_watcher(SystemdWatcher, self.server_config)
+                watcher.track(service_name)
+                result = self._check_watched(watcher, service_name, expected_status, server_name)
+                if result is not None:
+                    return result
+
+            # 使用systemctl检查服务状态
+            command = f"systemctl is-active {service_name}"
+            return_code, output, error = self.execute_command(command, timeout=self.get_timeout(10))
+
+            actual_status = output.strip()
+            if watcher is not None and actual_status:
+                # 轮询结果作为监听状态的定期校准
+                watcher.observe(service_name, actual_status, reconciled=True)
+
+            if return_code == 0 and actual_status == expected_status:
+                return CheckResult(
+                    service_name=self.name,
+                    service_type="systemd",
+                    status=ServiceStatus.HEALTHY,
+                    message=f"Service {service_name} is {actual_status}",
+                    server=server_name,
+                    details={
+                        "actual_status": actual_status,
+                        "server": server_name
+                    }
+                )
+            else:
+                return CheckResult(
+                    service_name=self.name,
+                    service_type="systemd",
+                    status=ServiceStatus.UNHEALTHY,
+                    message=f"Service {service_name} is {actual_status}, expected {expected_status}",
+                    server=server_name,
+                    details={
+                        "actual_status": actual_status,
+                        "expected_status": expected_status,
+                        "error": error,
+                        "server": server_name
+                    }
+                )
+
+        except TimeoutError as e:
+            return CheckResult(
+                service_name=self.name,
+                service_type="systemd",
+                status=ServiceStatus.UNHEALTHY,
+                message=f"Timeout checking systemd service {service_name}",
+                server=server_name
+            )
+        except Exception as e:
+            return CheckResult(
+                service_name=self.name,
+                service_type="systemd",
+                status=ServiceStatus.UNKNOWN,
+                message=f"Error checking systemd service {service_name}: {str(e)}",
+                server=server_name
+            )
+
+    def _check_watched(self, watcher, service_name: str, expected_status: str,
+                       server_name: str) -> Optional[CheckResult]:
+        """监听模式：直接使用实时维护的单元状态；未同步或到了校准时间时返回None，改为轮询"""
+        if not watcher.synced:
+            return None
+        unit = watcher.get_unit(service_name, self.config.get('flap_window', 300))
+        if unit is None or unit['reconciled_at'] is None:
+            return None
+        if time.time() - unit['reconciled_at'] > self.config.get('reconcile_interval', 300):
+            return None
+
+        actual_status = unit['state']
+        recent_restarts = unit['recent_restarts']
+        max_flaps = self.config.get('max_flaps')
+        details = {
+            "actual_status": actual_status,
+            "since": unit['since'],
+            "recent_restarts": recent_restarts,
+            "source": "journal",
+            "server": server_name
+        }
+        if unit['last_transition']:
+            timestamp, from_state, to_state = unit['last_transition']
+            details["last_transition"] = f"{from_state} -> {to_state} @ {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))}"
+
+        if actual_status != expected_status:
+            status = ServiceStatus.UNHEALTHY
+            message = f"Service {service_name} is {actual_status}, expected {expected_status}"
+            details["expected_status"] = expected_status
+        elif max_flaps is not None and recent_restarts >= max_flaps:
+            status = ServiceStatus.UNHEALTHY
+            message = f"Service {service_name} restarted {recent_restarts} times recently (flapping)"
+        else:
+            status = ServiceStatus.HEALTHY
+            message = f"Service {service_name} is {actual_status}"
+
+        return CheckResult(
+            service_name=self.name,
+            service_type="systemd",
+            status=status,
+            message=message,
+            server=server_name,
+            details=details
+        )
\ No newline at end of file
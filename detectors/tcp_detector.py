@@ -0,0 +1,239 @@
+import base64
+import inspect
+import json
+from typing import Any, Dict, List
+
+from latency_profile import percentile
+from .base import BaseDetector, CheckResult, ServiceStatus
+
+# 详情中最多列出的失败目标数，避免大批量端口检测时结果过大
+MAX_REPORTED_FAILURES = 20
+
+# 单条远程检测命令的最大长度：内核限制单个参数不超过128KB，
+# openssh 传输还会把整条命令放在本地 ssh 的参数中，因此目标过多时分批执行
+MAX_REMOTE_COMMAND_BYTES = 64 * 1024
+
+
+def scan_targets(targets: List[str], timeout: float, banner_bytes: int = 0,
+                 max_sockets: int = 512) -> List[Dict[str, Any]]:
+    """单线程检测一批 host:port 的可达性
+
+    所有连接以非阻塞方式发起，由一个 selector 统一等待；同时打开的套接字数不超过 max_sockets。
+    banner_bytes > 0 时连接成功后再读取最多该字节数的欢迎信息。
+    本函数只依赖标准库，远程检测时会把源码原样发送到跳板机上执行。
+    """
+    import errno
+    import os
+    import selectors
+    import socket
+    import time
+
+    results = {}
+    addresses = {}
+    active = {}
+    pending = list(reversed(targets))
+    selector = selectors.DefaultSelector()
+
+    def finish(sock, is_open, error=None):
+        state = active.pop(sock)
+        selector.unregister(sock)
+        sock.close()
+        result = {'target': state['target'], 'open': is_open}
+        if state['latency'] is not None:
+            result['latency_ms'] = round(state['latency'] * 1000, 2)
+        if error:
+            result['error'] = error
+        if state['banner']:
+            result['banner'] = state['banner'].decode('utf-8', errors='replace')
+        results[state['target']] = result
+
+    def start(target):
+        host, _, port = target.rpartition(':')
+        host = host.strip('[]')
+        try:
+            if host not in addresses:
+                addresses[host] = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)[0]
+            family, _, _, _, sockaddr = addresses[host]
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            code = sock.connect_ex((sockaddr[0], int(port)) + tuple(sockaddr[2:]))
+        except Exception as e:
+            results[target] = {'target': target, 'open': False, 'error': str(e)}
+            return
+        now = time.monotonic()
+        active[sock] = {'target': target, 'started': now, 'deadline': now + timeout,
+                        'latency': None, 'banner': b''}
+        selector.register(sock, selectors.EVENT_WRITE)
+        if code not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+            finish(sock, False, os.strerror(code))
+
+    while pending or active:
+        while pending and len(active) < max_sockets:
+            start(pending.pop())
+        if not active:
+            continue
+
+        wait = max(min(state['deadline'] for state in active.values()) - time.monotonic(), 0)
+        for key, _ in selector.select(timeout=wait):
+            sock = key.fileobj
+            state = active[sock]
+            now = time.monotonic()
+            if state['latency'] is None:
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error:
+                    finish(sock, False, os.strerror(error))
+                    continue
+                state['latency'] = now - state['started']
+                if banner_bytes <= 0:
+                    finish(sock, True)
+                else:
+                    selector.modify(sock, selectors.EVENT_READ)
+                continue
+
+            try:
+                data = sock.recv(banner_bytes - len(state['banner']))
+            except BlockingIOError:
+                continue
+            except OSError:
+                data = b''
+            state['banner'] += data
+            if not data or len(state['banner']) >= banner_bytes:
+                finish(sock, True)
+
+        now = time.monotonic()
+        for sock, state in list(active.items()):
+            if now >= state['deadline']:
+                # 已连接但欢迎信息未读完时端口仍视为开放
+                if state['latency'] is None:
+                    finish(sock, False, 'timeout')
+                else:
+                    finish(sock, True)
+
+    selector.close()
+    return [results[target] for target in targets]
+
+
+class TcpDetector(BaseDetector):
+    """TCP端口可达性检测器（单线程批量检测，支持通过SSH在跳板机上执行）"""
+
+    def check(self) -> CheckResult:
+        timeout = self.get_timeout(self.config.get('timeout', 3))
+        expect_banner = self.config.get('expect_banner')
+        server_name = self.get_server_name()
+        label = self.name
+
+        try:
+            # 目标格式错误同样返回未知状态，而不是让异常抛给调度方
+            targets = self._get_targets()
+            label = targets[0] if len(targets) == 1 else f"{len(targets)} targets"
+            banner_bytes = int(self.config.get('banner_bytes', 0))
+            if expect_banner and banner_bytes <= 0:
+                banner_bytes = max(len(expect_banner.encode('utf-8')), 64)
+            if self.is_remote:
+                results = self._scan_remote(targets, timeout, banner_bytes)
+            else:
+                results = scan_targets(targets, timeout, banner_bytes, self.config.get('max_sockets', 512))
+
+        except Exception as e:
+            return CheckResult(
+                service_name=self.name,
+                service_type="tcp",
+                status=ServiceStatus.UNKNOWN,
+                message=f"Error checking TCP {label}: {str(e)}",
+                server=server_name
+            )
+
+        failures = []
+        for result in results:
+            if not result['open']:
+                failures.append(f"{result['target']}: {result.get('error', 'closed')}")
+            elif expect_banner and expect_banner not in result.get('banner', ''):
+                failures.append(f"{result['target']}: unexpected banner {result.get('banner', '')[:40]!r}")
+
+        latencies = sorted(result['latency_ms'] for result in results if 'latency_ms' in result)
+        open_count = sum(1 for result in results if result['open'])
+        details = {
+            "targets": len(targets),
+            "open": open_count,
+            "failed": len(failures),
+            "server": server_name
+        }
+        if latencies:
+            details["connect_p50_ms"] = round(percentile(latencies, 0.5), 2)
+            details["connect_max_ms"] = latencies[-1]
+        if len(results) == 1 and results[0].get('banner'):
+            details["banner"] = results[0]['banner']
+        if failures:
+            details["failed_targets"] = failures[:MAX_REPORTED_FAILURES]
+
+        if len(failures) <= self.config.get('max_failures', 0):
+            return CheckResult(
+                service_name=self.name,
+                service_type="tcp",
+                status=ServiceStatus.HEALTHY,
+                message=f"TCP {label}: {open_count}/{len(targets)} open",
+                server=server_name,
+                details=details
+            )
+        else:
+            return CheckResult(
+                service_name=self.name,
+                service_type="tcp",
+                status=ServiceStatus.UNHEALTHY,
+                message=f"TCP {label}: {len(failures)} failed ({'; '.join(failures[:3])})",
+                server=server_name,
+                details=details
+            )
+
+    def _get_targets(self) -> List[str]:
+        """配置中的检测目标：targets 列表，或单个 host + port"""
+        targets = self.config.get('targets')
+        if targets:
+            # 去重并保持顺序，同一目标只检测一次
+            return list(dict.fromkeys(str(target) for target in targets))
+        host = self.config.get('host')
+        port = self.config.get('port')
+        if not host or not port:
+            raise ValueError("tcp detector requires 'targets' or 'host' and 'port'")
+        return [f"{host}:{port}"]
+
+    def _scan_remote(self, targets: List[str], timeout: float, banner_bytes: int) -> List[Dict[str, Any]]:
+        """在远程主机上执行整批检测，目标过多时拆成多条命令，每条不超过 MAX_REMOTE_COMMAND_BYTES"""
+        max_sockets = self.config.get('max_sockets', 512)
+        source = inspect.getsource(scan_targets)
+        # base64 使长度增加 4/3，再留出脚本其余部分和 shell 管道的余量
+        budget = MAX_REMOTE_COMMAND_BYTES * 3 // 4 - len(source.encode('utf-8')) - 512
+        if budget <= 0:
+            raise RuntimeError("remote scan script exceeds MAX_REMOTE_COMMAND_BYTES")
+
+        results = []
+        batch, size = [], 0
+        for target in targets:
+            target_size = len(json.dumps(target)) + 2
+            if batch and size + target_size > budget:
+                results.extend(self._scan_remote_batch(source, batch, timeout, banner_bytes, max_sockets))
+                batch, size = [], 0
+            batch.append(target)
+            size += target_size
+        if batch:
+            results.extend(self._scan_remote_batch(source, batch, timeout, banner_bytes, max_sockets))
+        return results
+
+    def _scan_remote_batch(self, source: str, targets: List[str], timeout: float, banner_bytes: int,
+                           max_sockets: int) -> List[Dict[str, Any]]:
+        """用一条命令在远程主机上检测一批目标（python3脚本经base64传输，避免转义问题）"""
+        args = json.dumps([targets, timeout, banner_bytes, max_sockets])
+        script = (
+            "import json\n"
+            "from typing import Any, Dict, List\n"
+            f"{source}\n"
+            f"print(json.dumps(scan_targets(*json.loads({args!r}))))\n"
+        )
+        encoded = base64.b64encode(script.encode('utf-8')).decode('ascii')
+        command = f"echo {encoded} | base64 -d | python3 -"
+
+        rounds = -(-len(targets) // max_sockets)
+        return_code, output, error = self.execute_command(command, timeout=timeout * rounds + 10)
+        if return_code != 0:
+            raise RuntimeError(f"remote scan failed: {error or output}")
+        return json.loads(output)
@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from detectors.base import CheckResult
+
+# 每次查询取出的行数，导出时内存占用只与该值有关
+FETCH_SIZE = 500
+# 两次清理过期数据的最小间隔（秒）
+PRUNE_INTERVAL = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    host TEXT NOT NULL,
+    service TEXT NOT NULL,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    message TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_ts ON results (ts);
+CREATE INDEX IF NOT EXISTS idx_results_service_ts ON results (service, ts);
+CREATE INDEX IF NOT EXISTS idx_results_host_ts ON results (host, ts);
+"""
+
+COLUMNS = ['id', 'ts', 'host', 'service', 'type', 'status', 'message', 'details']
+
+
+class HistoryStore:
+    """检测结果历史（SQLite）
+
+    每轮检测结果追加写入，超过 retention_days 的数据定期清理。
+    查询按 (ts, id) 排序并以此作为游标，时间范围、主机、服务、状态条件都在SQL中过滤，
+    结果逐批从数据库读取，任意大小的时间范围占用的内存都是固定的。
+    每批是一次独立的查询，批次之间不持有读事务，长时间的导出不会阻塞 WAL 检查点。
+    """
+
+    def __init__(self, path: str, retention_days: float = 30):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 写入共用一个连接（加锁），查询各自打开只读连接；WAL 模式下读写互不阻塞
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def record(self, results: List[CheckResult], check_time: Optional[float] = None):
+        """追加一批检测结果"""
+        if not results:
+            return
+        ts = check_time or time.time()
+        rows = [
+            (ts, result.server or 'local', result.service_name, result.service_type, result.status.value,
+             result.message, json.dumps(result.details, ensure_ascii=False, default=str) if result.details else None)
+            for result in results
+        ]
+        try:
+            with self._lock:
+                with self._conn:
+                    self._conn.executemany(
+                        'INSERT INTO results (ts, host, service, type, status, message, details) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+                    )
+                if time.time() - self._last_prune >= PRUNE_INTERVAL:
+                    self._prune()
+        except sqlite3.Error as e:
+            self.logger.error(f"写入检测历史失败: {e}")
+
+    def _prune(self):
+        self._last_prune = time.time()
+        if not self.retention_days:
+            return
+        with self._conn:
+            cursor = self._conn.execute('DELETE FROM results WHERE ts < ?',
+                                        (time.time() - self.retention_days * 86400,))
+        if cursor.rowcount:
+            self.logger.info(f"已清理 {cursor.rowcount} 条过期检测历史")
+
+    @staticmethod
+    def _where(start: Optional[float], end: Optional[float], hosts: List[str], services: List[str],
+               statuses: List[str], after: Optional[Tuple[float, int]]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append('ts >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('ts < ?')
+            params.append(end)
+        for column, values in (('host', hosts), ('service', services), ('status', statuses)):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if after is not None:
+            # 游标为上一条记录的 (ts, id)，与排序键一致，续传时不重复也不遗漏；
+            # 单独的 ts >= ? 让 SQLite 在 ts 索引上直接定位到游标处，而不是每批都从头扫描
+            clauses.append('ts >= ? AND (ts > ? OR id > ?)')
+            params.extend([after[0], after[0], after[1]])
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, hosts: List[str] = (),
+              services: List[str] = (), statuses: List[str] = (), after: Optional[Tuple[float, int]] = None,
+              limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """按时间顺序逐条生成匹配的记录，生成器关闭时释放数据库连接
+
+        每次查询 FETCH_SIZE 行并立即读完，下一批以上一批最后一条记录的 (ts, id) 为游标重新查询，
+        生成器暂停期间（如导出时等待客户端接收）没有进行中的语句，也就不持有读事务。
+        """
+        hosts, services, statuses = list(hosts), list(services), list(statuses)
+        remaining = limit
+        conn = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True)
+        try:
+            while remaining is None or remaining > 0:
+                batch_size = FETCH_SIZE if remaining is None else min(FETCH_SIZE, remaining)
+                where, params = self._where(start, end, hosts, services, statuses, after)
+                rows = conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM results{where} ORDER BY ts, id LIMIT ?",
+                    params + [batch_size]
+                ).fetchall()
+                for row in rows:
+                    record = dict(zip(COLUMNS, row))
+                    record['details'] = json.loads(record['details']) if record['details'] else {}
+                    yield record
+                if len(rows) < batch_size:
+                    break
+                after = (rows[-1][COLUMNS.index('ts')], rows[-1][COLUMNS.index('id')])
+                if remaining is not None:
+                    remaining -= len(rows)
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
\ No newline at end of file
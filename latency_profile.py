@@ -0,0 +1,117 @@
+import math
+import threading
+from typing import Any, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """已排序样本的分位数（线性插值）"""
+    if not sorted_values:
+        return None
+    position = q * (len(sorted_values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class QuantileSketch:
+    """对数分桶的流式分位数估计
+
+    每个桶覆盖 [gamma^(i-1), gamma^i) 区间，分位数的相对误差不超过 relative_accuracy，
+    内存只与数值跨度有关，与样本数无关。
+    """
+
+    def __init__(self, relative_accuracy: float = 0.02, min_value: float = 1e-4):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+
+    def add(self, value: float):
+        index = math.ceil(math.log(max(value, self.min_value)) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+
+    def merge(self, other: 'QuantileSketch'):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """返回分位数估计，没有样本时返回None"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # 取桶区间的中点，使相对误差对称
+                return 2 * self._gamma ** index / (self._gamma + 1)
+        return 2 * self._gamma ** max(self.buckets) / (self._gamma + 1)
+
+
+class LatencyProfiler:
+    """按服务维护滚动延迟分布，并据此推导检测超时
+
+    超时 = 分位数延迟 × multiplier，限制在 [min_timeout, max_timeout] 之间。
+    每个服务保留当前和上一个窗口两份草图，当前窗口满 window 个样本后轮换，
+    使分布跟随服务近期的表现变化。
+    """
+
+    def __init__(self, multiplier: float = 3.0, min_timeout: float = 1.0, max_timeout: float = 30.0,
+                 min_samples: int = 20, window: int = 500, quantile: float = 0.99):
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.window = window
+        self.quantile = quantile
+        self._sketches: Dict[str, Dict[str, QuantileSketch]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        """记录一次检测耗时"""
+        with self._lock:
+            sketches = self._sketches.get(key)
+            if sketches is None:
+                sketches = {'current': QuantileSketch(), 'previous': QuantileSketch()}
+                self._sketches[key] = sketches
+            sketches['current'].add(seconds)
+            if sketches['current'].count >= self.window:
+                sketches['previous'] = sketches['current']
+                sketches['current'] = QuantileSketch()
+
+    def _merged(self, key: str) -> Optional[QuantileSketch]:
+        sketches = self._sketches.get(key)
+        if sketches is None:
+            return None
+        merged = QuantileSketch()
+        merged.merge(sketches['previous'])
+        merged.merge(sketches['current'])
+        return merged
+
+    def timeout_for(self, key: str) -> Optional[float]:
+        """返回服务的自适应超时，样本不足时返回None（使用检测器默认超时）"""
+        with self._lock:
+            merged = self._merged(key)
+        if merged is None or merged.count < self.min_samples:
+            return None
+        timeout = merged.quantile(self.quantile) * self.multiplier
+        return round(min(max(timeout, self.min_timeout), self.max_timeout), 3)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """所有服务的延迟分布概要"""
+        with self._lock:
+            keys = list(self._sketches)
+            merged = {key: self._merged(key) for key in keys}
+        return {
+            key: {
+                'samples': sketch.count,
+                'p50': sketch.quantile(0.5),
+                'p99': sketch.quantile(0.99),
+                'timeout': self.timeout_for(key)
+            }
+            for key, sketch in merged.items()
+        }
\ No newline at end of file
@@ -0,0 +1,106 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from detectors.base import CheckResult
+
+
+class _CacheEntry:
+    __slots__ = ('result', 'finished_at', 'cycle')
+
+    def __init__(self, result: CheckResult, finished_at: float, cycle: Optional[int]):
+        self.result = result
+        self.finished_at = finished_at
+        self.cycle = cycle
+
+
+class _InFlight:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[CheckResult] = None
+        self.error: Optional[BaseException] = None
+
+
+class ProbeCache:
+    """探测结果缓存
+
+    以归一化的探测目标为键：同一检测周期内相同目标只探测一次，ttl 秒内跨周期复用；
+    正在执行的探测会被后来的相同请求等待复用（单飞），超过 max_entries 时按LRU淘汰。
+    """
+
+    def __init__(self, ttl: float = 0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, _CacheEntry]' = OrderedDict()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get_or_run(self, key: str, probe: Callable[[], CheckResult],
+                   cycle: Optional[int] = None) -> Tuple[CheckResult, bool]:
+        """返回 (探测结果, 是否由本次调用执行了 probe)，没有可用结果时执行 probe
+
+        命中缓存或等待其他调用的探测结果时第二项为False。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry, cycle):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.result, False
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                self.hits += 1
+                owner = False
+            else:
+                in_flight = _InFlight()
+                self._in_flight[key] = in_flight
+                self.misses += 1
+                owner = True
+
+        if not owner:
+            in_flight.event.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.result, False
+
+        try:
+            in_flight.result = probe()
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if in_flight.error is None:
+                    self._entries[key] = _CacheEntry(in_flight.result, time.monotonic(), cycle)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            in_flight.event.set()
+        return in_flight.result, True
+
+    def _is_fresh(self, entry: _CacheEntry, cycle: Optional[int]) -> bool:
+        if cycle is not None and entry.cycle == cycle:
+            return True
+        return self.ttl > 0 and time.monotonic() - entry.finished_at < self.ttl
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'in_flight': len(self._in_flight),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
\ No newline at end of file
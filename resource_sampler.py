@@ -0,0 +1,216 @@
+import concurrent.futures
+import dataclasses
+import json
+import logging
+import shlex
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from detectors.base import CheckResult
+from stream_executor import run_local
+from transports import get_transport
+
+
+class ResourceSampler:
+    """按主机批量采集被监控服务的进程资源占用
+
+    每台主机每轮只执行一条命令：先取出所有 systemd 单元、supervisor 程序和容器的主进程PID，
+    再一次性读取它们的 /proc/<pid>/stat、statm、io，容器另外执行一次 docker stats --no-stream。
+    CPU使用率和IO速率由相邻两轮采样的差值计算，首轮采样只有RSS等瞬时值。
+    """
+
+    def __init__(self, ssh_servers_config: Dict[str, Any] = None, timeout: float = 15, max_workers: int = 5):
+        self.ssh_servers_config = ssh_servers_config or {}
+        self.timeout = timeout
+        self.max_workers = max_workers
+        # 上一轮采样：(主机, pid, 进程启动时间) -> (主机uptime, CPU ticks, 读字节, 写字节)
+        self._previous: Dict[Tuple[str, int, int], Tuple[float, int, Optional[int], Optional[int]]] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def attach(self, results: List[CheckResult], services_config: List[Dict[str, Any]]):
+        """采集资源占用并写入对应检测结果的 details['resources']
+
+        检测结果可能经探测缓存与其他服务共享，因此替换为带新 details 的副本，不修改原对象。
+        """
+        resources = self.sample(services_config)
+        for index, result in enumerate(results):
+            entry = resources.get((result.server or 'local', result.service_name))
+            if entry is not None:
+                details = dict(result.details) if result.details else {}
+                details['resources'] = entry
+                results[index] = dataclasses.replace(result, details=details)
+
+    def sample(self, services_config: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """按主机并发采样，返回 (主机, 服务名) -> 资源占用（不同主机上的同名服务互不覆盖）"""
+        hosts: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for service_config in services_config:
+            if self._pid_command(service_config) is not None:
+                hosts.setdefault(service_config.get('server'), []).append(service_config)
+        if not hosts:
+            return {}
+
+        resources = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(hosts))) as executor:
+            futures = {
+                executor.submit(self._sample_host, server_name, services): server_name
+                for server_name, services in hosts.items()
+            }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    resources.update(future.result())
+                except Exception as e:
+                    self.logger.warning(f"资源采样失败 ({futures[future] or 'local'}): {e}")
+        return resources
+
+    @staticmethod
+    def _pid_command(service_config: Dict[str, Any]) -> Optional[str]:
+        """获取服务主进程PID的命令，不支持的服务类型返回None"""
+        service_type = service_config.get('type')
+        config = service_config.get('config', {})
+        if service_type == 'systemd' and config.get('service_name'):
+            return f"systemctl show -p MainPID --value {shlex.quote(config['service_name'])}"
+        if service_type == 'supervisor' and config.get('process_name'):
+            server_option = ''
+            if config.get('supervisor_url'):
+                server_option = f"-s {shlex.quote(config['supervisor_url'])} "
+            return f"supervisorctl {server_option}pid {shlex.quote(config['process_name'])}"
+        if service_type == 'docker' and config.get('container_name'):
+            return f"docker inspect -f '{{{{.State.Pid}}}}' {shlex.quote(config['container_name'])}"
+        return None
+
+    def _build_script(self, services: List[Dict[str, Any]]) -> str:
+        """生成单台主机的采样脚本，每行输出以类型标记开头"""
+        lines = ['pids=""']
+        for index, service_config in enumerate(services):
+            lines.append(f'p=$({self._pid_command(service_config)} 2>/dev/null); echo "pid {index} $p"; pids="$pids $p"')
+        lines += [
+            'echo "sys $(getconf CLK_TCK) $(getconf PAGESIZE) $(cut -d" " -f1 /proc/uptime)"',
+            'for p in $pids; do',
+            '  [ "$p" -gt 0 ] 2>/dev/null || continue',
+            '  echo "stat $p $(cat /proc/$p/stat 2>/dev/null)"',
+            '  echo "statm $p $(cat /proc/$p/statm 2>/dev/null)"',
+            '  echo "io $p $(tr "\\n" " " < /proc/$p/io 2>/dev/null)"',
+            'done',
+        ]
+        containers = [
+            shlex.quote(service_config['config']['container_name'])
+            for service_config in services if service_config.get('type') == 'docker'
+        ]
+        if containers:
+            lines.append(
+                "docker stats --no-stream --format '{{json .}}' " + ' '.join(containers)
+                + " 2>/dev/null | sed 's/^/docker /'"
+            )
+        return '\n'.join(lines)
+
+    def _sample_host(self, server_name: Optional[str],
+                     services: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """在一台主机上执行采样脚本并解析结果"""
+        script = self._build_script(services)
+        if server_name:
+            server_config = self.ssh_servers_config.get(server_name)
+            if server_config is None:
+                raise ValueError(f"Unknown server: {server_name}")
+            return_code, output, error = get_transport(server_config).execute(
+                server_config, f"sh -c {shlex.quote(script)}", timeout=self.timeout
+            )
+        else:
+            return_code, output, error = run_local(f"sh -c {shlex.quote(script)}", self.timeout)
+        if return_code != 0:
+            raise RuntimeError(error or f"exit code {return_code}")
+        return self._parse(server_name or 'local', services, output)
+
+    def _parse(self, host: str, services: List[Dict[str, Any]],
+               output: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        pids: Dict[int, int] = {}
+        clock_ticks, page_size, uptime = 100, 4096, None
+        stats: Dict[int, Dict[str, Any]] = {}
+        docker_stats: Dict[str, Dict[str, Any]] = {}
+
+        for line in output.splitlines():
+            kind, _, rest = line.partition(' ')
+            try:
+                if kind == 'pid':
+                    index, _, pid = rest.partition(' ')
+                    if pid.strip().isdigit() and int(pid) > 0:
+                        pids[int(index)] = int(pid)
+                elif kind == 'sys':
+                    ticks, size, seconds = rest.split()
+                    clock_ticks, page_size, uptime = int(ticks), int(size), float(seconds)
+                elif kind == 'stat':
+                    pid, _, stat = rest.partition(' ')
+                    # 进程名可能包含空格和括号，从最后一个 ')' 之后开始按字段解析
+                    fields = stat[stat.rindex(')') + 2:].split()
+                    stats.setdefault(int(pid), {}).update({
+                        'state': fields[0],
+                        'cpu_ticks': int(fields[11]) + int(fields[12]),
+                        'threads': int(fields[17]),
+                        'start_time': int(fields[19])
+                    })
+                elif kind == 'statm':
+                    pid, _, statm = rest.partition(' ')
+                    stats.setdefault(int(pid), {})['rss_pages'] = int(statm.split()[1])
+                elif kind == 'io':
+                    pid, _, io = rest.partition(' ')
+                    values = dict(zip(io.split()[::2], io.split()[1::2]))
+                    stats.setdefault(int(pid), {}).update({
+                        'read_bytes': int(values['read_bytes:']),
+                        'write_bytes': int(values['write_bytes:'])
+                    })
+                elif kind == 'docker':
+                    item = json.loads(rest)
+                    docker_stats[item.get('Name', '').lstrip('/')] = {
+                        'cpu_percent': item.get('CPUPerc'),
+                        'mem_usage': item.get('MemUsage'),
+                        'mem_percent': item.get('MemPerc'),
+                        'net_io': item.get('NetIO'),
+                        'block_io': item.get('BlockIO'),
+                        'pids': item.get('PIDs')
+                    }
+            except (ValueError, IndexError, KeyError):
+                continue
+
+        resources = {}
+        current = {}
+        for index, service_config in enumerate(services):
+            entry: Dict[str, Any] = {}
+            pid = pids.get(index)
+            stat = stats.get(pid) if pid else None
+            if stat and 'cpu_ticks' in stat:
+                entry['pid'] = pid
+                entry['state'] = stat['state']
+                entry['threads'] = stat['threads']
+                if 'rss_pages' in stat:
+                    entry['rss_mb'] = round(stat['rss_pages'] * page_size / 1048576, 1)
+                if uptime is not None:
+                    key = (host, pid, stat['start_time'])
+                    sample = (uptime, stat['cpu_ticks'], stat.get('read_bytes'), stat.get('write_bytes'))
+                    current[key] = sample
+                    entry.update(self._rates(key, sample, clock_ticks))
+            if service_config.get('type') == 'docker':
+                container = docker_stats.get(service_config['config']['container_name'])
+                if container:
+                    entry['docker'] = container
+            if entry:
+                resources[(host, service_config.get('name'))] = entry
+
+        with self._lock:
+            # 只保留本主机本轮仍存在的进程，已退出或PID复用的旧样本随之淘汰
+            for key in [key for key in self._previous if key[0] == host]:
+                del self._previous[key]
+            self._previous.update(current)
+        return resources
+
+    def _rates(self, key: Tuple[str, int, int], sample: Tuple[float, int, Optional[int], Optional[int]],
+               clock_ticks: int) -> Dict[str, float]:
+        """与上一轮样本比较，计算CPU使用率和IO速率"""
+        with self._lock:
+            previous = self._previous.get(key)
+        if previous is None or sample[0] <= previous[0]:
+            return {}
+        elapsed = sample[0] - previous[0]
+        rates = {'cpu_percent': round((sample[1] - previous[1]) / clock_ticks / elapsed * 100, 1)}
+        if sample[2] is not None and previous[2] is not None:
+            rates['read_bytes_per_sec'] = round((sample[2] - previous[2]) / elapsed, 1)
+            rates['write_bytes_per_sec'] = round((sample[3] - previous[3]) / elapsed, 1)
+        return rates
\ No newline at end of file
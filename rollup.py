@@ -0,0 +1,160 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from detectors.base import ServiceStatus
+
+# 未配置区域或分组时使用的名称
+DEFAULT_REGION = 'default'
+DEFAULT_GROUP = 'default'
+
+# 层级：区域 -> 分组 -> 主机 -> 服务
+LEVELS = ['region', 'group', 'host', 'service']
+
+Path = Tuple[str, ...]
+
+
+class RollupEntry:
+    """汇总树中的一个服务：所在路径、状态和标签"""
+
+    __slots__ = ('path', 'status', 'tags')
+
+    def __init__(self, path: Path, status: str, tags: Iterable[str] = ()):
+        self.path = path
+        self.status = status
+        self.tags = frozenset(tags)
+
+    def __eq__(self, other):
+        return (isinstance(other, RollupEntry) and self.path == other.path
+                and self.status == other.status and self.tags == other.tags)
+
+
+def _empty_counts() -> Dict[str, int]:
+    return {'total': 0, 'healthy': 0, 'unhealthy': 0, 'unknown': 0}
+
+
+def health_of(counts: Dict[str, int]) -> str:
+    """按计数得出健康状态，规则与主机卡片一致：有异常为unhealthy，只有未知为warning"""
+    if counts['total'] == 0:
+        return 'unknown'
+    if counts['unhealthy']:
+        return 'unhealthy'
+    if counts['unknown']:
+        return 'warning'
+    return 'healthy'
+
+
+class RollupTree:
+    """增量维护的层级健康汇总
+
+    每个节点（根、区域、分组、主机）保存其子树中各状态的服务数。服务状态变化时只更新它的祖先节点，
+    每次变化 O(层数)；读取任意子树的汇总是 O(1)，列出子节点是 O(子节点数)。
+    结果按来源（本地检测、各Agent）整体同步，未变化的服务不产生任何更新。
+    """
+
+    def __init__(self):
+        self._counts: Dict[Path, Dict[str, int]] = {(): _empty_counts()}
+        # 节点 -> 子节点名称 -> 子树中的服务数（归零时删除子节点）
+        self._children: Dict[Path, Dict[str, int]] = {(): {}}
+        self._tags: Dict[str, Dict[str, int]] = {}
+        # 主机节点 -> 服务名 -> 状态
+        self._service_status: Dict[Path, Dict[str, str]] = {}
+        # 来源 -> 服务标识 -> 条目
+        self._sources: Dict[str, Dict[Tuple[str, str], RollupEntry]] = {}
+        self._lock = threading.Lock()
+        self.updates = 0
+
+    def sync(self, source: str, entries: Dict[Tuple[str, str], RollupEntry]) -> int:
+        """用一个来源的完整结果替换其旧结果，返回发生变化的服务数"""
+        changed = 0
+        with self._lock:
+            previous = self._sources.get(source, {})
+            for key, entry in previous.items():
+                if key not in entries:
+                    self._apply(entry, -1)
+                    changed += 1
+            for key, entry in entries.items():
+                old = previous.get(key)
+                if old == entry:
+                    continue
+                if old is not None:
+                    self._apply(old, -1)
+                self._apply(entry, 1)
+                changed += 1
+            if entries:
+                self._sources[source] = dict(entries)
+            else:
+                self._sources.pop(source, None)
+            self.updates += changed
+        return changed
+
+    def _apply(self, entry: RollupEntry, delta: int):
+        # entry.path 是 (区域, 分组, 主机, 服务)，依次更新根、区域、分组、主机四个祖先
+        for depth in range(len(entry.path)):
+            node = entry.path[:depth]
+            counts = self._counts.setdefault(node, _empty_counts())
+            counts['total'] += delta
+            counts[entry.status] += delta
+            children = self._children.setdefault(node, {})
+            children[entry.path[depth]] = children.get(entry.path[depth], 0) + delta
+
+        host_path, service_name = entry.path[:-1], entry.path[-1]
+        if delta > 0:
+            self._service_status.setdefault(host_path, {})[service_name] = entry.status
+        elif self._children[host_path].get(service_name, 0) <= 0:
+            self._service_status[host_path].pop(service_name, None)
+
+        # 子树已空的节点自下而上删除
+        for depth in range(len(entry.path) - 1, -1, -1):
+            node = entry.path[:depth]
+            child = entry.path[depth]
+            if self._children[node].get(child, 0) <= 0:
+                self._children[node].pop(child, None)
+                self._counts.pop(node + (child,), None)
+                self._children.pop(node + (child,), None)
+                self._service_status.pop(node + (child,), None)
+
+        for tag in entry.tags:
+            counts = self._tags.setdefault(tag, _empty_counts())
+            counts['total'] += delta
+            counts[entry.status] += delta
+            if counts['total'] <= 0:
+                del self._tags[tag]
+
+    def summary(self, path: Path = ()) -> Optional[Dict[str, Any]]:
+        """子树的汇总，节点不存在时返回None"""
+        with self._lock:
+            counts = self._counts.get(tuple(path))
+            if counts is None:
+                return None
+            return {**counts, 'health': health_of(counts)}
+
+    def children(self, path: Path = ()) -> List[Dict[str, Any]]:
+        """子节点汇总列表（服务层级没有子节点）"""
+        path = tuple(path)
+        with self._lock:
+            if len(path) >= len(LEVELS) - 1:
+                return self._service_children(path)
+            result = []
+            for name in sorted(self._children.get(path, {})):
+                counts = self._counts[path + (name,)]
+                result.append({'name': name, **counts, 'health': health_of(counts)})
+            return result
+
+    def _service_children(self, path: Path) -> List[Dict[str, Any]]:
+        # 主机节点的子节点是服务本身，直接返回服务状态
+        services = self._service_status.get(path, {})
+        return [{'name': name, 'status': services[name]} for name in sorted(services)]
+
+    def tags(self) -> Dict[str, Dict[str, Any]]:
+        """按标签的汇总"""
+        with self._lock:
+            return {tag: {**counts, 'health': health_of(counts)} for tag, counts in sorted(self._tags.items())}
+
+    def sources(self) -> Set[str]:
+        with self._lock:
+            return set(self._sources)
+
+
+def status_value(status: Any) -> str:
+    """CheckResult 状态归一为汇总计数使用的三类"""
+    value = status.value if isinstance(status, ServiceStatus) else str(status)
+    return value if value in ('healthy', 'unhealthy') else 'unknown'
\ No newline at end of file
@@ -1,27 +1,34 @@
-#!/usr/bin/env python3
-"""
-服务监控系统启动脚本
-"""
-
-import sys
-import os
-
-# 添加当前目录到Python路径
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from service_monitor import ServiceMonitor
-
-if __name__ == "__main__":
-    print("启动服务监控系统...")
-    print("Web监控界面: http://localhost:5000")
-    print("按 Ctrl+C 停止监控")
-
-    monitor = ServiceMonitor()
-
-    try:
-        monitor.run()
-    except KeyboardInterrupt:
-        print("\n监控服务已停止")
-    except Exception as e:
-        print(f"监控服务异常: {e}")
+#!/usr/bin/env python3
+"""
+服务监控系统启动脚本
+"""
+
+import argparse
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from service_monitor import ServiceMonitor
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="服务监控系统")
+    parser.add_argument('-c', '--config', default='config.yaml', help="配置文件")
+    parser.add_argument('--node-id', help="集群节点名称（覆盖 cluster.node_id）")
+    parser.add_argument('--port', type=int, help="Web端口（覆盖 web_port）")
+    args = parser.parse_args()
+
+    monitor = ServiceMonitor(args.config, node_id=args.node_id, web_port=args.port)
+
+    print("启动服务监控系统...")
+    print(f"Web监控界面: http://localhost:{monitor.web_server.port}")
+    print("按 Ctrl+C 停止监控")
+
+    try:
+        monitor.run()
+    except KeyboardInterrupt:
+        print("\n监控服务已停止")
+    except Exception as e:
+        print(f"监控服务异常: {e}")
         sys.exit(1)
\ No newline at end of file
@@ -1,132 +1,242 @@
-import yaml
-import time
-import signal
-import sys
-import os
-import logging
-from typing import List, Dict, Any
-from concurrent_checker import ConcurrentChecker
-from logger import LogManager
-from detector_factory import DetectorFactory
-from ssh_manager import ssh_manager
-from web_server import WebServer
-
-
-class ServiceMonitor:
-    """服务监控主类"""
-
-    def __init__(self, config_file: str = "config.yaml"):
-        self.config_file = config_file
-        self.config = self._load_config()
-        self.running = True
-        self.services_config = self.config.get('services', [])
-
-        # 初始化组件
-        self.detector_factory = DetectorFactory(
-            ssh_servers_config=self.config.get('ssh_servers', {})
-        )
-        self.checker = ConcurrentChecker(
-            max_workers=self.config.get('max_workers', 5),
-            detector_factory=self.detector_factory
-        )
-        self.log_manager = LogManager(
-            log_level=self.config.get('log_level', 'INFO')
-        )
-
-        # 初始化Web服务器
-        web_host = self.config.get('web_host', '0.0.0.0')
-        web_port = self.config.get('web_port', 5000)
-        self.web_server = WebServer(host=web_host, port=web_port, service_monitor=self)
-
-        # 注册信号处理
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
-
-    def run_health_check(self):
-        """执行健康检查并更新Web界面"""
-        try:
-            self.log_manager.logger.info("开始服务检测...")
-            # 使用checker的check_services方法
-            results = self.checker.check_services(self.services_config)
-            self.log_manager.log_results(results)
-            self.web_server.update_results(results)
-            return results
-        except Exception as e:
-            self.log_manager.logger.error(f"健康检查失败: {e}")
-            return []
-
-    def _load_config(self) -> Dict[str, Any]:
-        """加载配置文件"""
-        try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
-        except Exception as e:
-            print(f"Error loading config file: {e}")
-            sys.exit(1)
-
-    def _signal_handler(self, signum, frame):
-        """信号处理"""
-        self.log_manager.logger.info("接收到停止信号，正在关闭监控服务...")
-        self.running = False
-        ssh_manager.close_all()
-
-    def get_services_config(self):
-        """获取服务配置（供Web服务器调用）"""
-        return self.services_config
-
-    def run_health_check(self):
-        """执行健康检查并更新Web界面"""
-        try:
-            self.log_manager.logger.info("开始服务检测...")
-            results = self.checker.check_services(self.services_config)
-            self.log_manager.log_results(results)
-            self.web_server.update_results(results)
-            return results
-        except Exception as e:
-            self.log_manager.logger.error(f"健康检查失败: {e}")
-            return []
-
-    def run(self):
-        """运行监控服务"""
-        check_interval = self.config.get('check_interval', 30)
-
-        self.log_manager.logger.info(f"启动服务监控，共 {len(self.services_config)} 个服务，检测间隔 {check_interval} 秒")
-
-        # 启动Web服务器
-        self.web_server.run_in_thread()
-
-        # 立即执行第一次检查
-        self.run_health_check()
-
-        try:
-            while self.running:
-                # 等待下一次检测
-                for _ in range(check_interval):
-                    if not self.running:
-                        break
-                    time.sleep(1)
-
-                if self.running:
-                    self.run_health_check()
-
-        except Exception as e:
-            self.log_manager.logger.error(f"监控循环发生错误: {e}")
-        finally:
-            ssh_manager.close_all()
-            self.log_manager.logger.info("服务监控已停止")
-
-
-def main():
-    """主函数"""
-    # 设置日志
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-
-    monitor = ServiceMonitor()
-    monitor.run()
-
-
-if __name__ == "__main__":
-    main()
+import yaml
+import signal
+import sys
+import threading
+import os
+import logging
+from typing import List, Dict, Any, Optional
+from cluster import ClusterNode
+from concurrent_checker import ConcurrentChecker
+from logger import LogManager
+from detector_factory import DetectorFactory
+from history_store import HistoryStore
+from latency_profile import LatencyProfiler
+from probe_cache import ProbeCache
+from resource_sampler import ResourceSampler
+from snapshot_store import SnapshotStore
+from ssh_manager import ssh_manager
+from transports import close_all_transports
+from watchers import watch_manager
+from web_server import WebServer
+
+
+class ServiceMonitor:
+    """服务监控主类"""
+
+    def __init__(self, config_file: str = "config.yaml", node_id: Optional[str] = None,
+                 web_port: Optional[int] = None):
+        self.config_file = config_file
+        self.config = self._load_config()
+        self.running = True
+        self.services_config = self.config.get('services', [])
+        # 置位时检测循环立即开始下一轮（集群成员变化等）
+        self._check_now = threading.Event()
+
+        # 初始化组件
+        ssh_manager.configure(self.config.get('ssh_servers', {}))
+        self.detector_factory = DetectorFactory(
+            ssh_servers_config=self.config.get('ssh_servers', {})
+        )
+        cache_config = self.config.get('probe_cache', {})
+        probe_cache = None
+        if cache_config.get('enabled', True):
+            probe_cache = ProbeCache(
+                ttl=cache_config.get('ttl', 0),
+                max_entries=cache_config.get('max_entries', 1024)
+            )
+        timeout_config = self.config.get('adaptive_timeout', {})
+        latency_profiler = None
+        if timeout_config.get('enabled', False):
+            latency_profiler = LatencyProfiler(
+                multiplier=timeout_config.get('multiplier', 3.0),
+                min_timeout=timeout_config.get('min_timeout', 1.0),
+                max_timeout=timeout_config.get('max_timeout', 30.0),
+                min_samples=timeout_config.get('min_samples', 20)
+            )
+        self.checker = ConcurrentChecker(
+            max_workers=self.config.get('max_workers', 5),
+            detector_factory=self.detector_factory,
+            probe_cache=probe_cache,
+            cycle_timeout=self.config.get('cycle_timeout', self.config.get('check_interval', 30)),
+            latency_profiler=latency_profiler
+        )
+        sampling_config = self.config.get('resource_sampling', {})
+        self.resource_sampler = None
+        if sampling_config.get('enabled', False):
+            self.resource_sampler = ResourceSampler(
+                ssh_servers_config=self.config.get('ssh_servers', {}),
+                timeout=sampling_config.get('timeout', 15),
+                max_workers=self.config.get('max_workers', 5)
+            )
+        self.log_manager = LogManager(
+            log_level=self.config.get('log_level', 'INFO')
+        )
+
+        # 初始化Web服务器
+        web_host = self.config.get('web_host', '0.0.0.0')
+        web_port = web_port or self.config.get('web_port', 5000)
+        self.web_server = WebServer(
+            host=web_host,
+            port=web_port,
+            service_monitor=self,
+            agent_token=self.config.get('agent_token', ''),
+            agent_stale_after=self.config.get('agent_stale_after'),
+            server_options=self.config.get('web_server'),
+            debug=self.config.get('debug', False),
+            debug_token=self.config.get('debug_token', '')
+        )
+
+        # 集群模式：按主机分片，只检测分配给本节点的服务
+        self.cluster = None
+        cluster_config = self.config.get('cluster', {})
+        if cluster_config.get('enabled', False):
+            self.cluster = ClusterNode(
+                node_id=node_id or cluster_config.get('node_id'),
+                nodes=cluster_config.get('nodes', {}),
+                token=cluster_config.get('token', ''),
+                heartbeat_interval=cluster_config.get('heartbeat_interval', 2),
+                failure_timeout=cluster_config.get('failure_timeout')
+            )
+            self.cluster.on_change = self._on_cluster_change
+            self.web_server.cluster = self.cluster
+
+        # 加载上次的状态快照，首次检测完成前界面即可展示（标记为过期）
+        state_file = self.config.get('state_file', 'state/last_snapshot.json')
+        if self.cluster is not None:
+            # 同一台机器上运行多个节点时各自保存快照
+            root, extension = os.path.splitext(state_file)
+            state_file = f"{root}.{self.cluster.node_id}{extension}"
+        self.snapshot_store = SnapshotStore(state_file)
+        self._load_snapshot()
+
+        # 检测历史：保留每轮结果，供 /api/history 查询和导出
+        self.history_store = None
+        history_config = self.config.get('history', {})
+        if history_config.get('enabled', False):
+            history_path = history_config.get('path', 'state/history.db')
+            if self.cluster is not None:
+                root, extension = os.path.splitext(history_path)
+                history_path = f"{root}.{self.cluster.node_id}{extension}"
+            self.history_store = HistoryStore(history_path, retention_days=history_config.get('retention_days', 30))
+            self.web_server.history = self.history_store
+
+        # 注册信号处理
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+
+    def _load_snapshot(self):
+        """加载上次保存的检测结果"""
+        snapshot = self.snapshot_store.load()
+        if snapshot:
+            results, check_time = snapshot
+            self.web_server.update_results(results, check_time=check_time, stale=True)
+            self.log_manager.logger.info(f"已加载状态快照: {len(results)}个服务")
+
+    def _load_config(self) -> Dict[str, Any]:
+        """加载配置文件"""
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                return yaml.safe_load(f)
+        except Exception as e:
+            print(f"Error loading config file: {e}")
+            sys.exit(1)
+
+    def _signal_handler(self, signum, frame):
+        """信号处理"""
+        self.log_manager.logger.info("接收到停止信号，正在关闭监控服务...")
+        self.running = False
+        self._check_now.set()
+        self.web_server.shutdown()
+        watch_manager.stop_all()
+        close_all_transports()
+
+    def get_services_config(self):
+        """获取服务配置（供Web服务器调用）"""
+        return self.services_config
+
+    def _on_cluster_change(self, alive, joined, failed):
+        """集群成员变化：丢弃失效节点的结果，立即按新分片检测"""
+        for node in failed:
+            self.web_server.remove_agent(f"node:{node}")
+        self._check_now.set()
+
+    def run_health_check(self):
+        """执行健康检查并更新Web界面"""
+        try:
+            services_config = self.services_config
+            if self.cluster is not None:
+                services_config = self.cluster.filter_services(self.services_config)
+                self.log_manager.logger.info(
+                    f"开始服务检测（集群节点 {self.cluster.node_id}，负责 {len(services_config)}/{len(self.services_config)} 个服务）..."
+                )
+            else:
+                self.log_manager.logger.info("开始服务检测...")
+            results = self.checker.check_services(services_config)
+            if self.resource_sampler is not None:
+                self.resource_sampler.attach(results, services_config)
+            self.log_manager.log_results(results)
+            self.web_server.update_results(results)
+            self.snapshot_store.save(results, self.web_server.last_check_time)
+            if self.cluster is not None:
+                self.cluster.publish(results, self.config.get('check_interval', 30))
+            return results
+        except Exception as e:
+            self.log_manager.logger.error(f"健康检查失败: {e}")
+            return []
+
+    def run(self):
+        """运行监控服务"""
+        check_interval = self.config.get('check_interval', 30)
+
+        self.log_manager.logger.info(f"启动服务监控，共 {len(self.services_config)} 个服务，检测间隔 {check_interval} 秒")
+
+        # 启动Web服务器
+        self.web_server.run_in_thread()
+
+        if self.cluster is not None:
+            if self.cluster.failure_timeout >= check_interval:
+                self.log_manager.logger.warning(
+                    f"cluster.failure_timeout ({self.cluster.failure_timeout}秒) 不小于检测间隔，失效节点的分片无法在一个周期内接管"
+                )
+            self.cluster.start()
+
+        # 立即执行第一次检查
+        self.run_health_check()
+
+        try:
+            while self.running:
+                # 等待下一次检测，期间可被集群成员变化提前唤醒
+                self._check_now.wait(check_interval)
+                self._check_now.clear()
+
+                if self.running:
+                    self.run_health_check()
+
+        except Exception as e:
+            self.log_manager.logger.error(f"监控循环发生错误: {e}")
+        finally:
+            if self.cluster is not None:
+                self.cluster.stop()
+            self.web_server.shutdown()
+            self.checker.shutdown()
+            watch_manager.stop_all()
+            close_all_transports()
+            if self.history_store is not None:
+                self.history_store.close()
+            self.log_manager.logger.info("服务监控已停止")
+
+
+def main():
+    """主函数"""
+    # 设置日志
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    monitor = ServiceMonitor()
+    monitor.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import List, Optional, Tuple
+from detectors.base import CheckResult
+
+
+class SnapshotStore:
+    """检测结果快照持久化，启动时用于立即展示上次的状态"""
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def save(self, results: List[CheckResult], check_time: Optional[float] = None):
+        """保存快照（先写临时文件再原子替换，避免进程中断留下半个文件）"""
+        data = {
+            'version': self.VERSION,
+            'check_time': check_time or time.time(),
+            'results': [result.to_dict() for result in results]
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.logger.error(f"保存状态快照失败: {e}")
+            # 写入或替换失败时删除临时文件，避免残留
+            if tmp_path is not None and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def load(self) -> Optional[Tuple[List[CheckResult], float]]:
+        """加载快照，返回 (检测结果, 检测时间)，不存在或损坏时返回None"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.VERSION:
+                return None
+            results = [CheckResult.from_dict(item) for item in data.get('results', [])]
+            return results, data.get('check_time')
+        except Exception as e:
+            self.logger.warning(f"加载状态快照失败: {e}")
+            return None
\ No newline at end of file
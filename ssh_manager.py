@@ -1,100 +1,563 @@
-import paramiko
-import logging
-from typing import Dict, Any, Optional
-from contextlib import contextmanager
-
-
-class SSHManager:
-    """SSH连接管理器"""
-
-    def __init__(self):
-        self.connections: Dict[str, paramiko.SSHClient] = {}
-        self.logger = logging.getLogger(self.__class__.__name__)
-
-    def connect(self, server_config: Dict[str, Any]) -> paramiko.SSHClient:
-        """建立SSH连接"""
-        server_name = server_config.get('name', 'unknown')
-        host = server_config['host']
-        port = server_config.get('port', 22)
-        username = server_config['username']
-
-        try:
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            # 认证方式：优先使用密钥文件
-            key_file = server_config.get('key_file')
-            password = server_config.get('password')
-
-            if key_file:
-                # 扩展用户目录
-                if key_file.startswith('~'):
-                    import os
-                    key_file = os.path.expanduser(key_file)
-
-                client.connect(
-                    hostname=host,
-                    port=port,
-                    username=username,
-                    key_filename=key_file,
-                    timeout=server_config.get('timeout', 10)
-                )
-            elif password:
-                client.connect(
-                    hostname=host,
-                    port=port,
-                    username=username,
-                    password=password,
-                    timeout=server_config.get('timeout', 10)
-                )
-            else:
-                raise ValueError("Either key_file or password must be provided")
-
-            self.connections[server_name] = client
-            self.logger.info(f"SSH连接成功: {server_name} ({host}:{port})")
-            return client
-
-        except Exception as e:
-            self.logger.error(f"SSH连接失败 {server_name}: {str(e)}")
-            raise
-
-    def get_connection(self, server_name: str, server_config: Dict[str, Any]) -> paramiko.SSHClient:
-        """获取SSH连接，如果不存在则创建"""
-        if server_name in self.connections:
-            client = self.connections[server_name]
-            # 检查连接是否仍然有效
-            try:
-                client.exec_command('echo "test"', timeout=5)
-                return client
-            except:
-                self.logger.warning(f"SSH连接已断开，重新连接: {server_name}")
-                del self.connections[server_name]
-
-        return self.connect({**server_config, 'name': server_name})
-
-    @contextmanager
-    def get_ssh_client(self, server_config: Dict[str, Any]):
-        """上下文管理器获取SSH客户端"""
-        server_name = server_config.get('name', 'unknown')
-        client = None
-        try:
-            client = self.get_connection(server_name, server_config)
-            yield client
-        except Exception as e:
-            self.logger.error(f"SSH操作失败 {server_name}: {str(e)}")
-            raise
-        # 注意：不在这里关闭连接，保持连接复用
-
-    def close_all(self):
-        """关闭所有SSH连接"""
-        for server_name, client in self.connections.items():
-            try:
-                client.close()
-                self.logger.info(f"关闭SSH连接: {server_name}")
-            except Exception as e:
-                self.logger.error(f"关闭SSH连接失败 {server_name}: {str(e)}")
-        self.connections.clear()
-
-
-# 全局SSH管理器实例
-ssh_manager = SSHManager()
\ No newline at end of file
+import logging
+import itertools
+import select
+import threading
+import time
+import uuid
+from typing import Dict, Any, Callable, Optional, List, Tuple, TYPE_CHECKING
+from contextlib import contextmanager
+from stream_executor import (
+    DEFAULT_MAX_OUTPUT_BYTES, ChannelLineStream, LineCallback, OutputLimitExceeded, run_channel
+)
+
+if TYPE_CHECKING:
+    import paramiko
+
+
+class _PendingCommand:
+    """常驻shell中等待结果的命令"""
+
+    def __init__(self, command_id: int, max_output_bytes: Optional[int] = None,
+                 on_line: Optional[LineCallback] = None):
+        self.command_id = command_id
+        self.max_output_bytes = max_output_bytes
+        self.on_line = on_line
+        self.total_bytes = 0
+        self.stdout: List[str] = []
+        self.stderr: List[str] = []
+        self.return_code: Optional[int] = None
+        self.stdout_done = False
+        self.stderr_done = False
+        self.error: Optional[Exception] = None
+        self.event = threading.Event()
+
+    def add_line(self, stream: str, line: str):
+        """记录一行输出，超过上限后只丢弃不再收集，命令结束时报错"""
+        if self.error is not None:
+            return
+        self.total_bytes += len(line) + 1
+        if self.max_output_bytes and self.total_bytes > self.max_output_bytes:
+            self.error = OutputLimitExceeded(f"Command output exceeded {self.max_output_bytes} bytes")
+            return
+        getattr(self, stream).append(line)
+        if self.on_line:
+            try:
+                self.on_line(stream, line)
+            except Exception as e:
+                self.error = e
+
+    def finish(self, error: Optional[Exception] = None):
+        if error is not None and self.error is None:
+            self.error = error
+        self.event.set()
+
+
+class ShellRetired(RuntimeError):
+    """常驻shell已停止接收新命令（有命令超时），需要改用新的shell"""
+
+
+class _ShellCommandHandle:
+    """常驻shell中单条命令的句柄，close() 只放弃这条命令，不关闭其他命令共用的shell"""
+
+    def __init__(self, shell: 'PersistentShell', command_id: int):
+        self.shell = shell
+        self.command_id = command_id
+
+    def close(self):
+        self.shell.abandon(self.command_id)
+
+
+class PersistentShell:
+    """单主机常驻shell通道
+
+    命令写入同一个远程 /bin/sh 进程，前后以带退出码的哨兵标记分帧，
+    后台线程读取stdout/stderr并按命令编号分发结果。命令在远端顺序执行，
+    但调用方无需等待上一条命令返回即可写入下一条（流水线）。
+    有命令超时后shell不再接收新命令（accepting 为假，由 SSHManager 重建一个新的），
+    已排在其后的命令继续在原shell中等待各自的结果，全部结束后关闭原通道。
+    """
+
+    def __init__(self, client: 'paramiko.SSHClient', server_name: str):
+        self.server_name = server_name
+        self.logger = logging.getLogger(f"{self.__class__.__name__}.{server_name}")
+        self._token = uuid.uuid4().hex[:12]
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending: Dict[int, _PendingCommand] = {}
+        # 每个输出流当前正在收集的命令
+        self._current: Dict[str, Optional[_PendingCommand]] = {'stdout': None, 'stderr': None}
+        self._buffers: Dict[str, bytes] = {'stdout': b'', 'stderr': b''}
+        self.closed = False
+        self.accepting = True
+
+        self._channel = client.get_transport().open_session()
+        self._channel.exec_command('/bin/sh')
+        self._reader = threading.Thread(
+            target=self._read_loop, name=f"ssh-shell-{server_name}", daemon=True
+        )
+        self._reader.start()
+
+    def _marker(self, kind: str, command_id: int) -> str:
+        return f"__SC_{kind}_{self._token}_{command_id}__"
+
+    def execute(self, command: str, timeout: int, max_output_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+                on_line: Optional[LineCallback] = None,
+                on_start: Optional[Callable[[Any], None]] = None) -> Tuple[int, str, str]:
+        """写入命令并等待其结果
+
+        on_start 以本条命令的句柄回调，调用其 close() 只放弃这条命令。
+        """
+        with self._lock:
+            if self.closed or not self.accepting:
+                raise ShellRetired(f"Persistent shell on {self.server_name} is closed")
+            command_id = next(self._ids)
+            pending = _PendingCommand(command_id, max_output_bytes, on_line)
+            self._pending[command_id] = pending
+            begin = self._marker('BEGIN', command_id)
+            end = self._marker('END', command_id)
+            # 子shell隔离命令中的 exit/cd 等副作用，stdin重定向避免吞掉后续命令
+            script = (
+                f"printf '%s\\n' '{begin}'; printf '%s\\n' '{begin}' >&2; "
+                f"( {command}\n) </dev/null; "
+                f"printf '%s %d\\n' '{end}' $?; printf '%s\\n' '{end}' >&2\n"
+            )
+            try:
+                self._channel.sendall(script.encode('utf-8'))
+            except Exception as e:
+                self._pending.pop(command_id, None)
+                self._close_locked(RuntimeError(f"Persistent shell write failed: {e}"))
+                raise RuntimeError(f"Persistent shell write failed: {e}")
+
+        if on_start:
+            on_start(_ShellCommandHandle(self, command_id))
+        if not pending.event.wait(timeout):
+            self.abandon(command_id)
+            raise TimeoutError(f"Command timeout after {timeout}s: {command}")
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.return_code, '\n'.join(pending.stdout).strip(), '\n'.join(pending.stderr).strip()
+
+    def abandon(self, command_id: int):
+        """放弃一条命令：只让它失败，shell停止接收新命令
+
+        远端shell顺序执行，被放弃的命令可能仍占着shell，新命令改由重建的shell执行；
+        已排队的命令不受影响，原shell在它们全部结束后关闭。
+        """
+        with self._lock:
+            pending = self._pending.pop(command_id, None)
+            if pending is None:
+                # 命令已经结束
+                return
+            if self.accepting:
+                self.accepting = False
+                self.logger.warning(f"命令 {command_id} 被放弃，常驻shell停止接收新命令: {self.server_name}")
+            if not self._pending:
+                self._close_locked()
+        pending.finish(TimeoutError(f"Command {command_id} abandoned on {self.server_name}"))
+
+    def _read_loop(self):
+        """后台读取并分发输出"""
+        channel = self._channel
+        try:
+            while not self.closed:
+                readable, _, _ = select.select([channel], [], [], 1.0)
+                got_data = False
+                while channel.recv_ready():
+                    self._feed('stdout', channel.recv(32768))
+                    got_data = True
+                while channel.recv_stderr_ready():
+                    self._feed('stderr', channel.recv_stderr(32768))
+                    got_data = True
+                if not got_data and (channel.exit_status_ready() or channel.closed):
+                    break
+        except Exception as e:
+            self.logger.warning(f"常驻shell读取失败: {e}")
+        self.close(RuntimeError(f"Persistent shell on {self.server_name} closed"))
+
+    def _feed(self, stream: str, data: bytes):
+        if not data:
+            return
+        buffer = self._buffers[stream] + data
+        *lines, self._buffers[stream] = buffer.split(b'\n')
+        for raw in lines:
+            self._handle_line(stream, raw.decode('utf-8', errors='replace'))
+
+    def _handle_line(self, stream: str, line: str):
+        current = self._current[stream]
+        if current is None:
+            begin_prefix = f"__SC_BEGIN_{self._token}_"
+            if line.startswith(begin_prefix):
+                command_id = int(line[len(begin_prefix):].rstrip('_'))
+                with self._lock:
+                    self._current[stream] = self._pending.get(command_id)
+            return
+
+        end_marker = self._marker('END', current.command_id)
+        index = line.find(end_marker)
+        if index < 0:
+            current.add_line(stream, line)
+            return
+
+        # 命令输出末尾没有换行时，标记会与最后一行拼接
+        if index > 0:
+            current.add_line(stream, line[:index])
+        if stream == 'stdout':
+            current.return_code = int(line[index + len(end_marker):].strip() or -1)
+            current.stdout_done = True
+        else:
+            current.stderr_done = True
+        self._current[stream] = None
+
+        if current.stdout_done and current.stderr_done:
+            with self._lock:
+                self._pending.pop(current.command_id, None)
+                if not self.accepting and not self._pending:
+                    self._close_locked()
+            current.finish()
+
+    def close(self, error: Optional[Exception] = None):
+        with self._lock:
+            self._close_locked(error)
+
+    def _close_locked(self, error: Optional[Exception] = None):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._channel.close()
+        except Exception:
+            pass
+        error = error or RuntimeError(f"Persistent shell on {self.server_name} closed")
+        for pending in self._pending.values():
+            pending.finish(error)
+        self._pending.clear()
+
+
+class SSHManager:
+    """SSH连接管理器"""
+
+    def __init__(self):
+        self.connections: Dict[str, 'paramiko.SSHClient'] = {}
+        self.shells: Dict[str, PersistentShell] = {}
+        # ssh_servers 配置，用于按名称解析 via 跳板机
+        self.servers: Dict[str, Dict[str, Any]] = {}
+        # 经跳板机连接的主机 -> 跳板机名称，以及每个跳板机的通道数限制
+        self.tunnels: Dict[str, str] = {}
+        self._channel_slots: Dict[str, threading.BoundedSemaphore] = {}
+        # 每台主机正在执行的命令和打开的事件流数量，以及最近一次使用时间，用于回收空闲的跳板机通道
+        self._in_use: Dict[str, int] = {}
+        self._last_used: Dict[str, float] = {}
+        self._locks_lock = threading.Lock()
+        self._server_locks: Dict[str, threading.Lock] = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def configure(self, ssh_servers_config: Dict[str, Any]):
+        """登记 ssh_servers 配置，供 via 按名称引用跳板机"""
+        self.servers = {
+            name: {**server_config, 'name': server_config.get('name', name)}
+            for name, server_config in (ssh_servers_config or {}).items()
+        }
+
+    def _server_lock(self, server_name: str) -> threading.Lock:
+        """每台主机一把连接锁，避免并发检测同时为同一主机（或跳板机）建立多条连接"""
+        with self._locks_lock:
+            lock = self._server_locks.get(server_name)
+            if lock is None:
+                lock = self._server_locks[server_name] = threading.Lock()
+            return lock
+
+    def resolve_via(self, server_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """解析服务器配置中的 via：跳板机名称或内联的跳板机配置"""
+        via = server_config.get('via')
+        if not via:
+            return None
+        if isinstance(via, dict):
+            return {**via, 'name': via.get('name') or f"{via['host']}:{via.get('port', 22)}"}
+        if via not in self.servers:
+            raise ValueError(f"Unknown bastion server: {via}")
+        return self.servers[via]
+
+    def _open_tunnel(self, server_config: Dict[str, Any], bastion_config: Dict[str, Any]):
+        """在跳板机的已认证连接上打开到目标主机的 direct-tcpip 通道"""
+        server_name = server_config.get('name', 'unknown')
+        bastion_name = bastion_config['name']
+        if bastion_name == server_name:
+            raise ValueError(f"Server {server_name} cannot use itself as bastion")
+        timeout = server_config.get('timeout', 10)
+
+        with self._locks_lock:
+            slots = self._channel_slots.get(bastion_name)
+            if slots is None and bastion_config.get('max_channels'):
+                slots = threading.BoundedSemaphore(bastion_config['max_channels'])
+                self._channel_slots[bastion_name] = slots
+        # 依次尝试：直接获取名额 -> 回收断开的隧道 -> 关闭空闲连接 -> 限时等待，任一环节失败都归还已获取的名额
+        acquired = False
+        try:
+            if slots is not None:
+                acquired = slots.acquire(blocking=False)
+                if not acquired:
+                    self._reap_tunnels(bastion_name)
+                    acquired = slots.acquire(blocking=False)
+                if not acquired:
+                    self._evict_idle_tunnel(bastion_name)
+                    acquired = slots.acquire(blocking=False)
+                if not acquired:
+                    acquired = slots.acquire(timeout=timeout)
+                if not acquired:
+                    raise RuntimeError(f"Bastion {bastion_name} has no free channel (max_channels reached)")
+
+            bastion = self.get_connection(bastion_name, bastion_config)
+            channel = bastion.get_transport().open_channel(
+                'direct-tcpip',
+                (server_config['host'], server_config.get('port', 22)),
+                ('127.0.0.1', 0),
+                timeout=timeout
+            )
+        except Exception:
+            if acquired:
+                slots.release()
+            raise
+        self.tunnels[server_name] = bastion_name
+        return channel
+
+    def _reap_tunnels(self, bastion_name: str):
+        """回收经该跳板机、但连接已断开的主机占用的通道名额"""
+        for server_name, via in list(self.tunnels.items()):
+            client = self.connections.get(server_name)
+            if via != bastion_name or client is None:
+                continue
+            transport = client.get_transport()
+            if transport is not None and transport.is_active():
+                continue
+            lock = self._server_lock(server_name)
+            # 该主机正在重连时由它自己回收，这里不等待
+            if lock.acquire(blocking=False):
+                try:
+                    if self.connections.get(server_name) is client:
+                        self._drop_connection(server_name)
+                finally:
+                    lock.release()
+
+    def _evict_idle_tunnel(self, bastion_name: str):
+        """通道名额用完时关闭经该跳板机、最久未使用的空闲连接，归还其通道名额
+
+        空闲指没有正在执行的命令、没有打开的常驻shell和事件流，下次使用时会重新建立连接。
+        """
+        with self._locks_lock:
+            candidates = sorted(
+                (server_name for server_name, via in self.tunnels.items()
+                 if via == bastion_name and not self._in_use.get(server_name)),
+                key=lambda server_name: self._last_used.get(server_name, 0)
+            )
+        for server_name in candidates:
+            shell = self.shells.get(server_name)
+            if shell is not None and not shell.closed:
+                continue
+            lock = self._server_lock(server_name)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                with self._locks_lock:
+                    idle = not self._in_use.get(server_name)
+                if idle and self.tunnels.get(server_name) == bastion_name:
+                    self.logger.info(f"跳板机 {bastion_name} 通道名额已满，关闭空闲连接: {server_name}")
+                    self._drop_connection(server_name)
+                    return
+            finally:
+                lock.release()
+
+    def _acquire_use(self, server_name: str):
+        with self._locks_lock:
+            self._in_use[server_name] = self._in_use.get(server_name, 0) + 1
+            self._last_used[server_name] = time.monotonic()
+
+    def _release_use(self, server_name: str):
+        with self._locks_lock:
+            self._in_use[server_name] -= 1
+            self._last_used[server_name] = time.monotonic()
+
+    def _release_tunnel(self, server_name: str):
+        """目标主机连接关闭后归还跳板机的通道名额"""
+        bastion_name = self.tunnels.pop(server_name, None)
+        slots = self._channel_slots.get(bastion_name) if bastion_name else None
+        if slots is not None:
+            slots.release()
+
+    def _drop_connection(self, server_name: str):
+        client = self.connections.pop(server_name, None)
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+        self._release_tunnel(server_name)
+
+    def connect(self, server_config: Dict[str, Any]) -> 'paramiko.SSHClient':
+        """建立SSH连接"""
+        server_name = server_config.get('name', 'unknown')
+        host = server_config['host']
+        port = server_config.get('port', 22)
+        username = server_config['username']
+
+        # 延迟导入paramiko，加快启动速度
+        import paramiko
+
+        sock = None
+        try:
+            # 配置了跳板机时，复用到跳板机的连接，经 direct-tcpip 通道连接目标主机
+            bastion_config = self.resolve_via(server_config)
+            if bastion_config is not None:
+                sock = self._open_tunnel(server_config, bastion_config)
+
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+            # 认证方式：优先使用密钥文件
+            key_file = server_config.get('key_file')
+            password = server_config.get('password')
+
+            if key_file:
+                # 扩展用户目录
+                if key_file.startswith('~'):
+                    import os
+                    key_file = os.path.expanduser(key_file)
+
+                client.connect(
+                    hostname=host,
+                    port=port,
+                    username=username,
+                    key_filename=key_file,
+                    timeout=server_config.get('timeout', 10),
+                    sock=sock
+                )
+            elif password:
+                client.connect(
+                    hostname=host,
+                    port=port,
+                    username=username,
+                    password=password,
+                    timeout=server_config.get('timeout', 10),
+                    sock=sock
+                )
+            else:
+                raise ValueError("Either key_file or password must be provided")
+
+            self.connections[server_name] = client
+            via = f" via {self.tunnels[server_name]}" if sock is not None else ""
+            self.logger.info(f"SSH连接成功: {server_name} ({host}:{port}){via}")
+            return client
+
+        except Exception as e:
+            if sock is not None:
+                sock.close()
+                self._release_tunnel(server_name)
+            self.logger.error(f"SSH连接失败 {server_name}: {str(e)}")
+            raise
+
+    def get_connection(self, server_name: str, server_config: Dict[str, Any]) -> 'paramiko.SSHClient':
+        """获取SSH连接，如果不存在则创建"""
+        with self._server_lock(server_name):
+            if server_name in self.connections:
+                client = self.connections[server_name]
+                # 检查连接是否仍然有效（只看本地传输层状态，不额外产生一次往返）
+                transport = client.get_transport()
+                if transport is not None and transport.is_active():
+                    return client
+                self.logger.warning(f"SSH连接已断开，重新连接: {server_name}")
+                self._drop_connection(server_name)
+
+            return self.connect({**server_config, 'name': server_name})
+
+    @contextmanager
+    def get_ssh_client(self, server_config: Dict[str, Any]):
+        """上下文管理器获取SSH客户端"""
+        server_name = server_config.get('name', 'unknown')
+        client = None
+        # 使用期间该连接不会被当作空闲连接回收
+        self._acquire_use(server_name)
+        try:
+            client = self.get_connection(server_name, server_config)
+            yield client
+        except Exception as e:
+            self.logger.error(f"SSH操作失败 {server_name}: {str(e)}")
+            raise
+        finally:
+            self._release_use(server_name)
+        # 注意：不在这里关闭连接，保持连接复用
+
+    def get_shell(self, server_config: Dict[str, Any]) -> PersistentShell:
+        """获取主机的常驻shell，如果不存在、已关闭或已停止接收命令则创建"""
+        server_name = server_config.get('name', 'unknown')
+        # 按主机加锁（与连接锁分开，get_connection 内部还会获取连接锁），慢主机不影响其他主机
+        with self._server_lock(f"shell:{server_name}"):
+            shell = self.shells.get(server_name)
+            if shell is None or shell.closed or not shell.accepting:
+                client = self.get_connection(server_name, server_config)
+                shell = PersistentShell(client, server_name)
+                self.shells[server_name] = shell
+                self.logger.info(f"常驻shell已建立: {server_name}")
+            return shell
+
+    def execute(self, server_config: Dict[str, Any], command: str, timeout: int,
+                max_output_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+                on_line: Optional[LineCallback] = None,
+                on_start: Optional[Callable[[Any], None]] = None) -> Tuple[int, str, str]:
+        """在远程主机上执行命令，返回 (退出码, stdout, stderr)
+
+        on_start 以执行命令所用的通道（常驻shell时为该命令的句柄）回调，调用其 close() 可强制中断命令；
+        常驻shell只放弃这一条命令，不影响共用shell的其他命令。
+        """
+        if server_config.get('persistent_shell', False):
+            shell = self.get_shell(server_config)
+            try:
+                return shell.execute(command, timeout, max_output_bytes, on_line, on_start)
+            except ShellRetired:
+                # 取到shell后它恰好因其他命令超时而停止接收，换新shell重试一次
+                shell = self.get_shell(server_config)
+                return shell.execute(command, timeout, max_output_bytes, on_line, on_start)
+
+        with self.get_ssh_client(server_config) as client:
+            channel = client.get_transport().open_session(timeout=timeout)
+            if on_start:
+                on_start(channel)
+            return_code, output, error = run_channel(channel, command, timeout, max_output_bytes, on_line)
+            return return_code, output.strip(), error.strip()
+
+    def open_stream(self, server_config: Dict[str, Any], command: str) -> ChannelLineStream:
+        """在独立通道上启动长时间运行的命令，返回逐行读取的输出流"""
+        server_name = server_config.get('name', 'unknown')
+        # 事件流打开期间该连接不会被当作空闲连接回收
+        self._acquire_use(server_name)
+        try:
+            client = self.get_connection(server_name, server_config)
+            transport = client.get_transport()
+            # 长连接需要保活，连接中断时读取端才能及时收到EOF
+            transport.set_keepalive(server_config.get('keepalive', 30))
+            channel = transport.open_session()
+            channel.exec_command(command)
+        except Exception:
+            self._release_use(server_name)
+            raise
+        return ChannelLineStream(channel, on_close=lambda: self._release_use(server_name))
+
+    def close_all(self):
+        """关闭所有SSH连接"""
+        for shell in list(self.shells.values()):
+            shell.close()
+        self.shells.clear()
+
+        # 先关闭经跳板机的连接，再关闭跳板机本身
+        for server_name in sorted(self.connections, key=lambda name: name not in self.tunnels):
+            client = self.connections[server_name]
+            try:
+                client.close()
+                self.logger.info(f"关闭SSH连接: {server_name}")
+            except Exception as e:
+                self.logger.error(f"关闭SSH连接失败 {server_name}: {str(e)}")
+            self._release_tunnel(server_name)
+        self.connections.clear()
+
+
+# 全局SSH管理器实例
+ssh_manager = SSHManager()
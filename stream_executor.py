@@ -0,0 +1,255 @@
+import os
+import queue
+import select
+import selectors
+import signal
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# 单条命令默认允许的最大输出（stdout + stderr）
+DEFAULT_MAX_OUTPUT_BYTES = 4 * 1024 * 1024
+CHUNK_SIZE = 32768
+
+# Windows 没有进程组信号，管道也不能用 selectors 等待，本地命令改用进程组标志和读取线程
+_WINDOWS = os.name == 'nt'
+
+LineCallback = Callable[[str, str], None]
+# 字符串经shell执行；参数列表直接执行，省去一次shell进程
+Command = Union[str, Sequence[str]]
+
+
+class OutputLimitExceeded(RuntimeError):
+    """命令输出超过上限"""
+    pass
+
+
+class OutputCollector:
+    """按块收集stdout/stderr，统计输出大小并逐行回调"""
+
+    def __init__(self, max_output_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+                 on_line: Optional[LineCallback] = None):
+        self.max_output_bytes = max_output_bytes
+        self.on_line = on_line
+        self.total_bytes = 0
+        self._chunks: Dict[str, List[bytes]] = {'stdout': [], 'stderr': []}
+        self._partial: Dict[str, bytes] = {'stdout': b'', 'stderr': b''}
+
+    def feed(self, stream: str, data: bytes):
+        """写入一块输出，超过上限时抛出 OutputLimitExceeded"""
+        if not data:
+            return
+        self.total_bytes += len(data)
+        if self.max_output_bytes and self.total_bytes > self.max_output_bytes:
+            raise OutputLimitExceeded(f"Command output exceeded {self.max_output_bytes} bytes")
+        self._chunks[stream].append(data)
+
+        if self.on_line:
+            *lines, self._partial[stream] = (self._partial[stream] + data).split(b'\n')
+            for line in lines:
+                self.on_line(stream, line.decode('utf-8', errors='replace').rstrip('\r'))
+
+    def finish(self) -> Tuple[str, str]:
+        """结束收集，返回完整的 (stdout, stderr)"""
+        if self.on_line:
+            for stream, rest in self._partial.items():
+                if rest:
+                    self.on_line(stream, rest.decode('utf-8', errors='replace').rstrip('\r'))
+                    self._partial[stream] = b''
+        return (
+            b''.join(self._chunks['stdout']).decode('utf-8', errors='replace'),
+            b''.join(self._chunks['stderr']).decode('utf-8', errors='replace')
+        )
+
+
+def _popen(command: Command, stderr) -> subprocess.Popen:
+    """在新的进程组中启动命令，超时或中止时可以连同子进程一起结束"""
+    if _WINDOWS:
+        group = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group = {'start_new_session': True}
+    return subprocess.Popen(
+        command,
+        shell=isinstance(command, str),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+        **group
+    )
+
+
+def kill_process_tree(process: subprocess.Popen):
+    """结束进程所在的整个进程组，避免shell的子进程继续占用输出管道"""
+    if process.poll() is not None:
+        return
+    if _WINDOWS:
+        # taskkill /T 同时结束子进程（shell=True 时命令运行在 cmd.exe 的子进程中）
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if process.poll() is None:
+            process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _read_selector(process: subprocess.Popen, collector: OutputCollector, deadline: float, timeout: float, command):
+    """POSIX：单线程用 selectors 同时读取stdout/stderr"""
+    selector = selectors.DefaultSelector()
+    selector.register(process.stdout, selectors.EVENT_READ, 'stdout')
+    selector.register(process.stderr, selectors.EVENT_READ, 'stderr')
+    try:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Command timeout after {timeout}s: {command}")
+            for key, _ in selector.select(timeout=min(remaining, 1.0)):
+                data = os.read(key.fileobj.fileno(), CHUNK_SIZE)
+                if data:
+                    collector.feed(key.data, data)
+                else:
+                    selector.unregister(key.fileobj)
+    finally:
+        selector.close()
+
+
+def _read_threads(process: subprocess.Popen, collector: OutputCollector, deadline: float, timeout: float, command):
+    """Windows：每个管道一个读取线程，数据经队列交给调用线程处理"""
+    chunks: 'queue.Queue[Tuple[str, bytes]]' = queue.Queue()
+
+    def reader(stream: str, pipe):
+        try:
+            for data in iter(lambda: pipe.read1(CHUNK_SIZE), b''):
+                chunks.put((stream, data))
+        except (OSError, ValueError):
+            pass
+        chunks.put((stream, b''))
+
+    for stream, pipe in (('stdout', process.stdout), ('stderr', process.stderr)):
+        threading.Thread(target=reader, args=(stream, pipe), name=f"run-local-{stream}", daemon=True).start()
+    open_streams = 2
+    while open_streams:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Command timeout after {timeout}s: {command}")
+        try:
+            stream, data = chunks.get(timeout=min(remaining, 1.0))
+        except queue.Empty:
+            continue
+        if data:
+            collector.feed(stream, data)
+        else:
+            open_streams -= 1
+
+
+def run_local(command: Command, timeout: float, max_output_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+              on_line: Optional[LineCallback] = None,
+              on_start: Optional[Callable[[subprocess.Popen], None]] = None) -> Tuple[int, str, str]:
+    """执行本地命令，并发读取stdout/stderr，超过总时长或输出上限时终止进程
+
+    on_start 在进程启动后以 Popen 对象回调，供调用方在需要时强制结束进程。
+    """
+    deadline = time.monotonic() + timeout
+    collector = OutputCollector(max_output_bytes, on_line)
+    process = _popen(command, subprocess.PIPE)
+    if on_start:
+        on_start(process)
+
+    try:
+        read_output = _read_threads if _WINDOWS else _read_selector
+        read_output(process, collector, deadline, timeout, command)
+
+        remaining = deadline - time.monotonic()
+        try:
+            return_code = process.wait(timeout=max(remaining, 0))
+        except subprocess.TimeoutExpired:
+            raise TimeoutError(f"Command timeout after {timeout}s: {command}")
+    except BaseException:
+        kill_process_tree(process)
+        process.wait()
+        raise
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+
+    output, error = collector.finish()
+    return return_code, output, error
+
+
+def run_channel(channel, command: str, timeout: float,
+                max_output_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+                on_line: Optional[LineCallback] = None) -> Tuple[int, str, str]:
+    """在已打开的SSH会话通道上执行命令
+
+    在等待退出码之前持续排空stdout/stderr，避免远端输出填满通道窗口后互相等待。
+    """
+    deadline = time.monotonic() + timeout
+    collector = OutputCollector(max_output_bytes, on_line)
+    try:
+        channel.exec_command(command)
+        while True:
+            # 每轮每个流最多读一块，然后检查总时长，持续输出的命令同样会超时
+            got_data = False
+            if channel.recv_ready():
+                collector.feed('stdout', channel.recv(CHUNK_SIZE))
+                got_data = True
+            if channel.recv_stderr_ready():
+                collector.feed('stderr', channel.recv_stderr(CHUNK_SIZE))
+                got_data = True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Command timeout after {timeout}s: {command}")
+            if got_data:
+                continue
+            if channel.exit_status_ready() and (channel.eof_received or channel.closed):
+                break
+            if channel.closed:
+                raise RuntimeError("SSH channel closed before command finished")
+            select.select([channel], [], [], min(remaining, 1.0))
+
+        return_code = channel.recv_exit_status()
+    finally:
+        channel.close()
+
+    output, error = collector.finish()
+    return return_code, output, error
+
+
+class LocalLineStream:
+    """逐行读取本地长时间运行命令的输出（如 docker events、journalctl -f）"""
+
+    def __init__(self, command: Command):
+        self.command = command
+        self.process = _popen(command, subprocess.DEVNULL)
+
+    def __iter__(self):
+        for raw in iter(self.process.stdout.readline, b''):
+            yield raw.decode('utf-8', errors='replace').rstrip('\r\n')
+
+    def close(self):
+        kill_process_tree(self.process)
+        self.process.wait()
+        self.process.stdout.close()
+
+
+class ChannelLineStream:
+    """逐行读取SSH通道上长时间运行命令的输出"""
+
+    def __init__(self, channel, on_close: Optional[Callable[[], None]] = None):
+        self.channel = channel
+        self.on_close = on_close
+        self._file = channel.makefile('rb')
+
+    def __iter__(self):
+        for raw in iter(self._file.readline, b''):
+            yield raw.decode('utf-8', errors='replace').rstrip('\r\n')
+
+    def close(self):
+        """关闭通道，重复调用时 on_close 只回调一次"""
+        self.channel.close()
+        on_close, self.on_close = self.on_close, None
+        if on_close:
+            on_close()
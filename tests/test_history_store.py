@@ -0,0 +1,81 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_store
+from detectors.base import CheckResult, ServiceStatus
+from history_store import HistoryStore
+
+
+class HistoryStoreQueryTest(unittest.TestCase):
+    """按 (ts, id) 游标分批查询"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = HistoryStore(os.path.join(self.tmpdir, 'history.db'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _record(self, count: int, ts: float):
+        self.store.record([
+            CheckResult(service_name=f"svc-{i}", service_type='tcp', status=ServiceStatus.HEALTHY,
+                        message='ok', server='host-a')
+            for i in range(count)
+        ], check_time=ts)
+
+    def test_pages_across_equal_timestamps(self):
+        # 每轮的结果共用同一个 ts，批次边界落在同一 ts 的记录中间
+        now = time.time()
+        for offset in range(3):
+            self._record(7, now + offset)
+
+        with mock.patch.object(history_store, 'FETCH_SIZE', 3):
+            records = list(self.store.query())
+
+        ids = [record['id'] for record in records]
+        self.assertEqual(len(ids), 21)
+        self.assertEqual(len(set(ids)), 21)
+        self.assertEqual([(record['ts'], record['id']) for record in records],
+                         sorted((record['ts'], record['id']) for record in records))
+
+    def test_resume_after_cursor(self):
+        now = time.time()
+        self._record(5, now)
+        self._record(5, now + 1)
+        records = list(self.store.query())
+
+        cursor = (records[2]['ts'], records[2]['id'])
+        with mock.patch.object(history_store, 'FETCH_SIZE', 2):
+            resumed = list(self.store.query(after=cursor))
+        self.assertEqual([record['id'] for record in resumed], [record['id'] for record in records[3:]])
+
+        with mock.patch.object(history_store, 'FETCH_SIZE', 2):
+            limited = list(self.store.query(after=cursor, limit=4))
+        self.assertEqual([record['id'] for record in limited], [record['id'] for record in records[3:7]])
+
+    def test_cursor_query_searches_index(self):
+        # 游标条件必须能作为索引范围使用，否则每一批都要从头扫描
+        where, params = HistoryStore._where(None, None, [], [], [], (time.time(), 1))
+        conn = sqlite3.connect(self.store.path)
+        try:
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT id FROM results{where} ORDER BY ts, id LIMIT 10", params
+            ).fetchall()
+        finally:
+            conn.close()
+        detail = ' '.join(row[-1] for row in plan)
+        self.assertIn('SEARCH', detail)
+        self.assertIn('ts>?', detail.replace(' ', ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+from typing import Any, Dict
+from transports.base import BaseTransport
+from transports.openssh_transport import OpenSSHTransport
+from transports.paramiko_transport import ParamikoTransport
+
+# 可选的远程执行后端，服务器配置中 transport 字段选择，默认 paramiko
+TRANSPORTS: Dict[str, BaseTransport] = {
+    'paramiko': ParamikoTransport(),
+    'openssh': OpenSSHTransport()
+}
+
+
+def get_transport(server_config: Dict[str, Any]) -> BaseTransport:
+    """按服务器配置选择远程执行后端"""
+    name = server_config.get('transport', 'paramiko')
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unsupported transport: {name}")
+    return TRANSPORTS[name]
+
+
+def close_all_transports():
+    """关闭所有后端的连接"""
+    for transport in TRANSPORTS.values():
+        transport.close_all()
\ No newline at end of file
@@ -0,0 +1,33 @@
+import abc
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from stream_executor import DEFAULT_MAX_OUTPUT_BYTES, LineCallback
+
+
+class BaseTransport(abc.ABC):
+    """远程命令执行后端基类
+
+    检测器、监听器和资源采样都通过 get_transport(server_config) 取得后端执行远程命令，
+    服务器配置中的 transport 字段决定使用哪个后端。
+    """
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def execute(self, server_config: Dict[str, Any], command: str, timeout: float,
+                max_output_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+                on_line: Optional[LineCallback] = None,
+                on_start: Optional[Callable[[Any], None]] = None) -> Tuple[int, str, str]:
+        """执行命令，返回 (退出码, stdout, stderr)
+
+        on_start 以带 close() 方法的对象回调，调用其 close() 可强制中断命令。
+        """
+        pass
+
+    @abc.abstractmethod
+    def open_stream(self, server_config: Dict[str, Any], command: str) -> Iterable[str]:
+        """启动长时间运行的命令，返回逐行读取且带 close() 的输出流"""
+        pass
+
+    def close_all(self):
+        """关闭后端持有的所有连接"""
+        pass
\ No newline at end of file
@@ -0,0 +1,135 @@
+import getpass
+import logging
+import os
+import re
+import shlex
+import subprocess
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from stream_executor import (
+    DEFAULT_MAX_OUTPUT_BYTES, LineCallback, LocalLineStream, kill_process_tree, run_local
+)
+from transports.base import BaseTransport
+
+# ssh 客户端自身出错（连接、认证失败等）时的退出码
+SSH_ERROR_EXIT_CODE = 255
+
+
+class _ProcessHandle:
+    """供检测器中断命令的句柄：close() 结束本地 ssh 客户端进程"""
+
+    def __init__(self, process: subprocess.Popen):
+        self.process = process
+
+    def close(self):
+        kill_process_tree(self.process)
+
+
+class OpenSSHTransport(BaseTransport):
+    """系统 ssh 客户端后端
+
+    使用 ControlMaster=auto / ControlPersist 为每台主机维持一个主连接，后续命令经主连接多路复用，
+    加解密在独立的原生 ssh 进程中完成，不占用监控进程的 GIL。
+    只支持密钥（key_file 或 ssh-agent）认证；via 跳板机通过 ProxyCommand 经跳板机自己的主连接转发。
+    """
+
+    name = 'openssh'
+
+    def __init__(self, ssh_binary: str = 'ssh', control_persist: int = 300):
+        self.ssh_binary = ssh_binary
+        self.control_persist = control_persist
+        # 主连接套接字目录在第一次构造 ssh 命令时才创建，导入本模块时不访问文件系统
+        self._control_dir: Optional[str] = None
+        # 用过的主机配置，关闭时逐个结束主连接
+        self._masters: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def control_dir(self) -> str:
+        """按用户区分的主连接套接字目录（ControlPath 所在目录），不存在时创建"""
+        if self._control_dir is None:
+            try:
+                user = getpass.getuser()
+            except Exception:
+                user = 'unknown'
+            user = re.sub(r'[^\w.-]', '_', user)
+            control_dir = os.path.join(tempfile.gettempdir(), f"service_checker-ssh-{user}")
+            os.makedirs(control_dir, mode=0o700, exist_ok=True)
+            self._control_dir = control_dir
+        return self._control_dir
+
+    def _options(self, server_config: Dict[str, Any]) -> List[str]:
+        if server_config.get('password') and not server_config.get('key_file'):
+            raise ValueError(f"OpenSSH transport requires key authentication: {server_config.get('name', 'unknown')}")
+
+        control_persist = server_config.get('control_persist', self.control_persist)
+        options = [
+            '-o', 'BatchMode=yes',
+            '-o', 'ControlMaster=auto',
+            '-o', f"ControlPersist={control_persist}",
+            '-o', f"ControlPath={os.path.join(self.control_dir, '%C')}",
+            '-o', 'StrictHostKeyChecking=accept-new',
+            '-o', f"ConnectTimeout={int(server_config.get('timeout', 10))}",
+            '-o', f"ServerAliveInterval={server_config.get('keepalive', 30)}",
+        ]
+        key_file = server_config.get('key_file')
+        if key_file:
+            options += ['-i', os.path.expanduser(key_file), '-o', 'IdentitiesOnly=yes']
+
+        from ssh_manager import ssh_manager
+        bastion_config = ssh_manager.resolve_via(server_config)
+        if bastion_config is not None:
+            self._remember(bastion_config)
+            # ProxyCommand 会展开 % 占位符，跳板机命令中的 % 需要转义，只保留目标地址 %h:%p
+            proxy = ' '.join(shlex.quote(arg) for arg in self._command(bastion_config, ['-W', '__TARGET__']))
+            options += ['-o', 'ProxyCommand=' + proxy.replace('%', '%%').replace('__TARGET__', '%h:%p')]
+        return options
+
+    def _command(self, server_config: Dict[str, Any], extra: Sequence[str] = ()) -> List[str]:
+        """构造 ssh 命令行（不含远程命令）"""
+        return ([self.ssh_binary] + self._options(server_config) + list(extra)
+                + ['-p', str(server_config.get('port', 22)), '-l', server_config['username'],
+                   server_config['host']])
+
+    def _remember(self, server_config: Dict[str, Any]):
+        with self._lock:
+            self._masters[server_config.get('name', server_config['host'])] = server_config
+
+    def execute(self, server_config: Dict[str, Any], command: str, timeout: float,
+                max_output_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+                on_line: Optional[LineCallback] = None,
+                on_start: Optional[Callable[[Any], None]] = None) -> Tuple[int, str, str]:
+        self._remember(server_config)
+        args = self._command(server_config) + ['--', command]
+        return_code, output, error = run_local(
+            args, timeout, max_output_bytes, on_line,
+            on_start=(lambda process: on_start(_ProcessHandle(process))) if on_start else None
+        )
+        if return_code == SSH_ERROR_EXIT_CODE:
+            raise ConnectionError(f"ssh to {server_config.get('name', 'unknown')} failed: {error.strip()}")
+        return return_code, output.strip(), error.strip()
+
+    def open_stream(self, server_config: Dict[str, Any], command: str) -> LocalLineStream:
+        self._remember(server_config)
+        return LocalLineStream(self._command(server_config) + ['--', command])
+
+    def master_pid(self, server_config: Dict[str, Any]) -> Optional[int]:
+        """主连接进程的PID（ssh -O check），主连接不存在时返回None"""
+        result = subprocess.run(self._command(server_config, ['-O', 'check']), stdin=subprocess.DEVNULL,
+                                capture_output=True, text=True, timeout=5)
+        match = re.search(r'pid=(\d+)', result.stderr)
+        return int(match.group(1)) if match else None
+
+    def close_all(self):
+        """结束所有主连接（ssh -O exit）"""
+        with self._lock:
+            masters = list(self._masters.items())
+            self._masters.clear()
+        for server_name, server_config in masters:
+            try:
+                subprocess.run(self._command(server_config, ['-O', 'exit']), stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
+            except Exception as e:
+                self.logger.debug(f"关闭ssh主连接失败 {server_name}: {e}")
\ No newline at end of file
@@ -0,0 +1,24 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from stream_executor import DEFAULT_MAX_OUTPUT_BYTES, ChannelLineStream, LineCallback
+from transports.base import BaseTransport
+
+
+class ParamikoTransport(BaseTransport):
+    """paramiko后端：复用 ssh_manager 中的连接、常驻shell和跳板机通道"""
+
+    name = 'paramiko'
+
+    def execute(self, server_config: Dict[str, Any], command: str, timeout: float,
+                max_output_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+                on_line: Optional[LineCallback] = None,
+                on_start: Optional[Callable[[Any], None]] = None) -> Tuple[int, str, str]:
+        from ssh_manager import ssh_manager
+        return ssh_manager.execute(server_config, command, timeout, max_output_bytes, on_line, on_start)
+
+    def open_stream(self, server_config: Dict[str, Any], command: str) -> ChannelLineStream:
+        from ssh_manager import ssh_manager
+        return ssh_manager.open_stream(server_config, command)
+
+    def close_all(self):
+        from ssh_manager import ssh_manager
+        ssh_manager.close_all()
\ No newline at end of file
@@ -0,0 +1,4 @@
+from watchers.base import BaseWatcher
+from watchers.docker_watcher import DockerWatcher
+from watchers.manager import WatchManager, watch_manager
+from watchers.systemd_watcher import SystemdWatcher
\ No newline at end of file
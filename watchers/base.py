@@ -0,0 +1,125 @@
+import abc
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+
+class BaseWatcher(abc.ABC):
+    """状态监听基类
+
+    后台线程订阅目标主机的事件流，增量维护内存中的状态表；
+    每次（重新）连接后先做一次全量同步，断线后按指数退避重连。
+    """
+
+    def __init__(self, server_config: Optional[Dict[str, Any]] = None, reconnect_delay: float = 5,
+                 max_reconnect_delay: float = 60):
+        self.server_config = server_config
+        self.is_remote = server_config is not None
+        self.server_name = server_config.get('name', 'unknown') if server_config else 'local'
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.lock = threading.Lock()
+        # 完成全量同步且事件流连接正常时为True，否则调用方应回退到轮询
+        self.synced = False
+        self.last_sync_time: Optional[float] = None
+        self._stream = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger(f"{self.__class__.__name__}.{self.server_name}")
+
+    def start(self):
+        """启动后台监听线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"{self.__class__.__name__}-{self.server_name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """停止监听并关闭事件流"""
+        self._stop_event.set()
+        self._close_stream()
+
+    def restart_stream(self):
+        """关闭当前事件流，监听线程会立即重连并重新同步"""
+        self._close_stream()
+
+    def _close_stream(self):
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stop_event.is_set():
+            connected_at = time.time()
+            try:
+                self._watch_once()
+            except Exception as e:
+                self.logger.warning(f"事件流中断: {e}")
+            finally:
+                self.synced = False
+                # 事件流结束或同步失败时同样关闭，释放通道/进程
+                self._close_stream()
+                self._stream = None
+
+            # 连接维持较久说明是正常断线，重置退避时间
+            if time.time() - connected_at > self.max_reconnect_delay:
+                delay = self.reconnect_delay
+            if self._stop_event.wait(delay):
+                break
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _watch_once(self):
+        # 先订阅再全量同步，同步期间到达的事件缓存在流中随后应用，不会丢失
+        self._stream = self.open_stream()
+        self.resync()
+        self.synced = True
+        self.last_sync_time = time.time()
+        self.logger.info("事件流已连接并完成全量同步")
+        for event in self._stream:
+            if self._stop_event.is_set():
+                break
+            if event:
+                try:
+                    self.handle_event(event)
+                except Exception as e:
+                    self.logger.debug(f"忽略无法解析的事件: {e}")
+        raise ConnectionError("事件流已结束")
+
+    def execute_command(self, command: str, timeout: int = 30) -> tuple:
+        """在监听目标上执行一次性命令（用于全量同步）"""
+        if self.is_remote:
+            from transports import get_transport
+            return get_transport(self.server_config).execute(self.server_config, command, timeout)
+        from stream_executor import run_local
+        return run_local(command, timeout)
+
+    def open_command_stream(self, command: str):
+        """在监听目标上启动长时间运行的命令"""
+        if self.is_remote:
+            from transports import get_transport
+            return get_transport(self.server_config).open_stream(self.server_config, command)
+        from stream_executor import LocalLineStream
+        return LocalLineStream(command)
+
+    @abc.abstractmethod
+    def open_stream(self) -> Iterable[Any]:
+        """打开事件流，返回可迭代且带 close() 的对象"""
+        pass
+
+    @abc.abstractmethod
+    def resync(self):
+        """全量同步状态表"""
+        pass
+
+    @abc.abstractmethod
+    def handle_event(self, event: Any):
+        """应用单个事件"""
+        pass
\ No newline at end of file
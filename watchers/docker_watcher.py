@@ -0,0 +1,148 @@
+import json
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from watchers.base import BaseWatcher
+
+# 容器事件对应的状态变化
+_ACTION_STATES = {
+    'create': 'created',
+    'start': 'running',
+    'restart': 'running',
+    'unpause': 'running',
+    'pause': 'paused',
+    'die': 'exited',
+    'stop': 'exited'
+}
+
+
+class DockerWatcher(BaseWatcher):
+    """Docker容器状态监听器
+
+    订阅 docker events（远程通过SSH常驻通道执行 docker events --format '{{json .}}'，
+    本地使用 Docker SDK 的 client.events()），增量维护容器状态表。
+    通过 docker stop/restart/kill 主动停止引起的退出（die 之前有 kill 事件）不计入重启次数。
+    """
+
+    def __init__(self, server_config: Optional[Dict[str, Any]] = None, restart_window: float = 300, **kwargs):
+        super().__init__(server_config, **kwargs)
+        self.restart_window = restart_window
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self._docker_client = None
+
+    def open_stream(self):
+        if self.is_remote:
+            return self.open_command_stream(
+                "docker events --filter type=container --format '{{json .}}'"
+            )
+
+        import docker
+        if self._docker_client is None:
+            self._docker_client = docker.from_env()
+        return self._docker_client.events(decode=True, filters={'type': 'container'})
+
+    def resync(self):
+        """全量同步：重连后以 docker ps -a 的结果为准，保留已有的重启记录"""
+        if self.is_remote:
+            return_code, output, error = self.execute_command("docker ps -a --format '{{json .}}'", timeout=30)
+            if return_code != 0:
+                raise RuntimeError(f"docker ps failed: {error}")
+            states = {}
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                state = item.get('State') or ('running' if item.get('Status', '').startswith('Up') else 'exited')
+                for name in item.get('Names', '').split(','):
+                    states[name.strip()] = state.lower()
+        else:
+            states = {
+                container.name: container.status.lower()
+                for container in self._docker_client.containers.list(all=True)
+            }
+
+        now = time.time()
+        with self.lock:
+            for name in list(self.containers):
+                if name not in states:
+                    del self.containers[name]
+            for name, state in states.items():
+                entry = self._entry(name)
+                if entry['state'] != state:
+                    entry['state'] = state
+                    entry['since'] = now
+
+    def handle_event(self, event: Any):
+        if isinstance(event, str):
+            event = json.loads(event)
+        if event.get('Type', 'container') != 'container':
+            return
+
+        action = event.get('Action') or event.get('status', '')
+        attributes = event.get('Actor', {}).get('Attributes', {})
+        name = attributes.get('name')
+        if not name:
+            return
+        timestamp = event.get('timeNano', 0) / 1e9 or event.get('time') or time.time()
+
+        with self.lock:
+            if action == 'destroy':
+                self.containers.pop(name, None)
+                return
+            if action == 'rename':
+                old_name = attributes.get('oldName', '').lstrip('/')
+                if old_name in self.containers:
+                    self.containers[name] = self.containers.pop(old_name)
+                return
+
+            entry = self._entry(name)
+            entry['last_event'] = action
+            entry['last_event_time'] = timestamp
+            if action.startswith('health_status'):
+                entry['health'] = action.split(':', 1)[-1].strip()
+            elif action == 'oom':
+                entry['oom_killed_at'] = timestamp
+            elif action == 'kill':
+                entry['stop_requested'] = True
+            elif action in _ACTION_STATES:
+                if action == 'die':
+                    if not entry['stop_requested']:
+                        entry['deaths'].append(timestamp)
+                    entry['stop_requested'] = False
+                    entry['exit_code'] = attributes.get('exitCode')
+                elif action == 'start':
+                    entry['stop_requested'] = False
+                state = _ACTION_STATES[action]
+                if entry['state'] != state:
+                    entry['state'] = state
+                    entry['since'] = timestamp
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        entry = self.containers.get(name)
+        if entry is None:
+            entry = {
+                'state': 'unknown',
+                'since': None,
+                'health': None,
+                'exit_code': None,
+                'last_event': None,
+                'last_event_time': None,
+                'stop_requested': False,
+                'deaths': deque(maxlen=50)
+            }
+            self.containers[name] = entry
+        return entry
+
+    def get_container(self, name: str, restart_window: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """查询容器当前状态，未同步或容器不存在时返回None
+
+        restart_window 为统计重启次数的时间窗口，同一主机的多个检测可以使用不同的窗口。
+        """
+        with self.lock:
+            entry = self.containers.get(name)
+            if entry is None:
+                return None
+            cutoff = time.time() - (restart_window or self.restart_window)
+            result = {key: value for key, value in entry.items() if key not in ('deaths', 'stop_requested')}
+            result['recent_restarts'] = sum(1 for ts in entry['deaths'] if ts >= cutoff)
+            return result
\ No newline at end of file
@@ -0,0 +1,41 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple, Type
+from watchers.base import BaseWatcher
+
+
+class WatchManager:
+    """监听器管理器：每个主机每种监听器只启动一个实例"""
+
+    def __init__(self):
+        self.watchers: Dict[Tuple[str, str], BaseWatcher] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get_watcher(self, watcher_class: Type[BaseWatcher], server_config: Optional[Dict[str, Any]] = None,
+                    **kwargs) -> BaseWatcher:
+        """获取主机的监听器，不存在时创建并启动
+
+        kwargs 只在首次创建时生效；随检测配置变化的参数（如统计窗口）应在查询时传入。
+        """
+        server_name = server_config.get('name', 'unknown') if server_config else 'local'
+        key = (watcher_class.__name__, server_name)
+        with self._lock:
+            watcher = self.watchers.get(key)
+            if watcher is None:
+                watcher = watcher_class(server_config, **kwargs)
+                watcher.start()
+                self.watchers[key] = watcher
+                self.logger.info(f"启动监听器: {watcher_class.__name__} ({server_name})")
+            return watcher
+
+    def stop_all(self):
+        """停止所有监听器"""
+        with self._lock:
+            for watcher in self.watchers.values():
+                watcher.stop()
+            self.watchers.clear()
+
+
+# 全局监听器管理器实例
+watch_manager = WatchManager()
\ No newline at end of file
@@ -0,0 +1,132 @@
+import json
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+from watchers.base import BaseWatcher
+
+# systemd 日志目录中单元状态变化消息的 MESSAGE_ID
+_MESSAGE_STATES = {
+    '7d4958e842da4a758f6c1cdc7b36dcc5': 'activating',    # 单元开始启动
+    '39f53479d3a045ac8e11786248231fbf': 'active',        # 单元启动完成
+    'be02cf6855d2428ba40df7e9d022f03d': 'failed',        # 启动任务失败
+    'de5b426a63be47a7b6ac3eb1a3a4ac7f': 'deactivating',  # 单元开始停止
+    '9d1aaa27d60140bd96365438aad20286': 'inactive',      # 单元已停止
+    '7ad2d189f7e94e70a38c781354912448': 'inactive',      # 单元正常退出
+    'd9b373ed55a64feb8242e02dbe79a49c': 'failed',        # 单元进入失败状态
+    '5eb03494b6584870a536b337290809b3': 'activating',    # 已安排自动重启
+}
+
+
+def _count_restarts(transitions: List[Tuple[float, str, str]], cutoff: float) -> int:
+    """统计 cutoff 之后的重启次数：一次退出（离开 active 或进入 failed）之后的再次启动计为一次
+
+    崩溃经过 deactivating、failed 等多个状态也只算一次退出；人工 stop 之后没有再启动的不计入；
+    自动重启（active 直接进入 activating）本身同时是退出和启动。
+    """
+    restarts = 0
+    exited = bool(transitions) and transitions[0][1] == 'failed'
+    for ts, from_state, to_state in transitions:
+        leaving = from_state == 'active' or to_state == 'failed'
+        starting = to_state == 'activating' or (to_state == 'active' and from_state != 'activating')
+        if starting and (exited or leaving):
+            exited = False
+            if ts >= cutoff:
+                restarts += 1
+        elif leaving:
+            exited = True
+    return restarts
+
+
+class SystemdWatcher(BaseWatcher):
+    """Systemd单元状态监听器
+
+    通过常驻通道执行 journalctl -f -o json _PID=1，跟踪 systemd 记录的单元状态变化，
+    实时维护已跟踪单元的状态并记录每次状态转换的时间。
+    """
+
+    def __init__(self, server_config: Optional[Dict[str, Any]] = None, flap_window: float = 300, **kwargs):
+        super().__init__(server_config, **kwargs)
+        self.flap_window = flap_window
+        self.units: Dict[str, Dict[str, Any]] = {}
+        self.tracked: Set[str] = set()
+
+    @staticmethod
+    def normalize_unit(unit: str) -> str:
+        return unit if '.' in unit else f"{unit}.service"
+
+    def track(self, unit: str):
+        """登记需要跟踪的单元"""
+        with self.lock:
+            self.tracked.add(self.normalize_unit(unit))
+
+    def open_stream(self):
+        return self.open_command_stream("journalctl -f -o json -n 0 _PID=1")
+
+    def resync(self):
+        """全量同步已跟踪单元的当前状态"""
+        with self.lock:
+            units = sorted(self.tracked)
+        if not units:
+            return
+
+        command = "systemctl show -p Id -p ActiveState " + " ".join(units)
+        return_code, output, error = self.execute_command(command, timeout=30)
+        if return_code != 0:
+            raise RuntimeError(f"systemctl show failed: {error}")
+
+        now = time.time()
+        for block in output.strip().split('\n\n'):
+            fields = dict(line.split('=', 1) for line in block.splitlines() if '=' in line)
+            if 'Id' in fields and 'ActiveState' in fields:
+                self.observe(fields['Id'], fields['ActiveState'], now, reconciled=True)
+
+    def handle_event(self, event: Any):
+        if isinstance(event, str):
+            event = json.loads(event)
+        state = _MESSAGE_STATES.get(event.get('MESSAGE_ID'))
+        unit = event.get('UNIT')
+        if state is None or not unit:
+            return
+        if state == 'active' and event.get('JOB_RESULT') not in (None, 'done'):
+            state = 'failed'
+        timestamp = int(event.get('__REALTIME_TIMESTAMP', 0)) / 1e6 or time.time()
+        self.observe(unit, state, timestamp)
+
+    def observe(self, unit: str, state: str, timestamp: Optional[float] = None, reconciled: bool = False):
+        """记录单元状态，状态变化时追加一次转换记录"""
+        unit = self.normalize_unit(unit)
+        timestamp = timestamp or time.time()
+        with self.lock:
+            if unit not in self.tracked:
+                return
+            entry = self.units.get(unit)
+            if entry is None:
+                entry = {'state': state, 'since': timestamp, 'reconciled_at': None,
+                         'transitions': deque(maxlen=50)}
+                self.units[unit] = entry
+            elif entry['state'] != state:
+                entry['transitions'].append((timestamp, entry['state'], state))
+                entry['state'] = state
+                entry['since'] = timestamp
+            if reconciled:
+                entry['reconciled_at'] = time.time()
+
+    def get_unit(self, unit: str, flap_window: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """查询单元状态，尚未获得状态时返回None
+
+        flap_window 为统计状态变化次数的时间窗口，同一主机的多个检测可以使用不同的窗口。
+        """
+        unit = self.normalize_unit(unit)
+        with self.lock:
+            entry = self.units.get(unit)
+            if entry is None:
+                return None
+            cutoff = time.time() - (flap_window or self.flap_window)
+            transitions = list(entry['transitions'])
+            return {
+                'state': entry['state'],
+                'since': entry['since'],
+                'reconciled_at': entry['reconciled_at'],
+                'recent_restarts': _count_restarts(transitions, cutoff),
+                'last_transition': transitions[-1] if transitions else None
+            }
@@ -1,181 +1,932 @@
-from flask import Flask, render_template, jsonify
-import threading
-import time
-import logging
-import os
-from typing import Dict, List, Any
-from detectors.base import CheckResult, ServiceStatus
-
-
-class WebServer:
-    """Web监控服务器"""
-
-    def __init__(self, host='0.0.0.0', port=5000, service_monitor=None):
-        self.host = host
-        self.port = port
-        self.service_monitor = service_monitor
-
-        # 创建Flask应用，明确指定静态文件目录
-        self.app = Flask(
-            __name__,
-            template_folder='templates',
-            static_folder='static'
-        )
-
-        self.last_results: List[CheckResult] = []
-        self.last_check_time = None
-        self.setup_routes()
-
-    def setup_routes(self):
-        """设置路由"""
-
-        @self.app.route('/')
-        def index():
-            return render_template('index.html')
-
-        @self.app.route('/api/status')
-        def get_status():
-            """获取服务状态API"""
-            try:
-                status_data = self._format_status_data()
-                return jsonify(status_data)
-            except Exception as e:
-                logging.error(f"API错误: {e}")
-                return jsonify({'error': str(e)}), 500
-
-        @self.app.route('/api/refresh', methods=['POST'])
-        def refresh():
-            """手动刷新状态"""
-            try:
-                if self.service_monitor:
-                    # 正确的调用方法 - 使用 run_health_check
-                    results = self.service_monitor.run_health_check()
-                    if results is not None:
-                        self.last_results = results
-                        self.last_check_time = time.time()
-                        return jsonify({
-                            'success': True,
-                            'message': f'刷新成功，检测了 {len(results)} 个服务'
-                        })
-                    else:
-                        return jsonify({'success': False, 'message': '健康检查返回空结果'})
-                else:
-                    return jsonify({'success': False, 'message': '监控服务未初始化'})
-            except Exception as e:
-                logging.error(f"刷新错误: {e}")
-                return jsonify({'success': False, 'message': f'刷新失败: {str(e)}'}), 500
-
-    def _format_status_data(self) -> Dict[str, Any]:
-        """格式化状态数据 - 按主机聚合"""
-        # 如果没有结果，返回空数据
-        if not self.last_results:
-            return {
-                'hosts': [],
-                'overall_status': 'unknown',
-                'total_services': 0,
-                'total_healthy': 0,
-                'total_unhealthy': 0,
-                'total_unknown': 0,
-                'last_check_time': self.last_check_time,
-                'current_time': time.time()
-            }
-
-        # 按主机分组
-        hosts_data = {}
-
-        for result in self.last_results:
-            host_name = result.server
-            if host_name not in hosts_data:
-                # 获取主机配置信息
-                host_config = self._get_host_config(host_name)
-                hosts_data[host_name] = {
-                    'host_name': host_name,
-                    'host_address': host_config.get('host', 'N/A'),
-                    'host_type': self._get_host_type(host_config),
-                    'services': [],
-                    'health_status': 'healthy',
-                    'healthy_count': 0,
-                    'unhealthy_count': 0,
-                    'unknown_count': 0,
-                    'total_services': 0
-                }
-
-            host_data = hosts_data[host_name]
-            service_data = {
-                'name': result.service_name,
-                'type': result.service_type,
-                'status': result.status.value,
-                'message': result.message,
-                'details': result.details or {},
-                'timestamp': time.time()
-            }
-
-            host_data['services'].append(service_data)
-            host_data['total_services'] += 1
-
-            # 统计服务状态
-            if result.status == ServiceStatus.HEALTHY:
-                host_data['healthy_count'] += 1
-            elif result.status == ServiceStatus.UNHEALTHY:
-                host_data['unhealthy_count'] += 1
-                host_data['health_status'] = 'unhealthy'
-            else:
-                host_data['unknown_count'] += 1
-                if host_data['health_status'] == 'healthy':
-                    host_data['health_status'] = 'warning'
-
-        # 转换为列表并排序
-        hosts_list = list(hosts_data.values())
-        hosts_list.sort(key=lambda x: x['host_name'])
-
-        # 总体统计
-        total_services = len(self.last_results)
-        total_healthy = sum(host['healthy_count'] for host in hosts_list)
-        total_unhealthy = sum(host['unhealthy_count'] for host in hosts_list)
-        total_unknown = sum(host['unknown_count'] for host in hosts_list)
-
-        overall_status = 'healthy' if total_unhealthy == 0 else 'unhealthy'
-        if total_unhealthy == 0 and total_unknown > 0:
-            overall_status = 'warning'
-
-        return {
-            'hosts': hosts_list,
-            'overall_status': overall_status,
-            'total_services': total_services,
-            'total_healthy': total_healthy,
-            'total_unhealthy': total_unhealthy,
-            'total_unknown': total_unknown,
-            'last_check_time': self.last_check_time,
-            'current_time': time.time()
-        }
-
-    def _get_host_config(self, host_name: str) -> Dict[str, Any]:
-        """获取主机配置信息"""
-        if (self.service_monitor and
-                hasattr(self.service_monitor, 'detector_factory') and
-                hasattr(self.service_monitor.detector_factory, 'ssh_servers_config')):
-            return self.service_monitor.detector_factory.ssh_servers_config.get(host_name, {})
-        return {}
-
-    def _get_host_type(self, host_config: Dict[str, Any]) -> str:
-        """获取主机类型"""
-        if not host_config:
-            return "本地主机"
-        return "SSH远程主机"
-
-    def update_results(self, results: List[CheckResult]):
-        """更新检测结果"""
-        self.last_results = results
-        self.last_check_time = time.time()
-        logging.info(f"更新Web界面数据: {len(results)}个服务状态")
-
-    def run(self):
-        """运行Web服务器"""
-        logging.info(f"启动Web监控界面: http://{self.host}:{self.port}")
-        self.app.run(host=self.host, port=self.port, debug=False)
-
-    def run_in_thread(self):
-        """在后台线程中运行Web服务器"""
-        thread = threading.Thread(target=self.run, daemon=True)
-        thread.start()
+from flask import Flask, Response, render_template, jsonify, request, g, send_file, url_for, abort, stream_with_context
+import base64
+import csv
+import hmac
+import gzip
+import io
+import itertools
+import json
+import random
+import threading
+import time
+import logging
+import mimetypes
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+from werkzeug.exceptions import HTTPException
+from asset_pipeline import AssetPipeline
+from debug_tools import stack_sampler, memory_tracker, object_counts, format_collapsed, render_flamegraph
+from detectors.base import CheckResult, ServiceStatus
+from rollup import RollupTree, RollupEntry, DEFAULT_GROUP, DEFAULT_REGION, LEVELS, status_value
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 服务配置（web_server 段）的默认值
+DEFAULT_SERVER_OPTIONS = {
+    'engine': 'waitress',          # waitress / flask（开发服务器）
+    'threads': 8,                  # 工作线程数
+    'connection_limit': 200,       # 同时保持的连接数上限
+    'channel_timeout': 30,         # 连接无活动超过该秒数后关闭
+    'max_request_body_size': 16 * 1024 * 1024,
+    'compress_min_size': 1024,     # 小于该字节数的JSON响应不压缩
+    'access_log_sample': 0.0,      # 访问日志采样比例，错误响应总是记录
+    'drain_timeout': 10,           # 关闭时等待进行中请求完成的秒数
+    'build_assets': True,          # 启动时构建带哈希和预压缩的静态资源
+    'subset_fonts': True           # 按实际使用的图标裁剪图标字体（需要fontTools）
+}
+
+# 带哈希的资源内容不会变化，允许浏览器永久缓存
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Agent停止上报超过该秒数后，其结果从界面和汇总中移除
+AGENT_EXPIRE_AFTER = 24 * 3600
+# 本机地址：未配置令牌时推送类接口只接受来自这些地址的请求
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+# /api/status 单页最多返回的主机数
+MAX_PAGE_SIZE = 1000
+# /api/rollup 最多展开的层数
+MAX_ROLLUP_DEPTH = 3
+# 历史导出每次写出的数据块大小（字节）
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_COLUMNS = ['id', 'ts', 'host', 'service', 'type', 'status', 'message', 'details', 'cursor']
+
+
+class WebServer:
+    """Web监控服务器"""
+
+    def __init__(self, host='0.0.0.0', port=5000, service_monitor=None, agent_token: str = '',
+                 agent_stale_after: float = None, server_options: Optional[Dict[str, Any]] = None,
+                 debug: bool = False, debug_token: str = ''):
+        self.host = host
+        self.port = port
+        self.service_monitor = service_monitor
+        self.options = {**DEFAULT_SERVER_OPTIONS, **(server_options or {})}
+        self.agent_token = agent_token
+        # 调试接口（/api/debug/*）：debug 为真且设置了 debug_token 时启用，请求需携带 X-Debug-Token。
+        # 不按来源地址放行：经反向代理访问时 remote_addr 总是本机地址
+        self.debug = debug
+        self.debug_token = debug_token
+        if debug and not debug_token:
+            logging.warning("已启用 debug 但未设置 debug_token，调试接口将拒绝所有请求")
+        # 未配置时按Agent上报的检测间隔的3倍判定数据过期
+        self.agent_stale_after = agent_stale_after
+
+        # 创建Flask应用，明确指定静态文件目录
+        self.app = Flask(
+            __name__,
+            template_folder='templates',
+            static_folder='static'
+        )
+        self.app.config['MAX_CONTENT_LENGTH'] = self.options['max_request_body_size']
+
+        self.last_results: List[CheckResult] = []
+        self.last_check_time = None
+        self.stale = False
+        self.agent_states: Dict[str, Dict[str, Any]] = {}
+        # 集群模式下由 ServiceMonitor 设置为 ClusterNode
+        self.cluster = None
+        # 启用检测历史时由 ServiceMonitor 设置为 HistoryStore
+        self.history = None
+        self._agent_lock = threading.Lock()
+        self._server = None
+        # 进行中的请求数，关闭时等待其归零
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
+        # 区域 -> 分组 -> 主机 -> 服务 的增量汇总，结果更新时维护，读取时不再遍历全部结果
+        self.rollup = RollupTree()
+        # 按主机聚合的状态数据：(数据版本, 状态数据, 主机名 -> 主机)，结果变化后首次请求时重建
+        self._versions = itertools.count(1)
+        self._status_version = next(self._versions)
+        self._status_cache: Optional[Tuple[int, Dict[str, Any], Dict[str, Dict[str, Any]]]] = None
+        self._status_lock = threading.Lock()
+        self.assets = AssetPipeline(
+            static_dir=self.app.static_folder,
+            output_dir=os.path.join(self.app.static_folder, 'dist'),
+            subset_fonts=self.options['subset_fonts'],
+            icon_sources=[os.path.join(self.app.static_folder, 'js', 'script.js'),
+                          os.path.join(self.app.root_path, 'templates', 'index.html')]
+        )
+        if self.options['build_assets']:
+            try:
+                self.assets.load_or_build()
+            except Exception as e:
+                logging.error(f"静态资源构建失败，使用原始文件: {e}")
+        self.app.add_template_global(self.asset_url, 'asset_url')
+        self.setup_routes()
+        self.setup_hooks()
+
+    def setup_routes(self):
+        """设置路由"""
+
+        @self.app.route('/')
+        def index():
+            return render_template('index.html')
+
+        @self.app.route('/assets/<path:filename>')
+        def assets(filename):
+            """带哈希的静态资源：永久缓存，按 Accept-Encoding 返回预压缩版本"""
+            return self._send_asset(filename)
+
+        @self.app.route('/api/status')
+        def get_status():
+            """获取服务状态API"""
+            try:
+                data, _ = self._status_view()
+                status_data = self._query_status(dict(data, current_time=time.time()), request.args)
+                return jsonify(status_data)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                logging.error(f"API错误: {e}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/hosts/<path:host_name>')
+        def get_host(host_name):
+            """获取单个主机及其全部服务的详情"""
+            _, hosts = self._status_view()
+            host = hosts.get(host_name)
+            if host is None:
+                return jsonify({'error': f'主机不存在: {host_name}'}), 404
+            return jsonify(host)
+
+        @self.app.route('/api/rollup')
+        def get_rollup():
+            """层级汇总：path 为 区域/分组/主机，省略时返回整体汇总；depth 为展开的子层数"""
+            self._check_agent_staleness()
+            path = tuple(part for part in request.args.get('path', '').split('/') if part)
+            if len(path) >= len(LEVELS):
+                return jsonify({'error': f'路径最多 {len(LEVELS) - 1} 层: 区域/分组/主机'}), 400
+            summary = self.rollup.summary(path)
+            if summary is None:
+                return jsonify({'error': f'节点不存在: {"/".join(path)}'}), 404
+            depth = min(max(request.args.get('depth', 1, type=int), 0), MAX_ROLLUP_DEPTH)
+            data = {
+                'path': list(path),
+                'summary': summary,
+                'children_level': LEVELS[len(path)],
+                'children': self._rollup_children(path, depth)
+            }
+            if not path:
+                data['tags'] = self.rollup.tags()
+            return jsonify(data)
+
+        @self.app.route('/api/history')
+        def get_history():
+            """检测历史分页查询，返回一页记录和下一页游标"""
+            if self.history is None:
+                return jsonify({'error': '未启用检测历史'}), 404
+            try:
+                filters = self._history_filters(request.args)
+                limit = min(max(request.args.get('limit', 100, type=int), 1), MAX_PAGE_SIZE)
+                records = list(self.history.query(**filters, limit=limit + 1))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            has_more = len(records) > limit
+            records = records[:limit]
+            return jsonify({
+                'records': records,
+                'next_cursor': self._history_cursor(records[-1]) if has_more else None
+            })
+
+        @self.app.route('/api/history/export')
+        def export_history():
+            """流式导出检测历史
+
+            format  ndjson（默认）或 csv；每条记录带 cursor，中断后以最后收到的 cursor 续传
+            其余参数同 /api/history：start / end（时间戳或ISO时间）、host、service、status、cursor、limit
+            """
+            if self.history is None:
+                return jsonify({'error': '未启用检测历史'}), 404
+            export_format = request.args.get('format', 'ndjson')
+            if export_format not in ('ndjson', 'csv'):
+                return jsonify({'error': f'不支持的导出格式: {export_format}'}), 400
+            try:
+                filters = self._history_filters(request.args)
+                limit = request.args.get('limit', type=int)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+            chunks = self._export_chunks(self.history.query(**filters, limit=limit), export_format)
+            headers = {'Content-Disposition': f'attachment; filename=history.{export_format}'}
+            if 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+                chunks = self._gzip_stream(chunks)
+                headers['Content-Encoding'] = 'gzip'
+                headers['Vary'] = 'Accept-Encoding'
+            # 不设置 Content-Length，由服务器以分块传输编码逐块发送
+            mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+            return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+        @self.app.route('/api/debug/profile')
+        def debug_profile():
+            """对所有线程做限时调用栈采样
+
+            seconds 采样时长（默认10，最多60），interval 采样间隔秒数（默认0.01）
+            format  collapsed（折叠栈文本，默认）/ svg（火焰图）/ json
+            """
+            self._require_debug()
+            seconds = request.args.get('seconds', 10, type=float)
+            interval = request.args.get('interval', 0.01, type=float)
+            output_format = request.args.get('format', 'collapsed')
+            if output_format not in ('collapsed', 'svg', 'json'):
+                return jsonify({'error': f'不支持的格式: {output_format}'}), 400
+            profile = stack_sampler.profile(seconds, interval)
+            if profile is None:
+                return jsonify({'error': '已有采样正在进行'}), 409
+            if output_format == 'json':
+                return jsonify(profile)
+            if output_format == 'svg':
+                title = f"service_checker {profile['samples']} samples / {profile['duration']}s"
+                return Response(render_flamegraph(profile['stacks'], title), mimetype='image/svg+xml')
+            return Response(format_collapsed(profile['stacks']), mimetype='text/plain')
+
+        @self.app.route('/api/debug/memory')
+        def debug_memory():
+            """tracemalloc 快照：占用最多的代码位置，以及与上一次快照的差异"""
+            self._require_debug()
+            group_by = request.args.get('group_by', 'lineno')
+            if group_by not in ('lineno', 'filename', 'traceback'):
+                return jsonify({'error': f'不支持的分组方式: {group_by}'}), 400
+            return jsonify(memory_tracker.snapshot(
+                top=min(max(request.args.get('top', 25, type=int), 1), 500),
+                frames=min(max(request.args.get('frames', 1, type=int), 1), 50),
+                group_by=group_by
+            ))
+
+        @self.app.route('/api/debug/memory/stop', methods=['POST'])
+        def debug_memory_stop():
+            """关闭 tracemalloc 并丢弃快照"""
+            self._require_debug()
+            memory_tracker.stop()
+            return jsonify({'success': True})
+
+        @self.app.route('/api/debug/objects')
+        def debug_objects():
+            """存活对象统计：检测结果、SSH连接和通道数，以及数量最多的类型"""
+            self._require_debug()
+            return jsonify(object_counts(min(max(request.args.get('top', 30, type=int), 1), 500)))
+
+        @self.app.route('/api/metrics')
+        def get_metrics():
+            """获取检测运行指标（周期超时次数、仍在运行的超时检测等）"""
+            metrics = {}
+            if self.service_monitor and hasattr(self.service_monitor, 'checker'):
+                metrics['checker'] = self.service_monitor.checker.get_metrics()
+            return jsonify(metrics)
+
+        @self.app.route('/api/refresh', methods=['POST'])
+        def refresh():
+            """手动刷新状态"""
+            try:
+                if self.service_monitor:
+                    # 正确的调用方法 - 使用 run_health_check
+                    results = self.service_monitor.run_health_check()
+                    if results is not None:
+                        return jsonify({
+                            'success': True,
+                            'message': f'刷新成功，检测了 {len(results)} 个服务'
+                        })
+                    else:
+                        return jsonify({'success': False, 'message': '健康检查返回空结果'})
+                else:
+                    return jsonify({'success': False, 'message': '监控服务未初始化'})
+            except Exception as e:
+                logging.error(f"刷新错误: {e}")
+                return jsonify({'success': False, 'message': f'刷新失败: {str(e)}'}), 500
+
+        @self.app.route('/api/agent/ingest', methods=['POST'])
+        def agent_ingest():
+            """接收Agent推送的检测结果"""
+            if not self._token_allowed(self.agent_token, request.headers.get('X-Agent-Token')):
+                return jsonify({'success': False, 'message': '无效的Agent令牌'}), 403
+            try:
+                body = self._read_body()
+                if body is None:
+                    return jsonify({'success': False, 'message': '解压后的数据超过大小限制'}), 413
+                accepted = self.ingest_agent_batch(body.decode('utf-8'))
+                return jsonify({'success': True, 'accepted': accepted})
+            except HTTPException:
+                raise
+            except Exception as e:
+                logging.error(f"Agent数据接收错误: {e}")
+                return jsonify({'success': False, 'message': str(e)}), 400
+
+        @self.app.route('/api/cluster')
+        def cluster_status():
+            """集群节点存活情况及分片"""
+            if self.cluster is None:
+                return jsonify({'enabled': False})
+            services_config = self.service_monitor.get_services_config() if self.service_monitor else []
+            return jsonify({'enabled': True, **self.cluster.get_status(services_config)})
+
+        @self.app.route('/api/cluster/heartbeat', methods=['POST'])
+        def cluster_heartbeat():
+            """接收其他节点的心跳"""
+            if self.cluster is None:
+                abort(404)
+            if not self._token_allowed(self.cluster.token, request.headers.get('X-Cluster-Token')):
+                return jsonify({'success': False, 'message': '无效的集群令牌'}), 403
+            data = request.get_json(silent=True) or {}
+            self.cluster.mark_seen(str(data.get('node_id', '')))
+            return jsonify({'success': True, 'node_id': self.cluster.node_id, 'alive': self.cluster.alive_nodes()})
+
+        @self.app.route('/api/cluster/results', methods=['POST'])
+        def cluster_results():
+            """接收其他节点的检测结果，与Agent结果使用同一套合并逻辑"""
+            if self.cluster is None:
+                abort(404)
+            if not self._token_allowed(self.cluster.token, request.headers.get('X-Cluster-Token')):
+                return jsonify({'success': False, 'message': '无效的集群令牌'}), 403
+            try:
+                body = self._read_body()
+                if body is None:
+                    return jsonify({'success': False, 'message': '解压后的数据超过大小限制'}), 413
+                payload = body.decode('utf-8')
+                header = json.loads(payload.partition('\n')[0])
+                if not str(header.get('agent_id', '')).startswith('node:'):
+                    raise ValueError(f"无效的节点标识: {header.get('agent_id')}")
+                self.cluster.mark_seen(header['agent_id'][len('node:'):])
+                accepted = self.ingest_agent_batch(payload)
+                return jsonify({'success': True, 'accepted': accepted})
+            except HTTPException:
+                raise
+            except Exception as e:
+                logging.error(f"集群结果接收错误: {e}")
+                return jsonify({'success': False, 'message': str(e)}), 400
+
+    def setup_hooks(self):
+        """请求计数、访问日志采样和JSON响应压缩"""
+
+        @self.app.before_request
+        def begin_request():
+            g.request_started = time.monotonic()
+            with self._inflight_lock:
+                self._inflight += 1
+
+        @self.app.teardown_request
+        def end_request(_exc):
+            with self._inflight_lock:
+                self._inflight -= 1
+
+        @self.app.after_request
+        def finish_response(response):
+            response = self._compress_response(response)
+            sample_rate = self.options['access_log_sample']
+            if response.status_code >= 500 or (sample_rate and random.random() < sample_rate):
+                duration = (time.monotonic() - g.get('request_started', time.monotonic())) * 1000
+                logging.info(f"{request.remote_addr} \"{request.method} {request.full_path.rstrip('?')}\" "
+                             f"{response.status_code} {response.calculate_content_length() or '-'} {duration:.1f}ms")
+            return response
+
+    @staticmethod
+    def _token_allowed(expected: str, token: Optional[str]) -> bool:
+        """推送类接口的访问控制：配置了令牌时必须一致，未配置时只接受本机请求"""
+        if expected:
+            return token is not None and hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
+        return request.remote_addr in LOOPBACK_ADDRESSES
+
+    def _read_body(self) -> Optional[bytes]:
+        """读取请求体，gzip 压缩的按 max_request_body_size 限制解压后大小，超过时返回None"""
+        body = request.get_data()
+        if request.headers.get('Content-Encoding', '').lower() != 'gzip':
+            return body
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            data = decompressor.decompress(body, self.options['max_request_body_size'])
+        except zlib.error as e:
+            raise ValueError(f"gzip数据无效: {e}")
+        if decompressor.unconsumed_tail:
+            return None
+        return data
+
+    def _require_debug(self):
+        """调试接口的访问控制，未启用时表现为不存在"""
+        if not self.debug:
+            abort(404)
+        if not self.debug_token or not self._token_allowed(self.debug_token, request.headers.get('X-Debug-Token')):
+            abort(403)
+
+    def asset_url(self, filename: str) -> str:
+        """模板中引用静态资源：已构建时返回带哈希的地址，否则回退到原始静态文件"""
+        hashed_path = self.assets.lookup(filename)
+        if hashed_path is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=hashed_path)
+
+    def _send_asset(self, filename: str):
+        base_dir = os.path.realpath(self.assets.output_dir)
+        path = os.path.realpath(os.path.join(base_dir, filename))
+        if not path.startswith(base_dir + os.sep) or not os.path.isfile(path):
+            abort(404)
+
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        encoding = None
+        accept_encoding = request.headers.get('Accept-Encoding', '').lower()
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if candidate in accept_encoding and os.path.isfile(path + suffix):
+                path, encoding = path + suffix, candidate
+                break
+
+        # 文件名中的哈希即内容版本，ETag 区分压缩方式
+        etag = os.path.basename(filename) + (f"-{encoding}" if encoding else '')
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=etag, max_age=IMMUTABLE_MAX_AGE)
+        response.headers['Cache-Control'] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        response.headers.add('Vary', 'Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _compress_response(self, response):
+        """按 Accept-Encoding 对JSON响应做 brotli 或 gzip 压缩"""
+        if (response.mimetype != 'application/json' or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers):
+            return response
+        body = response.get_data()
+        if len(body) < self.options['compress_min_size']:
+            return response
+
+        accept_encoding = request.headers.get('Accept-Encoding', '').lower()
+        if brotli is not None and 'br' in accept_encoding:
+            response.set_data(brotli.compress(body, quality=4))
+            response.headers['Content-Encoding'] = 'br'
+        elif 'gzip' in accept_encoding:
+            response.set_data(gzip.compress(body, compresslevel=5))
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            return response
+        response.headers.add('Vary', 'Accept-Encoding')
+        return response
+
+    def ingest_agent_batch(self, payload: str) -> bool:
+        """解析Agent批次（JSON lines，首行为批次头），过期或重复的序列号会被忽略"""
+        lines = [line for line in payload.splitlines() if line.strip()]
+        if not lines:
+            raise ValueError("空的Agent批次")
+
+        header = json.loads(lines[0])
+        agent_id = header['agent_id']
+        sequence = int(header['seq'])
+        results = [CheckResult.from_dict(json.loads(line)) for line in lines[1:]]
+
+        with self._agent_lock:
+            state = self.agent_states.get(agent_id)
+            if state and sequence <= state['seq']:
+                logging.warning(f"忽略Agent {agent_id} 的过期批次: seq={sequence} <= {state['seq']}")
+                return False
+            if state and state.get('stale'):
+                logging.info(f"Agent {agent_id} 恢复上报")
+            self.agent_states[agent_id] = {
+                'seq': sequence,
+                'last_seen': time.time(),
+                'reported_at': header.get('timestamp'),
+                'interval': header.get('interval', 30),
+                'results': results,
+                'stale': False
+            }
+            self.rollup.sync(f"agent:{agent_id}", self._rollup_entries(results))
+            self._invalidate_status()
+        if self.history is not None:
+            self.history.record(results, header.get('timestamp'))
+        return True
+
+    def remove_agent(self, agent_id: str):
+        """移除一个来源的全部结果（集群节点失效、分片已由其他节点接管时）"""
+        with self._agent_lock:
+            if self.agent_states.pop(agent_id, None) is not None:
+                self.rollup.sync(f"agent:{agent_id}", {})
+                self._invalidate_status()
+                logging.info(f"已移除 {agent_id} 的检测结果")
+
+    def _check_agent_staleness(self) -> Dict[str, float]:
+        """标记超时未上报的Agent，返回 过期Agent -> 未上报秒数；新过期的Agent在汇总中改记为未知"""
+        now = time.time()
+        stale_agents = {}
+        with self._agent_lock:
+            for agent_id, state in list(self.agent_states.items()):
+                stale_after = self.agent_stale_after or state['interval'] * 3
+                age = now - state['last_seen']
+                if age <= stale_after:
+                    continue
+                if age > max(AGENT_EXPIRE_AFTER, stale_after):
+                    # 长期未上报（主机已下线或Agent已改名），不再保留其结果
+                    del self.agent_states[agent_id]
+                    self.rollup.sync(f"agent:{agent_id}", {})
+                    self._invalidate_status()
+                    logging.warning(f"Agent {agent_id} 已 {int(age)} 秒未上报，移除其结果")
+                    continue
+                stale_agents[agent_id] = age
+                if not state['stale']:
+                    state['stale'] = True
+                    logging.warning(f"Agent {agent_id} 已 {int(age)} 秒未上报，结果标记为未知")
+                    self.rollup.sync(f"agent:{agent_id}", self._rollup_entries(state['results'], unknown=True))
+                    self._invalidate_status()
+        return stale_agents
+
+    def _collect_agent_results(self) -> List[CheckResult]:
+        """汇总Agent结果，超时未上报的Agent其结果标记为未知"""
+        stale_agents = self._check_agent_staleness()
+        collected = []
+        with self._agent_lock:
+            for agent_id, state in self.agent_states.items():
+                if agent_id not in stale_agents:
+                    collected.extend(state['results'])
+                    continue
+
+                # 状态数据按版本缓存，消息中使用固定的最后上报时间而不是不断变化的秒数
+                last_seen = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(state['last_seen']))
+                for result in state['results']:
+                    collected.append(CheckResult(
+                        service_name=result.service_name,
+                        service_type=result.service_type,
+                        status=ServiceStatus.UNKNOWN,
+                        message=f"Agent数据已过期（最后上报于 {last_seen}），最后状态: {result.status.value}",
+                        server=result.server,
+                        details=result.details
+                    ))
+        return collected
+
+    def _invalidate_status(self):
+        """检测结果或Agent状态变化后调用，下次请求时重建状态数据"""
+        self._status_version = next(self._versions)
+
+    def _status_view(self) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """返回 (状态数据, 主机名 -> 主机)；每个数据版本只聚合一次，请求之间共享，调用方不能修改"""
+        self._check_agent_staleness()
+        with self._status_lock:
+            version = self._status_version
+            if self._status_cache is None or self._status_cache[0] != version:
+                data = self._format_status_data()
+                self._status_cache = (version, data, {host['host_name']: host for host in data['hosts']})
+            return self._status_cache[1], self._status_cache[2]
+
+    def _collect_results(self) -> List[CheckResult]:
+        """本地检测结果与Agent推送结果合并"""
+        return list(self.last_results) + self._collect_agent_results()
+
+    def _query_status(self, data: Dict[str, Any], args) -> Dict[str, Any]:
+        """按查询参数过滤、分页主机列表
+
+        status  主机状态，逗号分隔（healthy / unhealthy / warning）
+        q       按主机名、地址或服务名搜索（不区分大小写）
+        tag     主机或其任一服务带有该标签
+        region / group  主机所在区域、分组（服务单独指定的分组也算）
+        page / page_size  页码分页；cursor 游标分页（上一页返回的 next_cursor）
+        summary 为真时不返回每个主机的服务列表
+        未指定分页参数时返回全部匹配的主机。总体统计始终基于全部主机。
+        """
+        hosts = data['hosts']
+        data['total_hosts'] = len(hosts)
+
+        statuses = {status for status in args.get('status', '').split(',') if status}
+        if statuses:
+            hosts = [host for host in hosts if host['health_status'] in statuses]
+        keyword = args.get('q', '').strip().lower()
+        if keyword:
+            hosts = [host for host in hosts if self._host_matches(host, keyword)]
+        tag = args.get('tag', '').strip()
+        if tag:
+            hosts = [host for host in hosts
+                     if tag in host['tags'] or any(tag in service['tags'] for service in host['services'])]
+        region = args.get('region', '').strip()
+        if region:
+            hosts = [host for host in hosts if host['region'] == region]
+        group = args.get('group', '').strip()
+        if group:
+            hosts = [host for host in hosts if group in host['groups']]
+        data['matched_hosts'] = len(hosts)
+
+        page_size = args.get('page_size', type=int)
+        if 'cursor' in args or 'page' in args or page_size:
+            page_size = min(max(page_size or 100, 1), MAX_PAGE_SIZE)
+            if 'page' in args:
+                page = max(args.get('page', 1, type=int), 1)
+                start = (page - 1) * page_size
+                data['page'] = page
+            else:
+                start = 0
+                if args.get('cursor'):
+                    # 游标是上一页最后一个主机名，主机按名称排序，数据刷新时翻页也不会重复或遗漏
+                    after = self._decode_cursor(args['cursor'])
+                    start = next((index for index, host in enumerate(hosts) if host['host_name'] > after), len(hosts))
+            page_hosts = hosts[start:start + page_size]
+            has_more = start + page_size < len(hosts)
+            data['page_size'] = page_size
+            data['next_cursor'] = self._encode_cursor(page_hosts[-1]['host_name']) if has_more else None
+            hosts = page_hosts
+
+        if args.get('summary', '').lower() in ('1', 'true', 'yes'):
+            hosts = [{key: value for key, value in host.items() if key != 'services'} for host in hosts]
+        data['hosts'] = hosts
+        return data
+
+    def _history_filters(self, args) -> Dict[str, Any]:
+        """历史查询参数，host / service / status 可重复或逗号分隔"""
+        def values(name):
+            return [value for item in args.getlist(name) for value in item.split(',') if value]
+
+        filters = {
+            'start': self._parse_time(args.get('start')),
+            'end': self._parse_time(args.get('end')),
+            'hosts': values('host'),
+            'services': values('service'),
+            'statuses': values('status'),
+            'after': None
+        }
+        if args.get('cursor'):
+            try:
+                ts, record_id = json.loads(self._decode_cursor(args['cursor']))
+                filters['after'] = (float(ts), int(record_id))
+            except (TypeError, ValueError):
+                raise ValueError(f"无效的分页游标: {args['cursor']}")
+        return filters
+
+    @staticmethod
+    def _parse_time(value: Optional[str]) -> Optional[float]:
+        """时间参数：Unix时间戳或ISO 8601时间（无时区时按本地时间）"""
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            raise ValueError(f"无效的时间: {value}")
+
+    def _history_cursor(self, record: Dict[str, Any]) -> str:
+        return self._encode_cursor(json.dumps([record['ts'], record['id']]))
+
+    def _export_chunks(self, records: Iterator[Dict[str, Any]], export_format: str) -> Iterator[bytes]:
+        """把记录编码为 NDJSON 或 CSV，攒够 EXPORT_CHUNK_SIZE 后写出一块"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == 'csv':
+            writer.writerow(EXPORT_COLUMNS)
+        for record in records:
+            cursor = self._history_cursor(record)
+            if export_format == 'ndjson':
+                buffer.write(json.dumps({**record, 'cursor': cursor}, ensure_ascii=False, default=str))
+                buffer.write('\n')
+            else:
+                details = json.dumps(record['details'], ensure_ascii=False, default=str) if record['details'] else ''
+                writer.writerow([record['id'], record['ts'], record['host'], record['service'], record['type'],
+                                 record['status'], record['message'], details, cursor])
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def _gzip_stream(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """逐块gzip压缩，不需要先拿到完整响应"""
+        compressor = zlib.compressobj(5, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @staticmethod
+    def _host_matches(host: Dict[str, Any], keyword: str) -> bool:
+        if keyword in host['host_name'].lower() or keyword in str(host['host_address']).lower():
+            return True
+        return any(keyword in service['name'].lower() for service in host['services'])
+
+    @staticmethod
+    def _encode_cursor(host_name: str) -> str:
+        return base64.urlsafe_b64encode(host_name.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> str:
+        try:
+            return base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        except Exception:
+            raise ValueError(f"无效的分页游标: {cursor}")
+
+    def _service_configs(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """(主机, 服务名) -> 服务配置，不同主机上的同名服务各自对应"""
+        if not self.service_monitor or not hasattr(self.service_monitor, 'get_services_config'):
+            return {}
+        return {
+            (service_config.get('server') or 'local', service_config.get('name')): service_config
+            for service_config in self.service_monitor.get_services_config()
+        }
+
+    def _rollup_entries(self, results: List[CheckResult], unknown: bool = False) -> Dict[Any, RollupEntry]:
+        """把检测结果转换为汇总树条目
+
+        区域取主机配置的 region；分组优先取服务配置的 group，其次是主机配置的 group；
+        标签为主机标签与服务标签的并集。unknown 为真时全部记为未知（Agent数据过期）。
+        """
+        service_configs = self._service_configs()
+        entries = {}
+        for result in results:
+            host_config = self._get_host_config(result.server)
+            service_config = service_configs.get((result.server or 'local', result.service_name), {})
+            region = str(host_config.get('region') or DEFAULT_REGION)
+            group = str(service_config.get('group') or host_config.get('group') or DEFAULT_GROUP)
+            entries[(result.server, result.service_name)] = RollupEntry(
+                (region, group, str(result.server), result.service_name),
+                'unknown' if unknown else status_value(result.status),
+                list(host_config.get('tags', [])) + list(service_config.get('tags', []))
+            )
+        return entries
+
+    def _rollup_children(self, path: tuple, depth: int) -> List[Dict[str, Any]]:
+        """子节点汇总，depth > 1 时逐层展开"""
+        if depth <= 0:
+            return []
+        children = self.rollup.children(path)
+        if depth > 1 and len(path) + 1 < len(LEVELS) - 1:
+            for child in children:
+                child['children'] = self._rollup_children(path + (child['name'],), depth - 1)
+        return children
+
+    def _format_status_data(self) -> Dict[str, Any]:
+        """格式化状态数据 - 按主机聚合"""
+        all_results = self._collect_results()
+
+        # 如果没有结果，返回空数据
+        if not all_results:
+            return {
+                'hosts': [],
+                'overall_status': 'unknown',
+                'total_services': 0,
+                'total_healthy': 0,
+                'total_unhealthy': 0,
+                'total_unknown': 0,
+                'last_check_time': self.last_check_time,
+                'stale': self.stale,
+                'current_time': time.time()
+            }
+
+        # 按主机分组
+        hosts_data = {}
+        service_configs = self._service_configs()
+
+        for result in all_results:
+            host_name = result.server
+            if host_name not in hosts_data:
+                # 获取主机配置信息
+                host_config = self._get_host_config(host_name)
+                hosts_data[host_name] = {
+                    'host_name': host_name,
+                    'host_address': host_config.get('host', 'N/A'),
+                    'host_type': "Agent推送主机" if host_name in self.agent_states else self._get_host_type(host_config),
+                    'tags': list(host_config.get('tags', [])),
+                    'region': str(host_config.get('region') or DEFAULT_REGION),
+                    'group': str(host_config.get('group') or DEFAULT_GROUP),
+                    'groups': [],
+                    'services': [],
+                    'health_status': 'healthy',
+                    'healthy_count': 0,
+                    'unhealthy_count': 0,
+                    'unknown_count': 0,
+                    'total_services': 0
+                }
+
+            host_data = hosts_data[host_name]
+            service_config = service_configs.get((result.server or 'local', result.service_name), {})
+            group = str(service_config.get('group') or host_data['group'])
+            if group not in host_data['groups']:
+                host_data['groups'].append(group)
+            service_data = {
+                'name': result.service_name,
+                'type': result.service_type,
+                'status': result.status.value,
+                'message': result.message,
+                'details': result.details or {},
+                'tags': list(service_config.get('tags', [])),
+                'group': group,
+                'timestamp': time.time()
+            }
+
+            host_data['services'].append(service_data)
+            host_data['total_services'] += 1
+
+            # 统计服务状态
+            if result.status == ServiceStatus.HEALTHY:
+                host_data['healthy_count'] += 1
+            elif result.status == ServiceStatus.UNHEALTHY:
+                host_data['unhealthy_count'] += 1
+                host_data['health_status'] = 'unhealthy'
+            else:
+                host_data['unknown_count'] += 1
+                if host_data['health_status'] == 'healthy':
+                    host_data['health_status'] = 'warning'
+
+        # 转换为列表并排序
+        hosts_list = list(hosts_data.values())
+        hosts_list.sort(key=lambda x: x['host_name'])
+
+        # 总体统计
+        total_services = len(all_results)
+        total_healthy = sum(host['healthy_count'] for host in hosts_list)
+        total_unhealthy = sum(host['unhealthy_count'] for host in hosts_list)
+        total_unknown = sum(host['unknown_count'] for host in hosts_list)
+
+        overall_status = 'healthy' if total_unhealthy == 0 else 'unhealthy'
+        if total_unhealthy == 0 and total_unknown > 0:
+            overall_status = 'warning'
+
+        return {
+            'hosts': hosts_list,
+            'overall_status': overall_status,
+            'total_services': total_services,
+            'total_healthy': total_healthy,
+            'total_unhealthy': total_unhealthy,
+            'total_unknown': total_unknown,
+            'last_check_time': self.last_check_time,
+            'stale': self.stale,
+            'current_time': time.time()
+        }
+
+    def _get_host_config(self, host_name: str) -> Dict[str, Any]:
+        """获取主机配置信息"""
+        if (self.service_monitor and
+                hasattr(self.service_monitor, 'detector_factory') and
+                hasattr(self.service_monitor.detector_factory, 'ssh_servers_config')):
+            return self.service_monitor.detector_factory.ssh_servers_config.get(host_name, {})
+        return {}
+
+    def _get_host_type(self, host_config: Dict[str, Any]) -> str:
+        """获取主机类型"""
+        if not host_config:
+            return "本地主机"
+        return "SSH远程主机"
+
+    def update_results(self, results: List[CheckResult], check_time: float = None, stale: bool = False):
+        """更新检测结果
+
+        stale 表示结果来自启动时加载的快照，尚未经过本次运行的检测确认。
+        """
+        self.last_results = results
+        self.last_check_time = check_time or time.time()
+        self.rollup.sync('local', self._rollup_entries(results))
+        self.stale = stale
+        self._invalidate_status()
+        if self.history is not None and not stale:
+            self.history.record(results, self.last_check_time)
+        logging.info(f"更新Web界面数据: {len(results)}个服务状态")
+
+    def run(self):
+        """运行Web服务器：优先使用 waitress（固定大小线程池），未安装时回退到Flask开发服务器"""
+        logging.info(f"启动Web监控界面: http://{self.host}:{self.port}")
+        if self.options['engine'] == 'waitress':
+            try:
+                from waitress.server import create_server
+            except ImportError:
+                logging.warning("未安装waitress，回退到Flask开发服务器")
+            else:
+                self._server = create_server(
+                    self.app,
+                    host=self.host,
+                    port=self.port,
+                    threads=self.options['threads'],
+                    connection_limit=self.options['connection_limit'],
+                    channel_timeout=self.options['channel_timeout'],
+                    max_request_body_size=self.options['max_request_body_size'],
+                    ident='service-monitor'
+                )
+                self._server.run()
+                return
+
+        from werkzeug.serving import make_server
+        self._server = make_server(self.host, self.port, self.app, threaded=True)
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """停止接受新连接，等待进行中的请求完成后关闭"""
+        server, self._server = self._server, None
+        if server is None:
+            return
+        logging.info("正在关闭Web服务器...")
+        if hasattr(server, 'task_dispatcher'):
+            # waitress：先关闭监听套接字，事件循环继续运行以发送进行中请求的响应
+            from waitress import wasyncore
+            wasyncore.dispatcher.close(server)
+        else:
+            server.shutdown()
+
+        deadline = time.monotonic() + self.options['drain_timeout']
+        while self._inflight > 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        if self._inflight > 0:
+            logging.warning(f"Web服务器关闭时仍有 {self._inflight} 个请求未完成")
+
+        if hasattr(server, 'task_dispatcher'):
+            server.task_dispatcher.shutdown(timeout=1)
+        else:
+            server.server_close()
+
+    def run_in_thread(self):
+        """在后台线程中运行Web服务器"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
         return thread
\ No newline at end of file